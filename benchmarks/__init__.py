@@ -0,0 +1,3 @@
+# benchmarks - Scripts de medición de rendimiento del sistema de veterinaria.
+# Cada módulo se ejecuta desde la raíz del repositorio con: python -m benchmarks.<modulo>
+# Los benchmarks trabajan siempre sobre bases de datos temporales, nunca sobre sg_veterinaria.db.
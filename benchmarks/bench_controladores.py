@@ -0,0 +1,160 @@
+# bench_controladores.py - Mide cada operación de controladores.py sobre una clínica sintética.
+# Uso: python -m benchmarks.bench_controladores [--bd CLINICA.db] [--veterinarios N] [--mascotas N] [--reservas N]
+#      [--repeticiones N] [--semilla S] [--salida resultados.json] [--solo op1,op2]
+# Sin --bd genera una clínica temporal con benchmarks.generador (misma semilla = mismos datos).
+# Por operación: una corrida en frío (pool cerrado y cachés de la aplicación vacíos; la caché del SO se mantiene),
+# N corridas en caliente con percentiles, y una corrida extra bajo tracemalloc para el pico de memoria.
+# Con --bd la base se copia a una carpeta temporal: las operaciones de escritura no alteran el original.
+# El JSON resultante se compara entre commits con: python -m benchmarks.comparar base.json nuevo.json
+import argparse, contextlib, datetime, io, json, os, platform, random, shutil, sqlite3, subprocess, tempfile, time, tracemalloc
+import sg_veterinaria
+from sg_reportes import invalidar_cache_reportes
+from sg_agenda import indice_agenda
+from sg_cache import cache_lectura
+from sg_disponibilidad import servicio_disponibilidad
+from sg_funciones import verificar_login
+from benchmarks.generador import generar_clinica, SEMILLA_DEFECTO, PASSWORD_BENCH, ESPECIES, ESPECIALIDADES, NOMBRES, FECHA_INICIAL
+import controladores as c
+
+# -----------------------------------------
+# Operaciones medidas
+# nombre -> (función que recibe (Random, tamaños) y ejecuta una llamada, repeticiones relativas)
+# verificar_login usa scrypt a propósito y por eso corre menos veces.
+# -----------------------------------------
+def _fecha_futura(r: random.Random) -> str:
+    return (FECHA_INICIAL + datetime.timedelta(days=3650 + r.randrange(3650))).isoformat()
+
+OPERACIONES = {
+    "registrar_nueva_mascota": (lambda r, t: c.registrar_nueva_mascota(r.choice(NOMBRES), r.choice(ESPECIES), "Mestiza", r.randint(0, 20), 5.0, r.randint(1, max(1, t["responsables"]))), 1.0),
+    "registrar_nuevo_veterinario": (lambda r, t: c.registrar_nuevo_veterinario(f"Dr. Bench {r.random()}", r.choice(ESPECIALIDADES)), 1.0),
+    "listar_mascotas": (lambda r, t: c.listar_mascotas(r.randrange(max(1, t["mascotas"]))), 1.0),
+    "listar_veterinarios": (lambda r, t: c.listar_veterinarios(r.randrange(max(1, t["veterinarios"]))), 1.0),
+    "buscar_mascotas_por_especie": (lambda r, t: c.buscar_mascotas_por_especie(r.choice(ESPECIES), r.randrange(max(1, t["mascotas"]))), 1.0),
+    "buscar_mascotas_por_responsable": (lambda r, t: c.buscar_mascotas_por_responsable(r.randint(1, max(1, t["responsables"]))), 1.0),
+    "buscar_reservas_por_responsable": (lambda r, t: c.buscar_reservas_por_responsable(r.randint(1, max(1, t["responsables"]))), 1.0),
+    "buscar_veterinarios_por_especialidad": (lambda r, t: c.buscar_veterinarios_por_especialidad(r.choice(ESPECIALIDADES)), 1.0),
+    "buscar_veterinarios_por_nombre": (lambda r, t: c.buscar_veterinarios_por_nombre(r.choice(NOMBRES)), 1.0),
+    "crear_reserva": (lambda r, t: c.crear_reserva(r.randint(1, max(1, t["mascotas"])), r.randint(1, max(1, t["veterinarios"])),
+        _fecha_futura(r), f"{r.randint(9, 17):02d}:{r.choice(('00', '30'))}:00", "Control", "Estable"), 1.0),
+    "modificar_reserva": (lambda r, t: c.modificar_reserva(r.randint(1, max(1, t["reservas"])), motivo=f"Bench {r.random()}"), 1.0),
+    "mostrar_reservas": (lambda r, t: c.mostrar_reservas(r.randrange(max(1, t["reservas"]))), 1.0),
+    "buscar_horarios_disponibles": (lambda r, t: c.buscar_horarios_disponibles(r.choice(ESPECIALIDADES), _fecha_futura(r), "2099-12-31"), 1.0),
+    "reporte_resumen_general": (lambda r, t: c.reporte_resumen_general(), 1.0),
+    "verificar_login": (lambda r, t: verificar_login(f"bench{r.randint(1, max(1, t['usuarios']))}", PASSWORD_BENCH), 0.1),
+}
+
+def enfriar() -> None:
+    # Cierra las conexiones (se pierde la caché de páginas de SQLite) y vacía las cachés de la aplicación
+    sg_veterinaria.cerrar_pool()
+    invalidar_cache_reportes()
+    indice_agenda.invalidar()
+    servicio_disponibilidad.invalidar()
+    cache_lectura.invalidar()
+
+def percentil(valores: list, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))]
+
+def medir_operacion(operacion, aleatorio: random.Random, tamanos: dict, repeticiones: int) -> dict:
+    with contextlib.redirect_stdout(io.StringIO()): # Los controladores imprimen sus resultados
+        enfriar()
+        inicio = time.perf_counter()
+        operacion(aleatorio, tamanos)
+        frio = time.perf_counter() - inicio
+
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            operacion(aleatorio, tamanos)
+            tiempos.append(time.perf_counter() - inicio)
+
+        tracemalloc.start()
+        try:
+            operacion(aleatorio, tamanos)
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    ms = lambda s: round(s * 1000, 3)
+    return {
+        "repeticiones": repeticiones,
+        "frio_ms": ms(frio),
+        "media_ms": ms(sum(tiempos) / len(tiempos)),
+        "p50_ms": ms(percentil(tiempos, 0.50)),
+        "p95_ms": ms(percentil(tiempos, 0.95)),
+        "p99_ms": ms(percentil(tiempos, 0.99)),
+        "max_ms": ms(max(tiempos)),
+        "memoria_pico_kb": round(pico / 1024, 1),
+    }
+
+def _commit_actual() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocido"
+
+def _tamanos(ruta: str) -> dict:
+    with sqlite3.connect(ruta) as conn:
+        return {tabla: conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {tabla}").fetchone()[0]
+                for tabla in ("veterinarios", "responsables", "mascotas", "reservas", "usuarios")}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de los controladores sobre una clínica sintética")
+    parser.add_argument("--bd", help="Clínica ya generada (se trabaja sobre una copia)")
+    parser.add_argument("--veterinarios", type=int, default=100)
+    parser.add_argument("--mascotas", type=int, default=10_000)
+    parser.add_argument("--reservas", type=int, default=50_000)
+    parser.add_argument("--usuarios", type=int, default=5)
+    parser.add_argument("--semilla", type=int, default=SEMILLA_DEFECTO)
+    parser.add_argument("--repeticiones", type=int, default=200)
+    parser.add_argument("--solo", help="Lista de operaciones separadas por coma")
+    parser.add_argument("--salida", default="resultados_benchmark.json")
+    args = parser.parse_args()
+
+    nombres = args.solo.split(",") if args.solo else list(OPERACIONES)
+    desconocidas = [n for n in nombres if n not in OPERACIONES]
+    if desconocidas:
+        parser.error(f"operaciones desconocidas: {', '.join(desconocidas)}")
+
+    db_original = sg_veterinaria.DB_NAME
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "clinica.db")
+        if args.bd:
+            shutil.copyfile(args.bd, ruta)
+            generacion = None
+        else:
+            generacion = generar_clinica(ruta, args.veterinarios, args.mascotas, args.reservas, args.usuarios, args.semilla)
+        tamanos = _tamanos(ruta)
+        sg_veterinaria.DB_NAME = ruta
+        resultados = {}
+        try:
+            for nombre in nombres:
+                operacion, factor = OPERACIONES[nombre]
+                aleatorio = random.Random(f"{args.semilla}-{nombre}") # Mismos argumentos en cada ejecución
+                resultados[nombre] = medir_operacion(operacion, aleatorio, tamanos, max(1, int(args.repeticiones * factor)))
+                print(f"{nombre:<38} frío {resultados[nombre]['frio_ms']:>9} ms   p50 {resultados[nombre]['p50_ms']:>8} ms   "
+                      f"p95 {resultados[nombre]['p95_ms']:>8} ms   pico {resultados[nombre]['memoria_pico_kb']:>8} KB")
+        finally:
+            sg_veterinaria.cerrar_pool()
+            sg_veterinaria.DB_NAME = db_original
+
+    documento = {
+        "meta": {
+            "commit": _commit_actual(),
+            "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "plataforma": platform.platform(),
+            "perfil_almacenamiento": sg_veterinaria.PERFIL_ALMACENAMIENTO,
+            "semilla": args.semilla,
+            "repeticiones": args.repeticiones,
+            "tamanos": tamanos,
+            "generacion": generacion,
+        },
+        "operaciones": resultados,
+    }
+    with open(args.salida, "w", encoding="utf-8") as archivo:
+        json.dump(documento, archivo, indent=2, ensure_ascii=False, sort_keys=True)
+    print(f"\nResultados guardados en {args.salida}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# bench_escritor.py - Compara escrituras concurrentes directas contra el escritor agrupado (group commit).
+# Uso: python -m benchmarks.bench_escritor [--escrituras N] [--hilos N] [--lote N] [--espera-ms MS] [--json]
+# Varios hilos registran mascotas a la vez: primero llamando al controlador (un commit por operación)
+# y después por sg_escritor (un commit por lote). Se repite con cada perfil de almacenamiento.
+import argparse, contextlib, io, json, os, tempfile, threading, time
+import sg_veterinaria
+from sg_migraciones import aplicar_migraciones
+from sg_salida import salida
+from sg_escritor import EscritorAgrupado
+from controladores import registrar_nueva_mascota
+
+# -----------------------------------------
+# Medir una modalidad
+# Devuelve operaciones por segundo; enviar(i) hace la escritura número i.
+# -----------------------------------------
+def medir(cantidad: int, hilos: int, enviar) -> float:
+    def trabajo(h: int) -> None:
+        for i in range(h, cantidad, hilos):
+            enviar(i)
+
+    trabajadores = [threading.Thread(target=trabajo, args=(h,)) for h in range(hilos)]
+    inicio = time.perf_counter()
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+    return cantidad / (time.perf_counter() - inicio)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark del escritor agrupado")
+    parser.add_argument("--escrituras", type=int, default=2000)
+    parser.add_argument("--hilos", type=int, default=16)
+    parser.add_argument("--lote", type=int, default=64, help="Operaciones por lote como máximo")
+    parser.add_argument("--espera-ms", type=float, default=2.0, help="Espera máxima para completar un lote")
+    parser.add_argument("--json", action="store_true", help="Imprimir resultados en JSON")
+    args = parser.parse_args()
+
+    def registrar(i: int):
+        return registrar_nueva_mascota(f"Bench {i}", "Perro", "Mestizo", 3, 10.0)
+
+    db_original, perfil_original = sg_veterinaria.DB_NAME, sg_veterinaria.PERFIL_ALMACENAMIENTO
+    resultados = {}
+    salida.instalar() # Lo que imprimen los controladores se descarta en cada hilo
+    try:
+        for perfil in sg_veterinaria.PERFILES_ALMACENAMIENTO:
+            with tempfile.TemporaryDirectory() as carpeta:
+                sg_veterinaria.DB_NAME = os.path.join(carpeta, "bench.db")
+                sg_veterinaria.configurar_perfil(perfil)
+                sg_veterinaria.configurar_pool(max(args.hilos + 1, sg_veterinaria.POOL_TAMANO))
+                aplicar_migraciones()
+
+                directas = medir(args.escrituras, args.hilos, lambda i: salida.capturar(registrar, i))
+                escritor = EscritorAgrupado(args.lote, args.espera_ms)
+                agrupadas = medir(args.escrituras, args.hilos, lambda i: escritor.enviar(registrar, i).result())
+                escritor.detener()
+                sg_veterinaria.cerrar_pool()
+            e = escritor.estadisticas()
+            resultados[perfil] = {
+                "directas_por_s": round(directas, 1), "agrupadas_por_s": round(agrupadas, 1),
+                "operaciones_por_lote": e["operaciones_por_lote"],
+                "commit_ms_p50": e["commit_ms"]["p50"], "latencia_ms_p99": e["latencia_ms"]["p99"],
+            }
+    finally:
+        salida.restaurar()
+        sg_veterinaria.DB_NAME = db_original
+        sg_veterinaria.configurar_perfil(perfil_original)
+
+    if args.json:
+        print(json.dumps(resultados, indent=2))
+        return
+    print(f"{'Perfil':<12} {'Directas/s':>12} {'Agrupadas/s':>12} {'Ops/lote':>10} {'Commit p50':>11} {'Latencia p99':>13}")
+    print("-" * 75)
+    for perfil, r in resultados.items():
+        print(f"{perfil:<12} {r['directas_por_s']:>12} {r['agrupadas_por_s']:>12} {r['operaciones_por_lote']:>10} "
+              f"{r['commit_ms_p50']:>11} {r['latencia_ms_p99']:>13}")
+
+if __name__ == "__main__":
+    main()
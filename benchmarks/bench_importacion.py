@@ -0,0 +1,107 @@
+# bench_importacion.py - Mide la velocidad de la importación masiva (filas/s) por tabla y formato.
+# Uso: python -m benchmarks.bench_importacion [--filas N] [--veterinarios N] [--formato csv|jsonl|ambos] [--lote N] [--json]
+# Genera archivos sintéticos de N filas (1.000.000 por defecto) en una carpeta temporal, los importa
+# sobre una base nueva con sg_importacion.importar() y compara con el alta registro a registro
+# de los controladores sobre una muestra pequeña.
+import argparse, contextlib, csv, datetime, io, json, os, tempfile, time
+import sg_veterinaria
+from sg_migraciones import aplicar_migraciones
+from sg_importacion import importar, TAMANO_LOTE_IMPORTACION
+from controladores import registrar_nueva_mascota
+
+ESPECIES = ["Perro", "Gato", "Conejo", "Hurón", "Ave"]
+SLOTS_POR_DIA = 18 # Citas de 30 minutos entre 09:00 y 18:00
+
+# -----------------------------------------
+# Generar archivos de entrada
+# Las reservas se reparten por veterinario y día para que no choquen entre sí.
+# -----------------------------------------
+def generar_filas(tabla: str, cantidad: int, veterinarios: int, mascotas: int, responsables: int):
+    base = datetime.date(2030, 1, 1)
+    for i in range(cantidad):
+        if tabla == "veterinarios":
+            yield {"nombre": f"Veterinario {i + 1}", "especialidad": ESPECIES[i % len(ESPECIES)]}
+        elif tabla == "responsables":
+            yield {"nombre": f"Tutor {i + 1}", "telefono": f"+56 9 {i:08d}", "email": f"tutor{i + 1}@ejemplo.cl"}
+        elif tabla == "mascotas":
+            yield {"nombre": f"Mascota {i + 1}", "especie": ESPECIES[i % len(ESPECIES)], "raza": "Mestiza",
+                   "edad": i % 20, "peso": round(1 + (i % 400) / 10, 1), "idResponsable": i % responsables + 1}
+        else:
+            turno = i // veterinarios
+            minutos = 9 * 60 + (turno % SLOTS_POR_DIA) * 30
+            yield {"idMascota": i % mascotas + 1, "idVeterinario": i % veterinarios + 1,
+                   "fecha": (base + datetime.timedelta(days=turno // SLOTS_POR_DIA)).isoformat(),
+                   "hora": f"{minutos // 60:02d}:{minutos % 60:02d}:00", "motivo": "Control", "estadoMascota": "Estable"}
+
+def escribir_archivo(ruta: str, formato: str, filas) -> None:
+    with open(ruta, "w", newline="", encoding="utf-8") as archivo:
+        if formato == "csv":
+            escritor = None
+            for fila in filas:
+                if escritor is None:
+                    escritor = csv.DictWriter(archivo, fieldnames=list(fila))
+                    escritor.writeheader()
+                escritor.writerow(fila)
+        else:
+            for fila in filas:
+                archivo.write(json.dumps(fila) + "\n")
+
+# -----------------------------------------
+# Medir alta registro a registro
+# Referencia: filas/s de registrar_nueva_mascota (una conexión y un commit por fila).
+# -----------------------------------------
+def medir_controlador(cantidad: int) -> float:
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(cantidad):
+            registrar_nueva_mascota(f"Unitaria {i}", "Perro", "Mestiza", 3, 10.0)
+    return cantidad / (time.perf_counter() - inicio)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de importación masiva")
+    parser.add_argument("--filas", type=int, default=1_000_000, help="Filas de mascotas y de reservas")
+    parser.add_argument("--veterinarios", type=int, default=500)
+    parser.add_argument("--formato", choices=["csv", "jsonl", "ambos"], default="ambos")
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE_IMPORTACION)
+    parser.add_argument("--muestra-unitaria", type=int, default=2000, help="Filas para la referencia registro a registro")
+    parser.add_argument("--json", action="store_true", help="Imprimir resultados en JSON")
+    args = parser.parse_args()
+
+    formatos = ["csv", "jsonl"] if args.formato == "ambos" else [args.formato]
+    cantidades = {"veterinarios": args.veterinarios, "responsables": max(1, min(50_000, args.filas)), "mascotas": args.filas, "reservas": args.filas}
+    db_original = sg_veterinaria.DB_NAME
+    resultados = {}
+    try:
+        for formato in formatos:
+            with tempfile.TemporaryDirectory() as carpeta:
+                sg_veterinaria.DB_NAME = os.path.join(carpeta, "bench.db")
+                aplicar_migraciones()
+                resultados[formato] = {}
+                for tabla, cantidad in cantidades.items(): # En este orden: las reservas necesitan a los demás
+                    ruta = os.path.join(carpeta, f"{tabla}.{formato}")
+                    escribir_archivo(ruta, formato, generar_filas(tabla, cantidad, args.veterinarios, args.filas, cantidades["responsables"]))
+                    r = importar(tabla, ruta, formato, args.lote)
+                    resultados[formato][tabla] = {
+                        "filas": r.leidas, "insertadas": r.insertadas, "con_error": r.con_error,
+                        "segundos": round(r.segundos, 2), "filas_por_s": round(r.filas_por_segundo, 1),
+                    }
+                if args.muestra_unitaria:
+                    resultados[formato]["unitaria_mascotas_por_s"] = round(medir_controlador(args.muestra_unitaria), 1)
+                sg_veterinaria.cerrar_pool()
+    finally:
+        sg_veterinaria.DB_NAME = db_original
+
+    if args.json:
+        print(json.dumps(resultados, indent=2))
+        return
+    print(f"{'Formato':<8} {'Tabla':<14} {'Filas':>10} {'Errores':>8} {'Segundos':>10} {'Filas/s':>12}")
+    print("-" * 67)
+    for formato, tablas in resultados.items():
+        for tabla, r in tablas.items():
+            if isinstance(r, dict):
+                print(f"{formato:<8} {tabla:<14} {r['filas']:>10} {r['con_error']:>8} {r['segundos']:>10} {r['filas_por_s']:>12}")
+        if "unitaria_mascotas_por_s" in tablas:
+            print(f"{formato:<8} {'(unitaria)':<14} {args.muestra_unitaria:>10} {'':>8} {'':>10} {tablas['unitaria_mascotas_por_s']:>12}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# bench_perfiles.py - Compara el rendimiento de escritura y lectura de cada perfil de almacenamiento.
+# Uso: python -m benchmarks.bench_perfiles [--escrituras N] [--lecturas N] [--lectores N] [--json]
+# Escrituras: reservas creadas con crear_reserva (un commit por operación, como en la app).
+# Lecturas: consultas por ID desde varios hilos mientras un hilo escritor inserta en paralelo.
+import argparse, contextlib, io, json, os, random, tempfile, threading, time
+import sg_veterinaria
+from sg_migraciones import aplicar_migraciones
+from controladores import crear_reserva, registrar_nueva_mascota, registrar_nuevo_veterinario
+
+# -----------------------------------------
+# Preparar base temporal
+# Aplica las migraciones y crea los datos mínimos (veterinario y mascota) para poder reservar.
+# -----------------------------------------
+def preparar_bd(ruta: str, perfil: str) -> None:
+    sg_veterinaria.DB_NAME = ruta
+    sg_veterinaria.configurar_perfil(perfil)
+    aplicar_migraciones() # Esquema vigente (mascotas con idResponsable)
+    with contextlib.redirect_stdout(io.StringIO()):
+        registrar_nuevo_veterinario("Benchmark", "General")
+        registrar_nueva_mascota("Bench", "Perro", "Mestizo", 3, 10.0)
+
+# -----------------------------------------
+# Medir escrituras
+# Devuelve operaciones por segundo de crear_reserva.
+# -----------------------------------------
+def medir_escrituras(cantidad: int) -> float:
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(cantidad):
+            crear_reserva(1, 1, f"2030-01-{1 + i % 28:02d}", f"{i % 24:02d}:00:00", "Control", "Estable")
+    return cantidad / (time.perf_counter() - inicio)
+
+# -----------------------------------------
+# Medir lecturas concurrentes
+# Varios hilos lectores consultan reservas por ID mientras un escritor inserta sin pausa.
+# Devuelve lecturas por segundo (agregado de todos los lectores).
+# -----------------------------------------
+def medir_lecturas(cantidad: int, lectores: int, max_id: int) -> float:
+    detener = threading.Event()
+
+    def escritor() -> None:
+        while not detener.is_set():
+            with sg_veterinaria.conectar() as conn:
+                conn.execute(
+                    "INSERT INTO reservas (idMascota, idVeterinario, fecha, hora, motivo, estadoMascota) VALUES (1, 1, '2031-01-01', '09:00:00', 'Carga', 'Estable')"
+                )
+                conn.commit()
+
+    def lector(n: int) -> None:
+        aleatorio = random.Random(n)
+        for _ in range(cantidad // lectores):
+            with sg_veterinaria.conectar() as conn:
+                conn.execute("SELECT * FROM reservas WHERE idReserva = ?", (aleatorio.randint(1, max_id),)).fetchone()
+
+    hilo_escritor = threading.Thread(target=escritor)
+    hilos = [threading.Thread(target=lector, args=(n,)) for n in range(lectores)]
+    hilo_escritor.start()
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    duracion = time.perf_counter() - inicio
+    detener.set()
+    hilo_escritor.join()
+    return (cantidad // lectores) * lectores / duracion
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de perfiles de almacenamiento SQLite")
+    parser.add_argument("--escrituras", type=int, default=2000)
+    parser.add_argument("--lecturas", type=int, default=20000)
+    parser.add_argument("--lectores", type=int, default=4)
+    parser.add_argument("--json", action="store_true", help="Imprimir resultados en JSON")
+    args = parser.parse_args()
+
+    db_original, perfil_original = sg_veterinaria.DB_NAME, sg_veterinaria.PERFIL_ALMACENAMIENTO
+    resultados = {}
+    try:
+        for perfil in sg_veterinaria.PERFILES_ALMACENAMIENTO:
+            with tempfile.TemporaryDirectory() as carpeta:
+                preparar_bd(os.path.join(carpeta, "bench.db"), perfil)
+                sg_veterinaria.configurar_pool(max(args.lectores + 1, sg_veterinaria.POOL_TAMANO))
+                escrituras = medir_escrituras(args.escrituras)
+                lecturas = medir_lecturas(args.lecturas, args.lectores, args.escrituras)
+                sg_veterinaria.cerrar_pool()
+            resultados[perfil] = {"escrituras_por_s": round(escrituras, 1), "lecturas_por_s": round(lecturas, 1)}
+    finally:
+        sg_veterinaria.DB_NAME = db_original
+        sg_veterinaria.configurar_perfil(perfil_original)
+
+    if args.json:
+        print(json.dumps(resultados, indent=2))
+        return
+    print(f"{'Perfil':<12} {'Escrituras/s':>14} {'Lecturas/s':>14}")
+    print("-" * 42)
+    for perfil, r in resultados.items():
+        print(f"{perfil:<12} {r['escrituras_por_s']:>14} {r['lecturas_por_s']:>14}")
+
+if __name__ == "__main__":
+    main()
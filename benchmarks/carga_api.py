@@ -0,0 +1,193 @@
+# carga_api.py - Prueba de carga de la API HTTP (sg_servidor) con clientes asyncio concurrentes.
+# Uso: python -m benchmarks.carga_api [--url http://127.0.0.1:8080] [--clientes N] [--segundos S]
+#      [--escrituras 0.1] [--usuario U --password P] [--veterinarios N] [--mascotas N] [--reservas N] [--salida carga.json]
+# Sin --url genera una clínica temporal (benchmarks.generador) y levanta sg_servidor en un subproceso sobre ella.
+# Cada cliente mantiene una conexión keep-alive y repite una mezcla de lecturas (listados, detalle, disponibilidad,
+# resumen) con una fracción de escrituras (alta de reservas). Informa peticiones/s, percentiles por tipo,
+# códigos de respuesta y, al final, las métricas que el propio servidor publica en /metricas.
+import argparse, asyncio, datetime, json, os, random, socket, subprocess, sys, tempfile, time
+from urllib.parse import quote, urlsplit
+from benchmarks.generador import generar_clinica, SEMILLA_DEFECTO, PASSWORD_BENCH, ESPECIALIDADES, FECHA_INICIAL
+
+# -----------------------------------------
+# Cliente HTTP mínimo con keep-alive
+# -----------------------------------------
+class Cliente:
+    def __init__(self, host: str, puerto: int, token: str = ""):
+        self.host, self.puerto, self.token = host, puerto, token
+        self._lector = self._escritor = None
+
+    async def pedir(self, metodo: str, camino: str, cuerpo=None) -> tuple: # (estado, documento)
+        if self._escritor is None:
+            self._lector, self._escritor = await asyncio.open_connection(self.host, self.puerto)
+        datos = json.dumps(cuerpo).encode("utf-8") if cuerpo is not None else b""
+        cabeceras = f"{metodo} {camino} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(datos)}\r\n"
+        if self.token:
+            cabeceras += f"Authorization: Bearer {self.token}\r\n"
+        self._escritor.write(cabeceras.encode("latin-1") + b"\r\n" + datos)
+        await self._escritor.drain()
+        estado = int((await self._lector.readline()).split()[1])
+        largo, cerrar = 0, False
+        while True:
+            linea = await self._lector.readline()
+            if linea in (b"\r\n", b""):
+                break
+            nombre, _, valor = linea.decode("latin-1").partition(":")
+            if nombre.lower() == "content-length":
+                largo = int(valor)
+            elif nombre.lower() == "connection" and valor.strip().lower() == "close":
+                cerrar = True
+        documento = json.loads(await self._lector.readexactly(largo)) if largo else None
+        if cerrar:
+            self.cerrar()
+        return estado, documento
+
+    def cerrar(self) -> None:
+        if self._escritor is not None:
+            self._escritor.close()
+            self._escritor = None
+
+# -----------------------------------------
+# Mezcla de peticiones
+# nombre -> función que recibe (Random, tamaños) y devuelve (método, camino, cuerpo)
+# -----------------------------------------
+def _fecha(r: random.Random) -> str:
+    return (FECHA_INICIAL + datetime.timedelta(days=r.randrange(365))).isoformat()
+
+LECTURAS = {
+    "listar_mascotas": lambda r, t: ("GET", f"/mascotas?despues_de={r.randrange(max(1, t['mascotas']))}&limite=20", None),
+    "obtener_mascota": lambda r, t: ("GET", f"/mascotas/{r.randint(1, max(1, t['mascotas']))}", None),
+    "listar_veterinarios": lambda r, t: ("GET", f"/veterinarios?especialidad={quote(r.choice(ESPECIALIDADES))}&limite=20", None),
+    "reservas_por_veterinario": lambda r, t: ("GET", f"/reservas?veterinario={r.randint(1, max(1, t['veterinarios']))}&limite=20", None),
+    "horarios_disponibles": lambda r, t: ("GET", f"/reservas/disponibles?desde={_fecha(r)}&hasta=2099-12-31&cantidad=3", None),
+    "resumen_general": lambda r, t: ("GET", "/reportes/resumen", None),
+}
+ESCRITURAS = {
+    "crear_reserva": lambda r, t: ("POST", "/reservas", {
+        "idMascota": r.randint(1, max(1, t["mascotas"])), "idVeterinario": r.randint(1, max(1, t["veterinarios"])),
+        "fecha": (FECHA_INICIAL + datetime.timedelta(days=3650 + r.randrange(3650))).isoformat(),
+        "hora": f"{r.randint(9, 17):02d}:{r.choice(('00', '30'))}", "motivo": "Carga", "estadoMascota": "Estable"}),
+}
+
+def percentil(valores: list, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))]
+
+async def _cliente(indice: int, host: str, puerto: int, token: str, tamanos: dict, fin: float, escrituras: float,
+                   semilla: int, muestras: dict, estados: dict) -> None:
+    aleatorio = random.Random(f"{semilla}-{indice}")
+    cliente = Cliente(host, puerto, token)
+    try:
+        while time.perf_counter() < fin:
+            mezcla = ESCRITURAS if aleatorio.random() < escrituras else LECTURAS
+            nombre = aleatorio.choice(list(mezcla))
+            metodo, camino, cuerpo = mezcla[nombre](aleatorio, tamanos)
+            inicio = time.perf_counter()
+            try:
+                estado, _ = await cliente.pedir(metodo, camino, cuerpo)
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                estado = 0 # Conexión perdida: se reintenta con una nueva
+                cliente.cerrar()
+            muestras.setdefault(nombre, []).append(time.perf_counter() - inicio)
+            estados[estado] = estados.get(estado, 0) + 1
+    finally:
+        cliente.cerrar()
+
+async def cargar(host: str, puerto: int, usuario: str, password: str, clientes: int, segundos: float,
+                 escrituras: float, semilla: int) -> dict:
+    sesion = Cliente(host, puerto)
+    estado, documento = await sesion.pedir("POST", "/sesiones", {"usuario": usuario, "password": password})
+    if estado != 201:
+        raise SystemExit(f"No se pudo iniciar sesión ({estado}): {documento}")
+    sesion.token = documento["token"]
+    _, resumen = await sesion.pedir("GET", "/reportes/resumen")
+    tamanos = {"mascotas": resumen["total_mascotas"], "veterinarios": resumen["total_veterinarios"]}
+
+    muestras, estados = {}, {}
+    inicio = time.perf_counter()
+    await asyncio.gather(*(_cliente(i, host, puerto, sesion.token, tamanos, inicio + segundos, escrituras, semilla, muestras, estados)
+                           for i in range(clientes)))
+    duracion = time.perf_counter() - inicio
+    _, metricas = await sesion.pedir("GET", "/metricas?limite=5")
+    sesion.cerrar()
+
+    ms = lambda s: round(s * 1000, 3)
+    total = sum(len(v) for v in muestras.values())
+    return {
+        "meta": {"clientes": clientes, "segundos": round(duracion, 3), "escrituras": escrituras, "tamanos": tamanos},
+        "peticiones": total,
+        "peticiones_por_segundo": round(total / duracion, 1),
+        "estados": {str(k): v for k, v in sorted(estados.items())},
+        "operaciones": {nombre: {"peticiones": len(v), "p50_ms": ms(percentil(v, 0.50)), "p95_ms": ms(percentil(v, 0.95)),
+                                 "p99_ms": ms(percentil(v, 0.99)), "max_ms": ms(max(v))}
+                        for nombre, v in sorted(muestras.items())},
+        "servidor": metricas,
+    }
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _esperar_servidor(host: str, puerto: int, proceso, espera: float = 30.0) -> None:
+    limite = time.monotonic() + espera
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise SystemExit("El servidor terminó antes de aceptar conexiones.")
+        try:
+            with socket.create_connection((host, puerto), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise SystemExit("El servidor no respondió a tiempo.")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API HTTP")
+    parser.add_argument("--url", help="Servidor ya levantado; si se omite se levanta uno sobre una clínica temporal")
+    parser.add_argument("--usuario", default="bench1")
+    parser.add_argument("--password", default=PASSWORD_BENCH)
+    parser.add_argument("--clientes", type=int, default=32)
+    parser.add_argument("--segundos", type=float, default=10.0)
+    parser.add_argument("--escrituras", type=float, default=0.1, help="Fracción de peticiones que escriben")
+    parser.add_argument("--hilos", type=int, help="Hilos de base de datos del servidor levantado")
+    parser.add_argument("--veterinarios", type=int, default=100)
+    parser.add_argument("--mascotas", type=int, default=10_000)
+    parser.add_argument("--reservas", type=int, default=50_000)
+    parser.add_argument("--semilla", type=int, default=SEMILLA_DEFECTO)
+    parser.add_argument("--salida", help="Guardar el resultado como JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        proceso = None
+        if args.url:
+            partes = urlsplit(args.url)
+            host, puerto = partes.hostname, partes.port or 80
+        else:
+            ruta = os.path.join(carpeta, "clinica.db")
+            generar_clinica(ruta, args.veterinarios, args.mascotas, args.reservas, 1, args.semilla)
+            host, puerto = "127.0.0.1", _puerto_libre()
+            comando = [sys.executable, "sg_servidor.py", "--bd", ruta, "--puerto", str(puerto)]
+            if args.hilos:
+                comando += ["--hilos", str(args.hilos)]
+            proceso = subprocess.Popen(comando, stdout=subprocess.DEVNULL, env={**os.environ, "SG_LOG_LENTAS": os.path.join(carpeta, "lentas.log")})
+            _esperar_servidor(host, puerto, proceso)
+        try:
+            resultado = asyncio.run(cargar(host, puerto, args.usuario, args.password, args.clientes, args.segundos,
+                                           args.escrituras, args.semilla))
+        finally:
+            if proceso is not None:
+                proceso.terminate()
+                proceso.wait()
+
+    print(f"{resultado['peticiones']} peticiones en {resultado['meta']['segundos']} s con {args.clientes} clientes: "
+          f"{resultado['peticiones_por_segundo']} pet/s   códigos {resultado['estados']}")
+    for nombre, o in resultado["operaciones"].items():
+        print(f"{nombre:<26} {o['peticiones']:>7}   p50 {o['p50_ms']:>8} ms   p95 {o['p95_ms']:>8} ms   p99 {o['p99_ms']:>8} ms")
+    print(f"Servidor: {resultado['servidor']['http']['rechazadas']} rechazadas por saturación, pool {resultado['servidor']['pool']}")
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+        print(f"Resultados guardados en {args.salida}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# comparar.py - Compara dos archivos de resultados de bench_controladores para detectar regresiones.
+# Uso: python -m benchmarks.comparar BASE.json NUEVO.json [--metrica p50_ms] [--umbral 0.20]
+# Sale con código 1 si alguna operación empeora más que el umbral (20% por defecto) en la métrica elegida.
+import argparse, json, sys
+
+METRICAS = ("frio_ms", "media_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms", "memoria_pico_kb")
+
+def cargar(ruta: str) -> dict:
+    with open(ruta, encoding="utf-8") as archivo:
+        return json.load(archivo)
+
+# -----------------------------------------
+# Comparar resultados
+# Devuelve una lista de (operación, valor base, valor nuevo, variación relativa o None).
+# -----------------------------------------
+def comparar(base: dict, nuevo: dict, metrica: str = "p50_ms") -> list:
+    filas = []
+    operaciones = sorted(set(base["operaciones"]) | set(nuevo["operaciones"]))
+    for nombre in operaciones:
+        anterior = base["operaciones"].get(nombre, {}).get(metrica)
+        actual = nuevo["operaciones"].get(nombre, {}).get(metrica)
+        variacion = (actual - anterior) / anterior if anterior and actual is not None else None
+        filas.append((nombre, anterior, actual, variacion))
+    return filas
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compara resultados de benchmark entre commits")
+    parser.add_argument("base")
+    parser.add_argument("nuevo")
+    parser.add_argument("--metrica", choices=METRICAS, default="p50_ms")
+    parser.add_argument("--umbral", type=float, default=0.20, help="Variación relativa que cuenta como regresión")
+    args = parser.parse_args()
+
+    base, nuevo = cargar(args.base), cargar(args.nuevo)
+    if base["meta"].get("tamanos") != nuevo["meta"].get("tamanos"):
+        print("Aviso: las clínicas medidas tienen tamaños distintos; la comparación puede no ser válida.")
+    print(f"{base['meta'].get('commit')} -> {nuevo['meta'].get('commit')} ({args.metrica})\n")
+    print(f"{'Operación':<38} {'Base':>10} {'Nuevo':>10} {'Variación':>10}")
+    print("-" * 71)
+    regresiones = []
+    for nombre, anterior, actual, variacion in comparar(base, nuevo, args.metrica):
+        marca = ""
+        if variacion is not None and variacion > args.umbral:
+            marca = "  REGRESIÓN"
+            regresiones.append(nombre)
+        texto = f"{variacion:+.1%}" if variacion is not None else "-"
+        print(f"{nombre:<38} {anterior if anterior is not None else '-':>10} {actual if actual is not None else '-':>10} {texto:>10}{marca}")
+    if regresiones:
+        print(f"\n{len(regresiones)} operaciones empeoraron más de {args.umbral:.0%}: {', '.join(regresiones)}")
+        sys.exit(1)
+    print("\nSin regresiones por encima del umbral.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# estres_concurrencia.py - Prueba de estrés de escrituras concurrentes sobre una misma reserva.
+# Uso: python -m benchmarks.estres_concurrencia [--procesos N] [--hilos N] [--incrementos N]
+#      [--busy-timeout-ms MS] [--sin-version] [--json]
+# Varios procesos, cada uno con varios hilos, hacen lectura-modificación-escritura sobre la misma reserva:
+# leen el contador guardado en el motivo y lo reescriben sumando uno con modificar_reserva. Con versión
+# esperada (por defecto) un choque se informa y se reintenta desde la lectura; al final el contador debe
+# ser igual a la cantidad de escrituras confirmadas, sin actualizaciones perdidas ni "database is locked".
+# --sin-version repite la carga sin concurrencia optimista para ver las actualizaciones perdidas.
+# Un --busy-timeout-ms bajo obliga a que los choques por el lock lleguen a ejecutar_escritura (reintentos).
+# Sale con código 1 si el resultado no es consistente.
+import argparse, contextlib, io, json, multiprocessing, os, sys, tempfile, threading, time
+import sg_veterinaria
+from sg_salida import salida
+
+# -----------------------------------------
+# Trabajo de un proceso
+# Cada hilo suma `incrementos` veces; devuelve contadores de confirmadas, choques de versión y errores.
+# -----------------------------------------
+def _proceso(ruta: str, hilos: int, incrementos: int, busy_timeout_ms: int, con_version: bool) -> dict:
+    sg_veterinaria.DB_NAME = ruta
+    sg_veterinaria.PERFILES_ALMACENAMIENTO[sg_veterinaria.PERFIL_ALMACENAMIENTO]["busy_timeout"] = busy_timeout_ms
+    sg_veterinaria.configurar_pool(hilos + 1)
+    import controladores as c
+    totales = {"confirmadas": 0, "choques": 0, "errores": 0}
+    lock = threading.Lock()
+
+    def trabajo() -> None:
+        propios = {"confirmadas": 0, "choques": 0, "errores": 0}
+        while propios["confirmadas"] < incrementos:
+            r = c.obtener_reserva(1)
+            version = r.version if con_version else None
+            ok, mensajes = salida.capturar(c.modificar_reserva, 1, motivo=str(int(r.motivo) + 1), version_esperada=version)
+            if ok:
+                propios["confirmadas"] += 1
+            elif any("cambió desde que se leyó" in m for m in mensajes):
+                propios["choques"] += 1
+            else:
+                propios["errores"] += 1
+                if propios["errores"] > incrementos: # Algo más que contención: no insistir para siempre
+                    break
+        with lock:
+            for clave, valor in propios.items():
+                totales[clave] += valor
+
+    salida.instalar()
+    try:
+        trabajadores = [threading.Thread(target=trabajo) for _ in range(hilos)]
+        for t in trabajadores:
+            t.start()
+        for t in trabajadores:
+            t.join()
+    finally:
+        salida.restaurar()
+    totales.update(sg_veterinaria.estado_escrituras())
+    sg_veterinaria.cerrar_pool()
+    return totales
+
+def _preparar(ruta: str) -> None:
+    sg_veterinaria.DB_NAME = ruta
+    from sg_migraciones import aplicar_migraciones
+    import controladores as c
+    aplicar_migraciones()
+    with contextlib.redirect_stdout(io.StringIO()):
+        c.registrar_nuevo_veterinario("Estrés", "General")
+        c.registrar_nueva_mascota("Estrés", "Perro", "Mestizo", 3, 10.0)
+        c.crear_reserva(1, 1, "2030-01-01", "09:00", "0", "Estable")
+    sg_veterinaria.cerrar_pool()
+
+def ejecutar(procesos: int, hilos: int, incrementos: int, busy_timeout_ms: int, con_version: bool) -> dict:
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "estres.db")
+        _preparar(ruta)
+        inicio = time.perf_counter()
+        contexto = multiprocessing.get_context("spawn") # Procesos limpios: sin pool ni hilos heredados
+        with contexto.Pool(procesos) as pool:
+            parciales = pool.starmap(_proceso, [(ruta, hilos, incrementos, busy_timeout_ms, con_version)] * procesos)
+        duracion = time.perf_counter() - inicio
+        sg_veterinaria.DB_NAME = ruta
+        with sg_veterinaria.conectar() as conn:
+            motivo, version = conn.execute("SELECT motivo, version FROM reservas WHERE idReserva = 1").fetchone()
+        sg_veterinaria.cerrar_pool()
+
+    resultado = {clave: sum(p[clave] for p in parciales) for clave in ("confirmadas", "choques", "errores", "reintentos", "agotadas")}
+    resultado.update({
+        "con_version": con_version, "procesos": procesos, "hilos": hilos,
+        "contador_final": int(motivo), "version_final": version,
+        "perdidas": resultado["confirmadas"] - int(motivo),
+        "escrituras_por_s": round(resultado["confirmadas"] / duracion, 1),
+    })
+    resultado["consistente"] = resultado["perdidas"] == 0 and resultado["errores"] == 0 and version == resultado["confirmadas"]
+    return resultado
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Estrés de lectura-modificación-escritura concurrente")
+    parser.add_argument("--procesos", type=int, default=4)
+    parser.add_argument("--hilos", type=int, default=8, help="Hilos por proceso")
+    parser.add_argument("--incrementos", type=int, default=50, help="Escrituras confirmadas por hilo")
+    parser.add_argument("--busy-timeout-ms", type=int, default=5000, help="busy_timeout de cada conexión")
+    parser.add_argument("--sin-version", action="store_true", help="Sin concurrencia optimista (muestra actualizaciones perdidas)")
+    parser.add_argument("--json", action="store_true", help="Imprimir resultados en JSON")
+    args = parser.parse_args()
+
+    db_original = sg_veterinaria.DB_NAME
+    try:
+        r = ejecutar(args.procesos, args.hilos, args.incrementos, args.busy_timeout_ms, not args.sin_version)
+    finally:
+        sg_veterinaria.DB_NAME = db_original
+
+    if args.json:
+        print(json.dumps(r, indent=2))
+    else:
+        print(f"{r['procesos']} procesos x {r['hilos']} hilos, {'con' if r['con_version'] else 'sin'} versión esperada")
+        print(f" Confirmadas:        {r['confirmadas']} ({r['escrituras_por_s']} por segundo)")
+        print(f" Contador final:     {r['contador_final']} (versión {r['version_final']})")
+        print(f" Perdidas:           {r['perdidas']}")
+        print(f" Choques de versión: {r['choques']}")
+        print(f" Reintentos (busy):  {r['reintentos']} ({r['agotadas']} agotados)")
+        print(f" Errores:            {r['errores']}")
+        print(" Resultado: " + ("consistente" if r["consistente"] else "INCONSISTENTE"))
+    if r["con_version"] and not r["consistente"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
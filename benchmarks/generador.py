@@ -0,0 +1,132 @@
+# generador.py - Genera clínicas sintéticas de tamaño configurable, siempre iguales para la misma semilla.
+# Uso: python -m benchmarks.generador SALIDA.db [--veterinarios N] [--mascotas N] [--reservas N] [--usuarios N] [--semilla S]
+# Ejemplo a escala: --veterinarios 10000 --mascotas 1000000 --reservas 10000000
+# Las reservas se reparten en turnos de DURACION_CITA_MINUTOS por veterinario y día, sin choques entre sí,
+# y la carga se hace con executemany en transacciones grandes (los triggers de estadísticas siguen activos).
+import argparse, contextlib, datetime, io, os, random, time
+import sg_veterinaria
+from sg_migraciones import aplicar_migraciones
+from sg_agenda import DURACION_CITA_MINUTOS, HORA_APERTURA, HORA_CIERRE, a_minutos, desde_minutos
+from sg_funciones import registrar_login
+
+SEMILLA_DEFECTO = 42
+LOTE_GENERACION = 50_000 # Filas por transacción
+PASSWORD_BENCH = "bench-1234" # Contraseña de todos los usuarios sintéticos
+FECHA_INICIAL = datetime.date(2030, 1, 1)
+
+ESPECIES = ["Perro", "Gato", "Conejo", "Hurón", "Ave", "Tortuga", "Hámster"]
+RAZAS = ["Mestiza", "Labrador", "Siamés", "Persa", "Beagle", "Angora", "Criolla"]
+ESPECIALIDADES = ["General", "Cirugía", "Dermatología", "Cardiología", "Exóticos", "Odontología"]
+NOMBRES = ["Luna", "Max", "Kira", "Toby", "Nala", "Rocky", "Milo", "Coco", "Simba", "Lola", "Bruno", "Maya"]
+APELLIDOS = ["González", "Muñoz", "Rojas", "Díaz", "Pérez", "Soto", "Contreras", "Silva", "Martínez", "Sepúlveda"]
+MOTIVOS = ["Control", "Vacuna", "Desparasitación", "Urgencia", "Cirugía", "Curación"]
+ESTADOS = ["Estable", "Leve", "Moderado", "Grave"]
+
+def _insertar_en_lotes(sql: str, filas) -> int:
+    total, lote = 0, []
+    with sg_veterinaria.conectar() as conn:
+        for fila in filas:
+            lote.append(fila)
+            if len(lote) >= LOTE_GENERACION:
+                sg_veterinaria.iniciar_escritura(conn)
+                conn.executemany(sql, lote)
+                conn.commit()
+                total += len(lote)
+                lote = []
+        if lote:
+            sg_veterinaria.iniciar_escritura(conn)
+            conn.executemany(sql, lote)
+            conn.commit()
+            total += len(lote)
+    return total
+
+# -----------------------------------------
+# Generadores de filas
+# Cada tabla usa su propio Random derivado de la semilla, así cambiar un tamaño no altera las demás.
+# -----------------------------------------
+def filas_veterinarios(cantidad: int, semilla: int):
+    aleatorio = random.Random(f"{semilla}-veterinarios")
+    for i in range(cantidad):
+        yield (f"Dr. {aleatorio.choice(NOMBRES)} {aleatorio.choice(APELLIDOS)} {i + 1}", aleatorio.choice(ESPECIALIDADES))
+
+def filas_responsables(cantidad: int, semilla: int):
+    aleatorio = random.Random(f"{semilla}-responsables")
+    for i in range(cantidad):
+        yield (f"{aleatorio.choice(NOMBRES)} {aleatorio.choice(APELLIDOS)} {i + 1}", f"+56 9 {aleatorio.randrange(10 ** 8):08d}",
+               f"responsable{i + 1}@ejemplo.cl")
+
+def filas_mascotas(cantidad: int, semilla: int, responsables: int):
+    aleatorio = random.Random(f"{semilla}-mascotas")
+    for _ in range(cantidad):
+        yield (aleatorio.choice(NOMBRES), aleatorio.choice(ESPECIES), aleatorio.choice(RAZAS), aleatorio.randint(0, 20),
+               round(aleatorio.uniform(0.2, 60.0), 1), aleatorio.randint(1, responsables))
+
+def filas_reservas(cantidad: int, semilla: int, veterinarios: int, mascotas: int):
+    aleatorio = random.Random(f"{semilla}-reservas")
+    apertura = a_minutos(HORA_APERTURA)
+    turnos_por_dia = (a_minutos(HORA_CIERRE) - apertura) // DURACION_CITA_MINUTOS
+    for i in range(cantidad):
+        turno = i // veterinarios # Turno consecutivo dentro de la agenda de cada veterinario
+        yield (aleatorio.randint(1, mascotas), i % veterinarios + 1,
+               (FECHA_INICIAL + datetime.timedelta(days=turno // turnos_por_dia)).isoformat(),
+               desde_minutos(apertura + (turno % turnos_por_dia) * DURACION_CITA_MINUTOS),
+               aleatorio.choice(MOTIVOS), aleatorio.choice(ESTADOS))
+
+# -----------------------------------------
+# Generar clínica
+# Crea (o reemplaza) la base en `ruta` con el esquema vigente y los datos sintéticos.
+# Devuelve un dict con los tamaños y la duración de cada etapa.
+# -----------------------------------------
+def generar_clinica(ruta: str, veterinarios: int = 100, mascotas: int = 10_000, reservas: int = 50_000,
+    usuarios: int = 5, semilla: int = SEMILLA_DEFECTO) -> dict:
+    for sufijo in ("", "-wal", "-shm"):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(ruta + sufijo)
+    db_original = sg_veterinaria.DB_NAME
+    sg_veterinaria.DB_NAME = ruta
+    tiempos = {}
+    responsables = max(1, mascotas // 2) # Dos mascotas por responsable en promedio
+    try:
+        aplicar_migraciones()
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()): # registrar_login informa cada alta
+            for i in range(usuarios):
+                registrar_login(f"bench{i + 1}", f"bench{i + 1}@ejemplo.cl", PASSWORD_BENCH, "veterinario")
+        tiempos["usuarios_s"] = time.perf_counter() - inicio
+        etapas = [
+            ("veterinarios", "INSERT INTO veterinarios (nombre, especialidad) VALUES (?, ?)",
+             filas_veterinarios(veterinarios, semilla)),
+            ("responsables", "INSERT INTO responsables (nombre, telefono, email) VALUES (?, ?, ?)",
+             filas_responsables(responsables, semilla)),
+            ("mascotas", "INSERT INTO mascotas (nombre, especie, raza, edad, peso, idResponsable) VALUES (?, ?, ?, ?, ?, ?)",
+             filas_mascotas(mascotas, semilla, responsables)),
+            ("reservas", "INSERT INTO reservas (idMascota, idVeterinario, fecha, hora, motivo, estadoMascota) VALUES (?, ?, ?, ?, ?, ?)",
+             filas_reservas(reservas, semilla, veterinarios, mascotas) if veterinarios and mascotas else iter(())),
+        ]
+        for tabla, sql, filas in etapas:
+            inicio = time.perf_counter()
+            _insertar_en_lotes(sql, filas)
+            tiempos[f"{tabla}_s"] = time.perf_counter() - inicio
+        with sg_veterinaria.conectar() as conn:
+            conn.execute("ANALYZE") # Estadísticas del planificador como en una base en uso
+        sg_veterinaria.checkpoint("TRUNCATE")
+    finally:
+        sg_veterinaria.cerrar_pool()
+        sg_veterinaria.DB_NAME = db_original
+    return {"veterinarios": veterinarios, "responsables": responsables, "mascotas": mascotas, "reservas": reservas, "usuarios": usuarios,
+            "semilla": semilla, **{k: round(v, 2) for k, v in tiempos.items()}}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generador determinista de clínicas sintéticas")
+    parser.add_argument("salida", help="Ruta de la base a crear (se reemplaza si existe)")
+    parser.add_argument("--veterinarios", type=int, default=100)
+    parser.add_argument("--mascotas", type=int, default=10_000)
+    parser.add_argument("--reservas", type=int, default=50_000)
+    parser.add_argument("--usuarios", type=int, default=5)
+    parser.add_argument("--semilla", type=int, default=SEMILLA_DEFECTO)
+    args = parser.parse_args()
+    resumen = generar_clinica(args.salida, args.veterinarios, args.mascotas, args.reservas, args.usuarios, args.semilla)
+    print(", ".join(f"{k}={v}" for k, v in resumen.items()))
+
+if __name__ == "__main__":
+    main()
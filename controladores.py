@@ -1,28 +1,180 @@
-# controladores.py - Módulo de controladores para la gestión de mascotas, veterinarios y reservas en una veterinaria.
-# Descripción: Este módulo contiene funciones para registrar, listar, eliminar y actualizar mascotas y veterinarios,
+# controladores.py - Módulo de controladores para la gestión de mascotas, responsables, veterinarios y reservas en una veterinaria.
+# Descripción: Este módulo contiene funciones para registrar, listar, eliminar y actualizar mascotas, sus responsables y veterinarios,
 # así como para gestionar reservas de citas en una veterinaria. Utiliza SQLite para la persistencia de datos y maneja errores comunes de la base de datos.
-# Requiere: sg_veterinaria.py, sg_hash.py
+# Los listados y búsquedas devuelven registros de sg_modelos (o una Pagina de ellos) y no imprimen nada;
+# las operaciones de escritura informan su resultado por pantalla y devuelven el ID creado o True/False.
+# Requiere: sg_veterinaria.py, sg_modelos.py, sg_hash.py, sg_reportes.py, sg_estadisticas.py, sg_agenda.py, sg_disponibilidad.py, sg_exportacion.py, sg_metricas.py
 # Importaciones:
-import sqlite3
+import json, sqlite3
 from sg_veterinaria import *
+from sg_modelos import *
 from sg_hash import * 
+from sg_reportes import obtener_resumen_general, lineas_resumen_general, ResumenGeneral, TITULO_RESUMEN_GENERAL
+from sg_estadisticas import verificar_estadisticas, reconstruir_estadisticas
+from sg_agenda import indice_agenda, buscar_conflicto, normalizar_fecha, normalizar_hora, a_minutos, DURACION_CITA_MINUTOS
+from sg_disponibilidad import servicio_disponibilidad
+from sg_exportacion import exportar, escritura_atomica
+from sg_metricas import medir_controlador, instantanea_metricas
+from sg_cache import cache_lectura
+from sg_escritor import escritor_agrupado
+from sg_busqueda import buscar, sql_contiene
+from sg_cambios import ResultadoCambios, actualizar_parcial, aplicar_cambios, aplicar_cambios_lote, ACTUALIZADO, INEXISTENTE, CONFLICTO
 from typing import Optional
 
+TAMANO_PAGINA = 20 # Filas por página en los listados de los menús
+
+# -----------------------------------------
+# Iteradores de mascotas, responsables, veterinarios y reservas
+# Recorren la tabla en orden de clave primaria trayendo filas en lotes (fetchmany), ya como registros.
+# despues_de continúa desde un ID (paginación por clave) y limite corta el recorrido.
+# -----------------------------------------
+def iterar_mascotas(despues_de: int = 0, limite: Optional[int] = None, especie: Optional[str] = None, idResponsable: Optional[int] = None):
+    sql = f"SELECT {COLUMNAS_MASCOTA} FROM mascotas WHERE idMascota > ?"
+    parametros = [despues_de]
+    if especie is not None:
+        sql += " AND especie = ?"
+        parametros.append(especie)
+    if idResponsable is not None:
+        sql += " AND idResponsable = ?"
+        parametros.append(idResponsable)
+    sql += " ORDER BY idMascota"
+    if limite is not None:
+        sql += " LIMIT ?"
+        parametros.append(limite)
+    return iterar_consulta(sql, tuple(parametros), fabrica=fila_mascota)
+
+def iterar_responsables(despues_de: int = 0, limite: Optional[int] = None):
+    sql = f"SELECT {COLUMNAS_RESPONSABLE} FROM responsables WHERE idResponsable > ? ORDER BY idResponsable"
+    parametros = [despues_de]
+    if limite is not None:
+        sql += " LIMIT ?"
+        parametros.append(limite)
+    return iterar_consulta(sql, tuple(parametros), fabrica=fila_responsable)
+
+def iterar_veterinarios(despues_de: int = 0, limite: Optional[int] = None, especialidad: Optional[str] = None):
+    sql = f"SELECT {COLUMNAS_VETERINARIO} FROM veterinarios WHERE idVeterinario > ?"
+    parametros = [despues_de]
+    if especialidad is not None:
+        sql += " AND especialidad = ?"
+        parametros.append(especialidad)
+    sql += " ORDER BY idVeterinario"
+    if limite is not None:
+        sql += " LIMIT ?"
+        parametros.append(limite)
+    return iterar_consulta(sql, tuple(parametros), fabrica=fila_veterinario)
+
+def iterar_reservas(despues_de: int = 0, limite: Optional[int] = None, idVeterinario: Optional[int] = None,
+    fecha_desde: Optional[str] = None, fecha_hasta: Optional[str] = None):
+    sql = f"SELECT {COLUMNAS_RESERVA} FROM reservas WHERE idReserva > ?"
+    parametros = [despues_de]
+    if idVeterinario is not None:
+        sql += " AND idVeterinario = ?"
+        parametros.append(idVeterinario)
+    if fecha_desde is not None:
+        sql += " AND fecha >= ?"
+        parametros.append(fecha_desde)
+    if fecha_hasta is not None:
+        sql += " AND fecha <= ?"
+        parametros.append(fecha_hasta)
+    sql += " ORDER BY idReserva"
+    if limite is not None:
+        sql += " LIMIT ?"
+        parametros.append(limite)
+    return iterar_consulta(sql, tuple(parametros), fabrica=fila_reserva)
+
+# -----------------------------------------
+# Obtener mascota, responsable, veterinario o reserva por ID
+# Devuelven el registro o None si no existe. Mascotas y veterinarios pasan por la caché de lectura;
+# quien va a reescribir el registro pide usar_cache=False para partir del valor confirmado en la base.
+# -----------------------------------------
+def _obtener(sql: str, id_: int, fabrica):
+    with conectar() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = fabrica
+        return cursor.execute(sql, (id_,)).fetchone()
+
+def obtener_mascota(idMascota: int, usar_cache: bool = True) -> Optional[Mascota]:
+    cargar = lambda: _obtener(f"SELECT {COLUMNAS_MASCOTA} FROM mascotas WHERE idMascota = ?", idMascota, fila_mascota)
+    return cache_lectura.obtener("mascotas", ("id", idMascota), cargar) if usar_cache else cargar()
+
+def obtener_responsable(idResponsable: int) -> Optional[Responsable]:
+    return _obtener(f"SELECT {COLUMNAS_RESPONSABLE} FROM responsables WHERE idResponsable = ?", idResponsable, fila_responsable)
+
+def obtener_veterinario(idVeterinario: int, usar_cache: bool = True) -> Optional[Veterinario]:
+    cargar = lambda: _obtener(f"SELECT {COLUMNAS_VETERINARIO} FROM veterinarios WHERE idVeterinario = ?", idVeterinario, fila_veterinario)
+    return cache_lectura.obtener("veterinarios", ("id", idVeterinario), cargar) if usar_cache else cargar()
+
+def obtener_reserva(idReserva: int) -> Optional[Reserva]:
+    return _obtener(f"SELECT {COLUMNAS_RESERVA} FROM reservas WHERE idReserva = ?", idReserva, fila_reserva)
+
+# -----------------------------------------
+# Página de resultados
+# Recibe un iterador pedido con limite = tamano + 1: la fila extra solo indica si hay otra página.
+# El cursor de la página siguiente es clave(último registro), o None si no hay más.
+# -----------------------------------------
+def _pagina(filas, tamano: int, clave) -> Pagina:
+    filas = list(filas)
+    if len(filas) > tamano:
+        filas = filas[:tamano]
+        return Pagina(filas, clave(filas[-1]))
+    return Pagina(filas)
+
+# -----------------------------------------
+# Búsqueda de texto (ver sg_busqueda.py)
+# Devuelve la página de resultados o None si falla la consulta.
+# -----------------------------------------
+def _buscar_texto(entidad: str, texto: str, despues_de: int, tamano_pagina: int) -> Optional[PaginaBusqueda]:
+    try:
+        return buscar(entidad, texto, despues_de, tamano_pagina)
+    except sqlite3.OperationalError as e:
+        print("\n Error operacional (¿falta aplicar la migración de búsqueda?):", e)
+    except sqlite3.DatabaseError as e:
+        print("\n Error general de base de datos:", e)
+
+# -----------------------------------------
+# Operaciones por lote
+# Cada una corre en una sola transacción (ejecutar_escritura) con SQL por conjuntos (IN sobre json_each,
+# o un predicado) o executemany, y devuelve un ResultadoItem por registro pedido. Informan un resumen y
+# el motivo de cada registro que no se pudo procesar.
+# -----------------------------------------
+def _ids_unicos(ids) -> list: # Sin repetidos, en el orden pedido
+    return list(dict.fromkeys(int(i) for i in ids))
+
+def _informar_lote(resultados: list, resumen: str, etiqueta: str) -> list:
+    print(f"\n {sum(r.ok for r in resultados)} de {len(resultados)} {resumen}.")
+    for r in resultados:
+        if not r.ok:
+            print(f" {etiqueta} {r.id}: {r.detalle}")
+    return resultados
+
 # -----------------------------------------
 # Registrar nueva mascota
 # Inserta una mascota en la tabla 'mascotas' validando integridad y errores comunes.
+# idResponsable es opcional; si se indica, el responsable tiene que estar registrado.
 # -----------------------------------------
-def registrar_nueva_mascota(nombre: str, especie: str, raza: str, edad: int, peso: float, responsable: int) -> None:
+def _responsable_existe(idResponsable: Optional[int]) -> bool:
+    # La clave foránea sigue siendo la garantía si se borró mientras tanto; esto da un mensaje claro
+    if idResponsable is None or obtener_responsable(idResponsable) is not None:
+        return True
+    print(f"\n Error: el responsable con ID {idResponsable} no existe.")
+    return False
+
+@medir_controlador
+def registrar_nueva_mascota(nombre: str, especie: str, raza: str, edad: int, peso: float, idResponsable: Optional[int] = None) -> Optional[int]:
     # Comienzo del try-except
     try:
+        if not _responsable_existe(idResponsable):
+            return None
         with conectar() as conn:
             cursor = conn.cursor()
             cursor.execute(
-            "INSERT INTO mascotas (nombre, especie, raza, edad, peso, responsable) VALUES (?, ?, ?, ?, ?, ?)",
-            (nombre, especie, raza, edad, peso, responsable)
+            "INSERT INTO mascotas (nombre, especie, raza, edad, peso, idResponsable) VALUES (?, ?, ?, ?, ?, ?)",
+            (nombre, especie, raza, edad, peso, idResponsable)
             )
             conn.commit() # Guardar los cambios, fin de las interacciones de sqlite3
+            cache_lectura.invalidar("mascotas")
             print(f"\n Mascota '{nombre}' agregada correctamente.")
+            return cursor.lastrowid
     except sqlite3.IntegrityError as e:
         print(f"\n Error de integridad (posible duplicado o constraint):", e)
     except sqlite3.OperationalError as e:
@@ -33,23 +185,14 @@ def registrar_nueva_mascota(nombre: str, especie: str, raza: str, edad: int, pes
 
 # -----------------------------------------
 # Listar mascotas
-# Recupera e imprime todas las mascotas registradas en la base de datos.
+# Devuelve una página de mascotas a partir del ID indicado (None si falla la consulta).
 # -----------------------------------------
-def listar_mascotas() -> None:
+@medir_controlador
+def listar_mascotas(despues_de: int = 0, tamano_pagina: int = TAMANO_PAGINA) -> Optional[Pagina]:
     # Comienzo del try-except
     try:
-        with conectar() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM mascotas")
-            mascotas = cursor.fetchall()
-            if not mascotas:
-                print("\n No hay mascotas registradas.")
-                return # Si no hay mascotas, se informa y se sale de la función
-            print("\n Lista de Mascotas:")
-            print("-" * 80)
-            for mascota in mascotas: # Itera sobre cada mascota y la imprime en formato legible
-                print(f"ID: {mascota[0]}, Nombre: {mascota[1]}, Especie: {mascota[2]}, Raza: {mascota[3]}, Edad: {mascota[4]}, Peso: {mascota[5]}, Responsable: {mascota[6]}")
-            print("-" * 80)
+        return cache_lectura.obtener("mascotas", ("listar", despues_de, tamano_pagina),
+            lambda: _pagina(iterar_mascotas(despues_de, tamano_pagina + 1), tamano_pagina, clave=lambda m: m.idMascota))
     except sqlite3.IntegrityError as e:
         print(f"\n Error de integridad (posible duplicado o constraint):", e)
     except sqlite3.OperationalError as e:
@@ -62,7 +205,8 @@ def listar_mascotas() -> None:
 # Eliminar mascota
 # Elimina una mascota específica usando su ID.
 # -----------------------------------------
-def eliminar_mascota(mascota_id: int) -> None:
+@medir_controlador
+def eliminar_mascota(mascota_id: int) -> bool:
      # Comienzo del try-except
     try:
         with conectar() as conn:
@@ -70,9 +214,12 @@ def eliminar_mascota(mascota_id: int) -> None:
             cursor.execute("DELETE FROM mascotas WHERE idMascota = ?", (mascota_id,))
             if cursor.rowcount == 0:
                 print(f"\n No se encontró ninguna mascota con ID {mascota_id}.")
+                return False
             else:
                 conn.commit() # Guardar los cambios y fin de las interacciones de sqlite3
+                cache_lectura.invalidar("mascotas")
                 print(f"\n Mascota con ID {mascota_id} eliminada correctamente.")
+                return True
     except sqlite3.IntegrityError as e:
         print(f"\n Error de integridad (posible duplicado o constraint):", e)
     except sqlite3.OperationalError as e:
@@ -80,81 +227,137 @@ def eliminar_mascota(mascota_id: int) -> None:
     except sqlite3.DatabaseError as e:
         print(f"\n Error general de base de datos:", e)
         # Fin del try-except, se maneja errores comunes de sqlite3
+    return False
+
+# -----------------------------------------
+# Eliminar varias mascotas
+# Un solo DELETE por conjunto; las que tienen reservas no se borran (la clave foránea lo impediría).
+# -----------------------------------------
+@medir_controlador
+def eliminar_mascotas(ids: list) -> Optional[list]:
+    ids = _ids_unicos(ids)
+    if not ids:
+        print("\n No se indicó ninguna mascota.")
+        return None
+    lista = json.dumps(ids)
+
+    def aplicar(conn) -> tuple:
+        eliminadas = {fila[0] for fila in conn.execute(
+            """DELETE FROM mascotas WHERE idMascota IN (SELECT value FROM json_each(?))
+               AND NOT EXISTS (SELECT 1 FROM reservas WHERE reservas.idMascota = mascotas.idMascota)
+               RETURNING idMascota""", (lista,))}
+        existentes = {fila[0] for fila in conn.execute(
+            "SELECT idMascota FROM mascotas WHERE idMascota IN (SELECT value FROM json_each(?))", (lista,))}
+        return eliminadas, existentes
+
+    try:
+        eliminadas, existentes = ejecutar_escritura(aplicar)
+        if eliminadas:
+            cache_lectura.invalidar("mascotas")
+        return _informar_lote([
+            ResultadoItem(i, True, "eliminada") if i in eliminadas
+            else ResultadoItem(i, False, "tiene reservas") if i in existentes
+            else ResultadoItem(i, False, "no existe")
+            for i in ids
+        ], "mascotas eliminadas", "Mascota")
+    except sqlite3.IntegrityError as e:
+        print(f"\n Error de integridad (posible duplicado o constraint):", e)
+    except sqlite3.OperationalError as e:
+        print(f"\n Error operacional (consulta mal escrita o BD inaccesible):", e)
+    except sqlite3.DatabaseError as e:
+        print(f"\n Error general de base de datos:", e)
+
+# -----------------------------------------
+# Concurrencia optimista
+# Quien edita a partir de un registro leído antes (otra pantalla, la API) puede pasar su version:
+# si otra escritura cambió la fila mientras tanto, se rechaza la edición en lugar de pisarla.
+# -----------------------------------------
+def _version_vigente(descripcion: str, actual: int, esperada: Optional[int]) -> bool:
+    if esperada is None or esperada == actual:
+        return True
+    print(f"\n Error: {descripcion} cambió desde que se leyó (versión {actual}, se esperaba {esperada}). Vuelva a cargarla.")
+    return False
+
+# -----------------------------------------
+# Informar el resultado de una actualización parcial (sg_cambios)
+# Devuelve el registro resultante, o None si no existe o hubo conflicto de versión.
+# -----------------------------------------
+def _informar_cambios(resultado: ResultadoCambios, descripcion: str, no_encontrado: str, exito: str, version_esperada: Optional[int]):
+    if resultado.estado == INEXISTENTE:
+        print(no_encontrado)
+        return None
+    if resultado.estado == CONFLICTO:
+        _version_vigente(descripcion, resultado.registro.version, version_esperada)
+        return None
+    print(exito if resultado.estado == ACTUALIZADO else f"\n Sin cambios: {descripcion} ya tenía esos datos.")
+    return resultado.registro
 
 # -----------------------------------------
 # Actualizar mascota
-# Modifica campos existentes de una mascota, manteniendo los actuales si no se pasan nuevos valores.
+# Modifica solo los campos informados (None mantiene el actual) con un único UPDATE (sg_cambios).
+# Devuelve la mascota actualizada, o None si no existe o cambió desde que se leyó (version_esperada).
 # -----------------------------------------
-def actualizar_mascota(mascota_id: int, nombre: Optional[str]= None, especie: Optional[str] = None, raza: Optional[str] = None, edad: Optional[int] = None, peso: Optional[float] = None, responsable: Optional[int] = None) -> None:
-        with conectar() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM mascotas WHERE idMascota = ?", (mascota_id,))
-            mascota = cursor.fetchone() # Obtener los datos actuales de la mascota, si existe
-            if not mascota: # Si no existe la mascota, se informa y se sale de la función
-                print(f"\n No se encontró ninguna mascota con ID {mascota_id}.")
-                return
-            nuevo_nombre = nombre if nombre is not None else mascota[1] # Mantener el valor actual si no se proporciona uno nuevo
-            nueva_especie = especie if especie is not None else mascota[2] # Mantener el valor actual si no se proporciona uno nuevo
-            nueva_raza = raza if raza is not None else mascota[3] # Mantener el valor actual si no se proporciona uno nuevo
-            nueva_edad = edad if edad is not None else mascota[4] #...
-            nuevo_peso = peso if peso is not None else mascota[5] #...
-            nuevo_responsable = responsable if responsable is not None else mascota[6] #...
-            cursor.execute(
-                "UPDATE mascotas SET nombre = ?, especie = ?, raza = ?, edad = ?, peso = ?, responsable = ? WHERE idMascota = ?",
-                (nuevo_nombre, nueva_especie, nueva_raza, nueva_edad, nuevo_peso, nuevo_responsable, mascota_id)
-            )
-            conn.commit()
-            print(f"\n Mascota con ID {mascota_id} actualizada correctamente.")# Fin de la función y de las interacciones de sqlite3
+@medir_controlador
+def actualizar_mascota(mascota_id: int, nombre: Optional[str]= None, especie: Optional[str] = None, raza: Optional[str] = None, edad: Optional[int] = None, peso: Optional[float] = None, idResponsable: Optional[int] = None,
+    version_esperada: Optional[int] = None) -> Optional[Mascota]:
+    cambios = {"nombre": nombre, "especie": especie, "raza": raza, "edad": edad, "peso": peso, "idResponsable": idResponsable}
+    # Comienzo del try-except
+    try:
+        if not _responsable_existe(idResponsable):
+            return None
+        resultado = actualizar_parcial("mascotas", mascota_id, cambios, version_esperada)
+        if resultado.estado == ACTUALIZADO:
+            cache_lectura.invalidar("mascotas")
+        return _informar_cambios(resultado, f"la mascota con ID {mascota_id}",
+                                 f"\n No se encontró ninguna mascota con ID {mascota_id}.",
+                                 f"\n Mascota con ID {mascota_id} actualizada correctamente.", version_esperada)
+    except sqlite3.IntegrityError as e:
+        print(f"\n Error de integridad (posible duplicado o constraint):", e)
+    except sqlite3.OperationalError as e:
+        print(f"\n Error operacional (consulta mal escrita o BD inaccesible):", e)
+    except sqlite3.DatabaseError as e:
+        print(f"\n Error general de base de datos:", e)
+        # Fin del try-except, se maneja errores comunes de sqlite3
 
 # -----------------------------------------
 # Buscar mascotas por propietario
-# Muestra todas las mascotas asociadas a un ID de propietario.
+# Devuelve una página de las mascotas de un responsable (por su ID, con el índice idx_mascotas_responsable).
 # -----------------------------------------
-def buscar_mascotas_por_responsable(responsable: int) -> None:
-        with conectar() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM mascotas WHERE responsable = ?", (responsable,))
-            mascotas = cursor.fetchall()
-            if not mascotas:
-                print(f"\n No hay mascotas registradas para el responsable '{responsable}'.")
-                return
-            print(f"\n Mascotas del responsable '{responsable}':")
-            print("-" * 80)
-            for mascota in mascotas:
-                print(f"ID: {mascota[0]}, Nombre: {mascota[1]}, Especie: {mascota[2]}, Raza: {mascota[3]}, Edad: {mascota[4]}, Peso: {mascota[5]}")
-            print("-" * 80)
+@medir_controlador
+def buscar_mascotas_por_responsable(idResponsable: int, despues_de: int = 0, tamano_pagina: int = TAMANO_PAGINA) -> Pagina:
+        return cache_lectura.obtener("mascotas", ("responsable", idResponsable, despues_de, tamano_pagina),
+            lambda: _pagina(iterar_mascotas(despues_de, tamano_pagina + 1, idResponsable=idResponsable), tamano_pagina, clave=lambda m: m.idMascota))
 
 # -----------------------------------------
 # Buscar mascotas por especie
-# Filtra y muestra mascotas por tipo de especie.
+# Devuelve una página de mascotas de la especie indicada.
 # -----------------------------------------
-def buscar_mascotas_por_especie(especie: str) -> None:
-        with conectar() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM mascotas WHERE especie = ?", (especie,))
-            mascotas = cursor.fetchall()
-            if not mascotas:
-                print(f"\n No hay mascotas registradas de la especie '{especie}'.")
-                return
-            print(f"\n Mascotas de la Especie '{especie}':")
-            print("-" * 80)
-            for mascota in mascotas:
-                print(f"ID: {mascota[0]}, Nombre: {mascota[1]}, Raza: {mascota[3]}, Edad: {mascota[4]}, Peso: {mascota[5]}, Responsable: {mascota[6]}")
-            print("-" * 80)            
+@medir_controlador
+def buscar_mascotas_por_especie(especie: str, despues_de: int = 0, tamano_pagina: int = TAMANO_PAGINA) -> Pagina:
+        return cache_lectura.obtener("mascotas", ("especie", especie, despues_de, tamano_pagina),
+            lambda: _pagina(iterar_mascotas(despues_de, tamano_pagina + 1, especie=especie), tamano_pagina, clave=lambda m: m.idMascota))
+
+# -----------------------------------------
+# Buscar mascotas por texto libre
+# Nombre, especie o raza ("perro labrador"); mismas reglas que buscar_veterinarios.
+# El responsable se busca con buscar_responsables y sus mascotas con buscar_mascotas_por_responsable.
+# -----------------------------------------
+@medir_controlador
+def buscar_mascotas(texto: str, despues_de: int = 0, tamano_pagina: int = TAMANO_PAGINA) -> Optional[PaginaBusqueda]:
+    return _buscar_texto("mascotas", texto, despues_de, tamano_pagina)
 
 # -----------------------------------------
 # Contar mascotas
-# Calcula el total de mascotas registradas.
+# Devuelve el total de mascotas registradas.
 # -----------------------------------------
-def contar_mascotas() -> None:
+@medir_controlador
+def contar_mascotas() -> Optional[int]:
     # Comienzo del try-except
     try:
         with conectar() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM mascotas")
-            count = cursor.fetchone()[0] # Obtener el conteo desde el resultado de la consulta
-             # Imprimir el total de mascotas registradas
-            print(f"\n Total de mascotas registradas: {count}")
+            return cursor.fetchone()[0] # Obtener el conteo desde el resultado de la consulta
     except sqlite3.IntegrityError as e:
         print(f"\n Error de integridad (posible duplicado o constraint):", e)
     except sqlite3.OperationalError as e:
@@ -163,29 +366,155 @@ def contar_mascotas() -> None:
         print(f"\n Error general de base de datos:", e)
         # Fin del try-except, se maneja errores comunes de sqlite3
 
+# -----------------------------------------
+# Registrar nuevo responsable
+# Inserta el dueño de una o más mascotas, con teléfono y email opcionales.
+# -----------------------------------------
+@medir_controlador
+def registrar_nuevo_responsable(nombre: str, telefono: Optional[str] = None, email: Optional[str] = None) -> Optional[int]:
+    try:
+        with conectar() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO responsables (nombre, telefono, email) VALUES (?, ?, ?)",
+                (nombre, telefono, email)
+            )
+            conn.commit()
+            print(f"\n Responsable '{nombre}' agregado correctamente.")
+            return cursor.lastrowid
+    except sqlite3.IntegrityError as e:
+        print("\n Error de integridad:", e)
+    except sqlite3.OperationalError as e:
+        print("\n Error operacional:", e)
+    except sqlite3.DatabaseError as e:
+        print("\n Error general de base de datos:", e)
+
+# -----------------------------------------
+# Listar responsables
+# Devuelve una página de responsables a partir del ID indicado (None si falla la consulta).
+# -----------------------------------------
+@medir_controlador
+def listar_responsables(despues_de: int = 0, tamano_pagina: int = TAMANO_PAGINA) -> Optional[Pagina]:
+    try:
+        return _pagina(iterar_responsables(despues_de, tamano_pagina + 1), tamano_pagina, clave=lambda r: r.idResponsable)
+    except sqlite3.OperationalError as e:
+        print("\n Error operacional:", e)
+    except sqlite3.DatabaseError as e:
+        print("\n Error general de base de datos:", e)
+
+# -----------------------------------------
+# Actualizar responsable
+# Modifica nombre, teléfono y/o email; los que no se envían se mantienen. Devuelve el responsable actualizado.
+# -----------------------------------------
+@medir_controlador
+def actualizar_responsable(responsable_id: int, nombre: Optional[str] = None, telefono: Optional[str] = None,
+    email: Optional[str] = None, version_esperada: Optional[int] = None) -> Optional[Responsable]:
+    try:
+        resultado = actualizar_parcial("responsables", responsable_id, {"nombre": nombre, "telefono": telefono, "email": email}, version_esperada)
+        return _informar_cambios(resultado, f"el responsable con ID {responsable_id}",
+                                 f"\n No se encontró responsable con ID {responsable_id}.",
+                                 f"\n Responsable con ID {responsable_id} actualizado correctamente.", version_esperada)
+    except sqlite3.IntegrityError as e:
+        print("\n Error de integridad:", e)
+    except sqlite3.OperationalError as e:
+        print("\n Error operacional:", e)
+    except sqlite3.DatabaseError as e:
+        print("\n Error general de base de datos:", e)
+
+# -----------------------------------------
+# Eliminar responsable
+# Solo si no tiene mascotas: primero hay que reasignarlas o eliminarlas.
+# -----------------------------------------
+@medir_controlador
+def eliminar_responsable(responsable_id: int) -> bool:
+    try:
+        with conectar() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """DELETE FROM responsables WHERE idResponsable = ?
+                   AND NOT EXISTS (SELECT 1 FROM mascotas WHERE idResponsable = ?)""",
+                (responsable_id, responsable_id)
+            )
+            if cursor.rowcount == 0:
+                if cursor.execute("SELECT 1 FROM responsables WHERE idResponsable = ?", (responsable_id,)).fetchone():
+                    print(f"\n Error: el responsable con ID {responsable_id} tiene mascotas registradas.")
+                else:
+                    print(f"\n No se encontró responsable con ID {responsable_id}.")
+                return False
+            conn.commit()
+            print(f"\n Responsable con ID {responsable_id} eliminado correctamente.")
+            return True
+    except sqlite3.IntegrityError as e:
+        print("\n Error de integridad:", e)
+    except sqlite3.OperationalError as e:
+        print("\n Error operacional:", e)
+    except sqlite3.DatabaseError as e:
+        print("\n Error general de base de datos:", e)
+    return False
+
+# -----------------------------------------
+# Buscar responsables por texto libre
+# Nombre, teléfono o email; mismas reglas que buscar_veterinarios (tolera errores de tipeo en el nombre).
+# -----------------------------------------
+@medir_controlador
+def buscar_responsables(texto: str, despues_de: int = 0, tamano_pagina: int = TAMANO_PAGINA) -> Optional[PaginaBusqueda]:
+    return _buscar_texto("responsables", texto, despues_de, tamano_pagina)
+
+# -----------------------------------------
+# Informar conflicto de agenda
+# Muestra la cita con la que choca la solicitada y sugiere horarios libres del mismo día.
+# -----------------------------------------
+def _informar_conflicto(idVeterinario: int, fecha: str, hora: str, conflicto: tuple, excluir_reserva: Optional[int] = None) -> None:
+    print(f"\n Error: el veterinario {idVeterinario} ya tiene la reserva {conflicto[0]} a las {conflicto[1]} el {fecha}.")
+    sugerencias = indice_agenda.sugerir(idVeterinario, fecha, hora, excluir_reserva=excluir_reserva)
+    if sugerencias:
+        print(" Horarios libres sugeridos: " + ", ".join(sugerencias))
+    else:
+        print(" No quedan horarios libres ese día.")
+
 # -----------------------------------------
 # Crear reserva
 # Inserta una nueva reserva de atención veterinaria.
+# Rechaza la reserva si el veterinario ya tiene una cita superpuesta y sugiere alternativas.
+# La verificación y el INSERT ocurren en la misma transacción BEGIN IMMEDIATE (ejecutar_escritura),
+# así dos reservas simultáneas para el mismo horario no pueden confirmarse ambas.
 # -----------------------------------------
-def crear_reserva(idMascota: int, idVeterinario: int, fecha: str, hora: str, motivo: str, estadoMascota: str) -> None:
+@medir_controlador
+def crear_reserva(idMascota: int, idVeterinario: int, fecha: str, hora: str, motivo: str, estadoMascota: str) -> Optional[int]:
     #Cominzo del try-except
     try: 
-        with conectar() as conn: # Conexión a la base de datos
-            c = conn.cursor()
+        try: # Fecha y hora normalizadas para que las comparaciones por rango sean válidas
+            fecha, hora = normalizar_fecha(fecha), normalizar_hora(hora)
+        except ValueError:
+            print("\n Error: fecha u hora con formato inválido (YYYY-MM-DD y HH:MM[:SS]).")
+            return
+
+        # Chequeo rápido en memoria, antes de tomar el lock de escritura
+        conflicto = indice_agenda.conflicto(idVeterinario, fecha, hora)
+        if conflicto:
+            _informar_conflicto(idVeterinario, fecha, hora, conflicto)
+            return
+
+        # Verificar existencia de la mascota y del veterinario (caché de lectura, sin tomar el lock)
+        # Las claves foráneas siguen siendo la garantía si alguno se borró mientras tanto
+        if obtener_mascota(idMascota) is None:
+            print(f"\n Error: la mascota con ID {idMascota} no existe.")
+            return
+        if obtener_veterinario(idVeterinario) is None:
+            print(f"\n Error: el veterinario con ID {idVeterinario} no existe.")
+            return
 
-            # Verificar existencia de la mascota
-            c.execute("SELECT 1 FROM mascotas WHERE idMascota = ?", (idMascota,))
-            if not c.fetchone():
-                print(f"\n Error: la mascota con ID {idMascota} no existe.")
-                return
+        def aplicar(conn) -> Optional[int]:
+            c = conn.cursor()
 
-            # Verificar existencia del veterinario
-            c.execute("SELECT 1 FROM veterinarios WHERE idVeterinario = ?", (idVeterinario,))
-            if not c.fetchone():
-                print(f"\n Error: el veterinario con ID {idVeterinario} no existe.")
-                return
+            # Verificación autoritativa de choque, ya con el lock de escritura tomado
+            conflicto = buscar_conflicto(conn, idVeterinario, fecha, hora)
+            if conflicto:
+                conn.rollback()
+                _informar_conflicto(idVeterinario, fecha, hora, conflicto)
+                return None
 
-            # Si ambos existen, se ingresa reserva
+            # Si ambos existen y el horario está libre, se ingresa reserva
             c.execute(
                 """
                 INSERT INTO reservas (idMascota, idVeterinario, fecha, hora, motivo, estadoMascota)
@@ -194,7 +523,14 @@ def crear_reserva(idMascota: int, idVeterinario: int, fecha: str, hora: str, mot
                 (idMascota, idVeterinario, fecha, hora, motivo, estadoMascota)
             )
             conn.commit() # Guardar los cambios y fin de las interacciones de sqlite3
+            return c.lastrowid
+
+        idReserva = ejecutar_escritura(aplicar) # BEGIN IMMEDIATE, con reintentos si la base está ocupada
+        if idReserva is not None:
             print("\n Reserva creada exitosamente.") # Mensaje de éxito
+        return idReserva
+    except sqlite3.IntegrityError as e:
+        print("\n Error de integridad (¿se eliminó la mascota o el veterinario?):", e)
     except sqlite3.DatabaseError as e:
         print("Error de base de datos inesperado: ", e )	  
     except Exception as e:
@@ -203,75 +539,102 @@ def crear_reserva(idMascota: int, idVeterinario: int, fecha: str, hora: str, mot
 
 # -----------------------------------------
 # Mostrar reservas
-# Lista todas las reservas almacenadas.
+# Devuelve una página de reservas a partir del ID indicado.
 # -----------------------------------------
-def mostrar_reservas() -> None:
-    with conectar() as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM reservas")
-        reservas = cursor.fetchall()
+@medir_controlador
+def mostrar_reservas(despues_de: int = 0, tamano_pagina: int = TAMANO_PAGINA) -> Pagina:
+    return _pagina(iterar_reservas(despues_de, tamano_pagina + 1), tamano_pagina, clave=lambda r: r.idReserva)
 
-        if not reservas:
-            print("\n No hay reservas registradas.")
-            return
+# -----------------------------------------
+# Buscar reservas por motivo
+# Palabras del motivo, sin distinguir tildes ni mayúsculas y por prefijo (sin búsqueda aproximada).
+# -----------------------------------------
+@medir_controlador
+def buscar_reservas_por_motivo(texto: str, despues_de: int = 0, tamano_pagina: int = TAMANO_PAGINA) -> Optional[PaginaBusqueda]:
+    return _buscar_texto("reservas", texto, despues_de, tamano_pagina)
+
+# -----------------------------------------
+# Buscar reservas por responsable
+# Las reservas de todas las mascotas de un responsable, en un solo JOIN: el índice idx_mascotas_responsable
+# da sus mascotas e idx_reservas_mascota las reservas de cada una. El cursor es el último idReserva.
+# -----------------------------------------
+_COLUMNAS_RESERVA_JOIN = ", ".join(f"reservas.{campo}" for campo in Reserva.__slots__)
+
+@medir_controlador
+def buscar_reservas_por_responsable(idResponsable: int, despues_de: int = 0, tamano_pagina: int = TAMANO_PAGINA) -> Pagina:
+    return _pagina(iterar_consulta(
+        f"""SELECT {_COLUMNAS_RESERVA_JOIN} FROM mascotas
+            JOIN reservas ON reservas.idMascota = mascotas.idMascota
+            WHERE mascotas.idResponsable = ? AND reservas.idReserva > ?
+            ORDER BY reservas.idReserva LIMIT ?""",
+        (idResponsable, despues_de, tamano_pagina + 1), fabrica=fila_reserva
+    ), tamano_pagina, clave=lambda r: r.idReserva)
 
-        print("\n--- Listado de Reservas ---")
-        for fila in reservas:
-            print(f"ID Reserva: {fila[0]}, ID Mascota: {fila[1]}, ID Veterinario: {fila[2]}, Fecha: {fila[3]}, Hora: {fila[4]}, Motivo: {fila[5]}, Estado Mascota: {fila[6]}")
-            
 # -----------------------------------------
 # Modificar reserva
-# Actualiza los campos de una reserva existente manteniendo los valores previos si se omiten.
+# Actualiza solo los campos informados de una reserva (sg_cambios); los omitidos se mantienen.
+# Si cambia veterinario, fecha u hora, verifica choques de agenda dentro de la misma transacción
+# (para eso lee la reserva actual); si no, basta el UPDATE.
+# Con version_esperada, se rechaza si la reserva cambió desde que quien llama la leyó.
+# Devuelve la reserva modificada o None.
 # -----------------------------------------
+@medir_controlador
 def modificar_reserva(idReserva: int, idMascota: Optional[int] = None, idVeterinario: Optional[int] = None, fecha: Optional[str] = None, hora: Optional[str] = None,
-    motivo: Optional[str] = None, estadoMascota: Optional[str] = None) -> None:
+    motivo: Optional[str] = None, estadoMascota: Optional[str] = None, version_esperada: Optional[int] = None) -> Optional[Reserva]:
     try: #Comienzo del try-except
-        with conectar() as conn: # Conexión a la base de datos
-            c = conn.cursor()
+        try: # Fecha y hora normalizadas si se informan
+            fecha = normalizar_fecha(fecha) if fecha is not None else None
+            hora = normalizar_hora(hora) if hora is not None else None
+        except ValueError:
+            print("\n Error: fecha u hora con formato inválido (YYYY-MM-DD y HH:MM[:SS]).")
+            return None
 
-            # Verificar existencia de la mascota
-            c.execute("SELECT 1 FROM mascotas WHERE idMascota = ?", (idMascota,))
-            if not c.fetchone():
-                print(f"\n Error: la mascota con ID {idMascota} no existe.")
-                return
+        # Verificar existencia de la mascota (solo si se cambia)
+        if idMascota is not None and obtener_mascota(idMascota) is None:
+            print(f"\n Error: la mascota con ID {idMascota} no existe.")
+            return None
 
-            # Verificar existencia del veterinario
-            c.execute("SELECT 1 FROM veterinarios WHERE idVeterinario = ?", (idVeterinario,))
-            if not c.fetchone():
-                print(f"\n Error: el veterinario con ID {idVeterinario} no existe.")
-                return
+        # Verificar existencia del veterinario (solo si se cambia)
+        if idVeterinario is not None and obtener_veterinario(idVeterinario) is None:
+            print(f"\n Error: el veterinario con ID {idVeterinario} no existe.")
+            return None
 
-            # Si ambos existen, continua flujo
+        cambios = {"idMascota": idMascota, "idVeterinario": idVeterinario, "fecha": fecha, "hora": hora,
+                   "motivo": motivo, "estadoMascota": estadoMascota}
 
-            # Trae valores actuales
-            c.execute(
-                """SELECT *
-                   FROM reservas WHERE idReserva = ?""",
-                (idReserva,)
-            )
-            r = c.fetchone()
-            if not r:
-                print(f"\n No se encontró la reserva con ID {idReserva}.")
-                return
-            # Mantén lo existente si viene None
-            nuevo_idMascota     = idMascota     if idMascota     is not None else r[1]
-            nuevo_idVeterinario = idVeterinario if idVeterinario is not None else r[2]
-            nueva_fecha         = fecha if fecha is not None else r[3]
-            nueva_hora          = hora  if hora  is not None else r[4]
-            nuevo_motivo        = motivo        if motivo        is not None else r[5]
-            nuevo_estado        = estadoMascota if estadoMascota is not None else r[6]
-            c.execute(
-                """UPDATE reservas
-                   SET idMascota = ?, idVeterinario = ?, fecha = ?, hora = ?, motivo = ?, estadoMascota = ?
-                   WHERE idReserva = ?""",
-                (nuevo_idMascota, nuevo_idVeterinario,
-                 nueva_fecha, nueva_hora, nuevo_motivo, nuevo_estado, idReserva)
-            )
-            conn.commit()
-            if c.rowcount == 0:
-                print("\n No se actualizó ninguna fila.")
-            else:
-                print("\n Reserva actualizada correctamente.")
+        # Si ambos existen, continua flujo
+        def aplicar(conn) -> Optional[ResultadoCambios]:
+            # Verificar choque de agenda si cambia el horario o el veterinario, ya con el lock de escritura tomado
+            if (idVeterinario, fecha, hora) != (None, None, None):
+                r = obtener_reserva(idReserva)
+                if not r:
+                    return ResultadoCambios(INEXISTENTE)
+                if version_esperada is not None and r.version != version_esperada:
+                    return ResultadoCambios(CONFLICTO, r)
+                nuevo_idVeterinario = idVeterinario if idVeterinario is not None else r.idVeterinario
+                nueva_fecha = fecha if fecha is not None else r.fecha
+                nueva_hora = hora if hora is not None else r.hora
+                try:
+                    conflicto = buscar_conflicto(conn, nuevo_idVeterinario, normalizar_fecha(nueva_fecha), nueva_hora, excluir_reserva=idReserva)
+                except ValueError:
+                    print("\n Error: la reserva no tiene fecha u hora válidas; indique ambas.")
+                    return None
+                if conflicto:
+                    conn.rollback()
+                    _informar_conflicto(nuevo_idVeterinario, nueva_fecha, nueva_hora, conflicto, excluir_reserva=idReserva)
+                    return None
+            return aplicar_cambios(conn, "reservas", idReserva, cambios, version_esperada)
+
+        if (idVeterinario, fecha, hora) != (None, None, None):
+            resultado = ejecutar_escritura(aplicar) # BEGIN IMMEDIATE, con reintentos si la base está ocupada
+        else: # Sin cambio de agenda: un único UPDATE, o ninguna escritura si no hay cambios
+            resultado = actualizar_parcial("reservas", idReserva, cambios, version_esperada)
+        if resultado is None:
+            return None
+        return _informar_cambios(resultado, f"la reserva {idReserva}", f"\n No se encontró la reserva con ID {idReserva}.",
+                                 "\n Reserva actualizada correctamente.", version_esperada)
+    except sqlite3.IntegrityError as e:
+        print("\n Error de integridad (¿se eliminó la mascota o el veterinario?):", e)
     except sqlite3.DatabaseError as e:
         print("Error de base de datos inesperado: ", e )
     except Exception as e:
@@ -281,7 +644,8 @@ def modificar_reserva(idReserva: int, idMascota: Optional[int] = None, idVeterin
 # Eliminar reserva
 # Borra una reserva por su ID.
 # -----------------------------------------
-def eliminar_reserva(idReserva: int) -> None:
+@medir_controlador
+def eliminar_reserva(idReserva: int) -> bool:
     try:
         with conectar() as conn:
             c = conn.cursor()
@@ -295,18 +659,160 @@ def eliminar_reserva(idReserva: int) -> None:
             conn.commit()
             if c.rowcount == 0:
                 print("No se encontró la reserva con el ID proporcionado.")
-            else:
-                print("Reserva eliminada exitosamente.")
+                return False
+            print("Reserva eliminada exitosamente.")
+            return True
     except sqlite3.DatabaseError as e:
         print("Error de base de datos inesperado: ", e )  
     except Exception as e:
         print("Error inesperado: ", e)
+    return False
+
+# -----------------------------------------
+# Eliminar varias reservas
+# Un solo DELETE sobre la lista de IDs; RETURNING indica cuáles existían.
+# -----------------------------------------
+@medir_controlador
+def eliminar_reservas(ids: list) -> Optional[list]:
+    ids = _ids_unicos(ids)
+    if not ids:
+        print("\n No se indicó ninguna reserva.")
+        return None
+    try:
+        eliminadas = ejecutar_escritura(lambda conn: {fila[0] for fila in conn.execute(
+            "DELETE FROM reservas WHERE idReserva IN (SELECT value FROM json_each(?)) RETURNING idReserva", (json.dumps(ids),))})
+        return _informar_lote([ResultadoItem(i, i in eliminadas, "eliminada" if i in eliminadas else "no existe") for i in ids],
+                              "reservas eliminadas", "Reserva")
+    except sqlite3.DatabaseError as e:
+        print("Error de base de datos inesperado: ", e )
+
+# -----------------------------------------
+# Cancelar la agenda de un veterinario
+# Borra todas sus reservas entre dos fechas (inclusive) con un DELETE por predicado sobre el índice
+# (idVeterinario, fecha, hora). Devuelve una entrada por reserva cancelada.
+# -----------------------------------------
+@medir_controlador
+def cancelar_reservas_veterinario(idVeterinario: int, fecha_desde: str, fecha_hasta: str) -> Optional[list]:
+    try:
+        fecha_desde, fecha_hasta = normalizar_fecha(fecha_desde), normalizar_fecha(fecha_hasta)
+    except ValueError:
+        print("\n Error: fecha con formato inválido (YYYY-MM-DD).")
+        return None
+    if fecha_desde > fecha_hasta:
+        print("\n Error: la fecha inicial es posterior a la final.")
+        return None
+    if obtener_veterinario(idVeterinario) is None:
+        print(f"\n Error: el veterinario con ID {idVeterinario} no existe.")
+        return None
+    try:
+        canceladas = ejecutar_escritura(lambda conn: [fila[0] for fila in conn.execute(
+            "DELETE FROM reservas WHERE idVeterinario = ? AND fecha BETWEEN ? AND ? RETURNING idReserva",
+            (idVeterinario, fecha_desde, fecha_hasta))])
+        return _informar_lote([ResultadoItem(i, True, "cancelada") for i in sorted(canceladas)],
+                              f"reservas canceladas del veterinario {idVeterinario} entre {fecha_desde} y {fecha_hasta}", "Reserva")
+    except sqlite3.DatabaseError as e:
+        print("Error de base de datos inesperado: ", e )
+
+# -----------------------------------------
+# Actualizar varias reservas
+# Mismo motivo y/o estado para una lista de reservas, en un único UPDATE (sg_cambios).
+# Veterinario, fecha y hora no se cambian en lote: para mover citas está reprogramar_reservas.
+# -----------------------------------------
+@medir_controlador
+def actualizar_reservas(ids: list, motivo: Optional[str] = None, estadoMascota: Optional[str] = None) -> Optional[list]:
+    ids = _ids_unicos(ids)
+    if not ids:
+        print("\n No se indicó ninguna reserva.")
+        return None
+    try:
+        resultados = ejecutar_escritura(lambda conn: aplicar_cambios_lote(conn, "reservas", ids,
+                                                                           {"motivo": motivo, "estadoMascota": estadoMascota}))
+        detalle = {ACTUALIZADO: "actualizada", INEXISTENTE: "no existe"}
+        return _informar_lote([ResultadoItem(i, r.estado != INEXISTENTE, detalle.get(r.estado, "sin cambios"))
+                               for i, r in resultados.items()], "reservas actualizadas", "Reserva")
+    except sqlite3.IntegrityError as e:
+        print("\n Error de integridad:", e)
+    except sqlite3.DatabaseError as e:
+        print("Error de base de datos inesperado: ", e )
+
+# -----------------------------------------
+# Reprogramar un día de reservas
+# Mueve las reservas de un veterinario en una fecha a otra fecha y/u otro veterinario, conservando la hora.
+# Cada una se verifica contra la agenda de destino con el lock de escritura tomado y contra las ya
+# aceptadas en el mismo lote (datos antiguos pueden tener citas superpuestas en el día de origen); las
+# que chocan quedan donde estaban y se informan. Las demás se mueven juntas con executemany.
+# -----------------------------------------
+@medir_controlador
+def reprogramar_reservas(idVeterinario: int, fecha: str, nueva_fecha: Optional[str] = None,
+    nuevo_idVeterinario: Optional[int] = None) -> Optional[list]:
+    try:
+        fecha = normalizar_fecha(fecha)
+        nueva_fecha = normalizar_fecha(nueva_fecha) if nueva_fecha is not None else fecha
+    except ValueError:
+        print("\n Error: fecha con formato inválido (YYYY-MM-DD).")
+        return None
+    destino = nuevo_idVeterinario if nuevo_idVeterinario is not None else idVeterinario
+    if (destino, nueva_fecha) == (idVeterinario, fecha):
+        print("\n Error: indique otra fecha u otro veterinario.")
+        return None
+    if obtener_veterinario(destino) is None:
+        print(f"\n Error: el veterinario con ID {destino} no existe.")
+        return None
+
+    def aplicar(conn) -> list:
+        resultados, movidas, aceptadas = [], [], [] # aceptadas: (minuto de inicio, idReserva, hora)
+        for id_reserva, hora in conn.execute(
+            "SELECT idReserva, hora FROM reservas WHERE idVeterinario = ? AND fecha = ? ORDER BY hora", (idVeterinario, fecha)
+        ).fetchall():
+            try:
+                inicio = a_minutos(hora)
+                conflicto = buscar_conflicto(conn, destino, nueva_fecha, hora, excluir_reserva=id_reserva)
+            except (ValueError, AttributeError, TypeError): # Registros antiguos sin hora válida
+                resultados.append(ResultadoItem(id_reserva, False, "no tiene una hora válida"))
+                continue
+            conflicto = conflicto or next(((otra, hora_otra) for minuto, otra, hora_otra in aceptadas
+                                           if abs(inicio - minuto) < DURACION_CITA_MINUTOS), None)
+            if conflicto:
+                resultados.append(ResultadoItem(id_reserva, False, f"choca con la reserva {conflicto[0]} de las {conflicto[1]}"))
+                continue
+            aceptadas.append((inicio, id_reserva, hora))
+            movidas.append((destino, nueva_fecha, id_reserva))
+            resultados.append(ResultadoItem(id_reserva, True, f"{nueva_fecha} {hora}"))
+        conn.executemany("UPDATE reservas SET idVeterinario = ?, fecha = ?, version = version + 1 WHERE idReserva = ?", movidas)
+        return resultados
+
+    try:
+        return _informar_lote(ejecutar_escritura(aplicar), f"reservas reprogramadas al {nueva_fecha} con el veterinario {destino}", "Reserva")
+    except sqlite3.IntegrityError as e:
+        print("\n Error de integridad:", e)
+    except sqlite3.DatabaseError as e:
+        print("Error de base de datos inesperado: ", e )
+
+# -----------------------------------------
+# Buscar horarios disponibles
+# Muestra los primeros `cantidad` horarios libres entre todos los veterinarios de la especialidad
+# (o de todos si se omite) dentro del rango de fechas, según sus jornadas de atención.
+# Devuelve la lista de HorarioLibre encontrados (None si las fechas son inválidas o falla la consulta).
+# -----------------------------------------
+@medir_controlador
+def buscar_horarios_disponibles(especialidad: Optional[str], fecha_desde: str, fecha_hasta: str,
+    duracion: int = DURACION_CITA_MINUTOS, cantidad: int = 5) -> Optional[list]:
+    try:
+        horarios = servicio_disponibilidad.proximos_disponibles(especialidad, fecha_desde, fecha_hasta, duracion, cantidad)
+    except ValueError:
+        print("\n Error: fecha con formato inválido (YYYY-MM-DD).")
+        return None
+    except sqlite3.DatabaseError as e:
+        print("Error de base de datos inesperado: ", e)
+        return None
+    return [HorarioLibre(*horario) for horario in horarios]
 
 # -----------------------------------------
 # Registrar nuevo veterinario
 # Inserta un veterinario con nombre y especialidad opcional.
 # -----------------------------------------
-def registrar_nuevo_veterinario(nombre: str, especialidad: Optional[str] = None) -> None:
+@medir_controlador
+def registrar_nuevo_veterinario(nombre: str, especialidad: Optional[str] = None) -> Optional[int]:
     try:
         with conectar() as conn:
             cursor = conn.cursor()
@@ -315,7 +821,9 @@ def registrar_nuevo_veterinario(nombre: str, especialidad: Optional[str] = None)
                 (nombre, especialidad)
             )
             conn.commit()
+            cache_lectura.invalidar("veterinarios")
             print(f"\n Veterinario '{nombre}' agregado correctamente.")
+            return cursor.lastrowid
     except sqlite3.IntegrityError as e:
         print("\n Error de integridad:", e)
     except sqlite3.OperationalError as e:
@@ -325,23 +833,14 @@ def registrar_nuevo_veterinario(nombre: str, especialidad: Optional[str] = None)
 
 # -----------------------------------------
 # Listar veterinarios
-# Muestra todos los veterinarios registrados.
+# Devuelve una página de veterinarios a partir del ID indicado (None si falla la consulta).
 # -----------------------------------------
-def listar_veterinarios() -> None: 
+@medir_controlador
+def listar_veterinarios(despues_de: int = 0, tamano_pagina: int = TAMANO_PAGINA) -> Optional[Pagina]:
      # Comienzo del try-except
     try:
-        with conectar() as conn: # Conexión a la base de datos
-            cursor = conn.cursor()
-            cursor.execute("SELECT idVeterinario, nombre, especialidad FROM veterinarios")
-            vets = cursor.fetchall()
-            if not vets:
-                print("\n No hay veterinarios registrados.")
-                return
-            print("\n Lista de Veterinarios:")
-            print("-" * 80)
-            for v in vets:
-                print(f"ID: {v[0]}, Nombre: {v[1]}, Especialidad: {v[2]}")
-            print("-" * 80)
+        return cache_lectura.obtener("veterinarios", ("listar", despues_de, tamano_pagina),
+            lambda: _pagina(iterar_veterinarios(despues_de, tamano_pagina + 1), tamano_pagina, clave=lambda v: v.idVeterinario))
     except sqlite3.IntegrityError as e:
         print("\n Error de integridad:", e)
     except sqlite3.OperationalError as e:
@@ -354,7 +853,8 @@ def listar_veterinarios() -> None:
 # Eliminar veterinario
 # Elimina un veterinario por ID y valida existencia por rowcount.
 # -----------------------------------------
-def eliminar_veterinario(veterinario_id: int) -> None: 
+@medir_controlador
+def eliminar_veterinario(veterinario_id: int) -> bool:
      # Comienzo del try-except
     try:
         with conectar() as conn:
@@ -363,9 +863,12 @@ def eliminar_veterinario(veterinario_id: int) -> None:
             if cursor.rowcount == 0: # Si no se eliminó ninguna fila, el ID no existe,Se informa y se sale de la función
                 #Se usa rowcount para verificar si se eliminó alguna fila
                 print(f"\n No se encontró veterinario con ID {veterinario_id}.")
+                return False
             else:
                 conn.commit() # Guardar los cambios y fin de las interacciones de sqlite3
+                cache_lectura.invalidar("veterinarios")
                 print(f"\n Veterinario con ID {veterinario_id} eliminado correctamente.") #Mensaje de éxito
+                return True
     except sqlite3.IntegrityError as e:
         print("\n Error de integridad:", e)
     except sqlite3.OperationalError as e:
@@ -373,31 +876,22 @@ def eliminar_veterinario(veterinario_id: int) -> None:
     except sqlite3.DatabaseError as e:
         print("\n Error general de base de datos:", e)
         # Fin del try-except, se maneja errores comunes de sqlite3
+    return False
 
 # -----------------------------------------
 # Actualizar veterinario
-# Modifica nombre y/o especialidad manteniendo valores actuales si no se envían nuevos.
+# Modifica nombre y/o especialidad; los que no se envían se mantienen. Devuelve el veterinario actualizado.
 # -----------------------------------------
-def actualizar_veterinario(veterinario_id: int, nombre: Optional[str] = None, especialidad: Optional[str] = None) -> None:
+@medir_controlador
+def actualizar_veterinario(veterinario_id: int, nombre: Optional[str] = None, especialidad: Optional[str] = None,
+    version_esperada: Optional[int] = None) -> Optional[Veterinario]:
     try:
-        with conectar() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT idVeterinario, nombre, especialidad FROM veterinarios WHERE idVeterinario = ?",
-                (veterinario_id,)
-            )
-            v = cursor.fetchone()
-            if not v:
-                print(f"\n No se encontró veterinario con ID {veterinario_id}.")
-                return
-            nuevo_nombre = nombre if nombre is not None else v[1]
-            nueva_especialidad = especialidad if especialidad is not None else v[2]
-            cursor.execute(
-                "UPDATE veterinarios SET nombre = ?, especialidad = ? WHERE idVeterinario = ?",
-                (nuevo_nombre, nueva_especialidad, veterinario_id)
-            )
-            conn.commit()
-            print(f"\n Veterinario con ID {veterinario_id} actualizado correctamente.")
+        resultado = actualizar_parcial("veterinarios", veterinario_id, {"nombre": nombre, "especialidad": especialidad}, version_esperada)
+        if resultado.estado == ACTUALIZADO:
+            cache_lectura.invalidar("veterinarios")
+        return _informar_cambios(resultado, f"el veterinario con ID {veterinario_id}",
+                                 f"\n No se encontró veterinario con ID {veterinario_id}.",
+                                 f"\n Veterinario con ID {veterinario_id} actualizado correctamente.", version_esperada)
     except sqlite3.IntegrityError as e:
         print("\n Error de integridad:", e)
     except sqlite3.OperationalError as e:
@@ -407,159 +901,190 @@ def actualizar_veterinario(veterinario_id: int, nombre: Optional[str] = None, es
 
 # -----------------------------------------
 # Buscar veterinarios por especialidad
-# Filtra veterinarios por coincidencia exacta de especialidad.
+# Filtra veterinarios por coincidencia exacta de especialidad, una página a la vez.
 # -----------------------------------------
-def buscar_veterinarios_por_especialidad(especialidad: str) -> None:
-    with conectar() as conn: # Conexión a la base de datos
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT idVeterinario, nombre, especialidad FROM veterinarios WHERE especialidad = ?",
-            (especialidad,)
-        )
-        vets = cursor.fetchall() # Obtener todos los veterinarios que coincidan con la especialidad
-         # Si no hay veterinarios con esa especialidad, se informa y se sale de la función
-        if not vets:
-            print(f"\n No hay veterinarios con especialidad '{especialidad}'.")
-            return
-        print(f"\n Veterinarios con especialidad '{especialidad}':") #Mensaje de exito 
-        print("-" * 80)
-        for v in vets:
-            print(f"ID: {v[0]}, Nombre: {v[1]}") # Imprime ID y Nombre de cada veterinario encontrado
-        print("-" * 80) 
+@medir_controlador
+def buscar_veterinarios_por_especialidad(especialidad: str, despues_de: int = 0, tamano_pagina: int = TAMANO_PAGINA) -> Pagina:
+    # Obtener los veterinarios que coincidan con la especialidad
+    return cache_lectura.obtener("veterinarios", ("especialidad", especialidad, despues_de, tamano_pagina),
+        lambda: _pagina(iterar_veterinarios(despues_de, tamano_pagina + 1, especialidad=especialidad), tamano_pagina, clave=lambda v: v.idVeterinario))
 
 # -----------------------------------------
 # Buscar veterinarios por nombre
-# Realiza búsqueda parcial usando LIKE y orden alfabético por nombre.
+# Realiza búsqueda parcial usando LIKE y orden alfabético por nombre, una página a la vez.
+# El cursor de la página es la tupla (nombre, idVeterinario) de su último veterinario.
 # -----------------------------------------
-def buscar_veterinarios_por_nombre(texto: str) -> None:
-    with conectar() as conn:
-        cursor = conn.cursor()
-        like = f"%{texto}%"
-        cursor.execute(
-            "SELECT idVeterinario, nombre, especialidad FROM veterinarios WHERE nombre LIKE ? ORDER BY nombre",
-            (like,)
-        ) # Usa LIKE para búsqueda parcial y ORDER BY para ordenar alfabéticamente el nombre
-        vets = cursor.fetchall()
-        if not vets:
-            print(f"\n No hay veterinarios que coincidan con '{texto}'.") # Si no hay coincidencias, se informa y se sale de la función
-            return
-        print(f"\n Búsqueda por nombre contiene '{texto}':") #Mensaje de exito
-        print("-" * 80)
-        for v in vets:
-            print(f"ID: {v[0]}, Nombre: {v[1]}, Especialidad: {v[2]}")
-        print("-" * 80)
+@medir_controlador
+def buscar_veterinarios_por_nombre(texto: str, despues_de: Optional[tuple] = None, tamano_pagina: int = TAMANO_PAGINA) -> Pagina:
+    like = f"%{texto}%"
+    nombre_desde, id_desde = despues_de if despues_de is not None else ("", 0)
+    # Con tres o más caracteres el LIKE se resuelve con el índice de trigramas en lugar de recorrer la tabla
+    filtro = f"idVeterinario IN ({sql_contiene('veterinarios', 'nombre')})" if len(texto) >= 3 else "nombre LIKE ?"
+    # ORDER BY ordena alfabéticamente el nombre
+    # La comparación por (nombre, idVeterinario) continúa el orden sin OFFSET
+    return cache_lectura.obtener("veterinarios", ("nombre", texto, nombre_desde, id_desde, tamano_pagina), lambda: _pagina(iterar_consulta(
+        f"""SELECT {COLUMNAS_VETERINARIO} FROM veterinarios
+            WHERE {filtro} AND (nombre, idVeterinario) > (?, ?)
+            ORDER BY nombre, idVeterinario LIMIT ?""",
+        (like, nombre_desde, id_desde, tamano_pagina + 1), fabrica=fila_veterinario
+    ), tamano_pagina, clave=lambda v: (v.nombre, v.idVeterinario)))
+
+# -----------------------------------------
+# Buscar veterinarios por texto libre
+# Nombre o especialidad, sin distinguir tildes ni mayúsculas, por prefijo y ordenados por relevancia.
+# Sin coincidencias, devuelve los resultados aproximados (página con aproximada=True).
+# El cursor de la página es la cantidad de resultados ya mostrados.
+# -----------------------------------------
+@medir_controlador
+def buscar_veterinarios(texto: str, despues_de: int = 0, tamano_pagina: int = TAMANO_PAGINA) -> Optional[PaginaBusqueda]:
+    return _buscar_texto("veterinarios", texto, despues_de, tamano_pagina)
 
 # -----------------------------------------
 # Contar veterinarios
-# Calcula el total de veterinarios registrados.
+# Devuelve el total de veterinarios registrados.
 # -----------------------------------------
-def contar_veterinarios() -> None:
+@medir_controlador
+def contar_veterinarios() -> Optional[int]:
         with conectar() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM veterinarios")
-            count = cursor.fetchone()[0]
-            print(f"\n Total de veterinarios registrados: {count}") # Imprimir el total de veterinarios registrados
+            return cursor.fetchone()[0]
 
 # -----------------------------------------
 # Reporte: resumen general
-# Muestra métricas generales: totales, edades y top de reservas por veterinario.
+# Devuelve métricas generales: totales, edades y top de reservas por veterinario (None si falla).
+# Las métricas vienen de sg_reportes (una consulta consolidada, cacheada hasta el próximo cambio).
 # -----------------------------------------
-def reporte_resumen_general() -> None:
+@medir_controlador
+def reporte_resumen_general() -> Optional[ResumenGeneral]:
     try:
-        with conectar() as conn:
-            c = conn.cursor()
-
-            # Conteos generales
-            c.execute("SELECT COUNT(*) FROM usuarios"); total_usuarios = c.fetchone()[0]
-            c.execute("SELECT COUNT(*) FROM veterinarios"); total_veterinarios = c.fetchone()[0]
-            c.execute("SELECT COUNT(*) FROM mascotas"); total_mascotas = c.fetchone()[0]
-            c.execute("SELECT COUNT(*) FROM reservas"); total_reservas = c.fetchone()[0]
-
-            # Mascota más joven y más vieja
-            c.execute("SELECT MIN(edad), MAX(edad) FROM mascotas")
-            edad_min, edad_max = c.fetchone()
-
-            # Promedio de edad de las mascotas
-            c.execute("SELECT ROUND(AVG(edad), 1) FROM mascotas WHERE edad IS NOT NULL")
-            edad_promedio = c.fetchone()[0]
-
-            # Veterinario con más reservas
-            c.execute("""
-                SELECT v.nombre, COUNT(r.idReserva) AS total
-                FROM veterinarios v
-                LEFT JOIN reservas r ON v.idVeterinario = r.idVeterinario
-                GROUP BY v.idVeterinario
-                ORDER BY total DESC
-                LIMIT 1
-            """)
-            top_vet = c.fetchone()
-            vet_mas_reservas = f"{top_vet[0]} ({top_vet[1]} reservas)" if top_vet and top_vet[1] > 0 else "Sin registros"
-
-            print("\n=== REPORTE GENERAL DEL SISTEMA ===")
-            print(f"Usuarios registrados:       {total_usuarios}")
-            print(f"Veterinarios registrados:   {total_veterinarios}")
-            print(f"Mascotas registradas:       {total_mascotas}")
-            print(f"Reservas registradas:       {total_reservas}")
-            print("-" * 60)
-            print(f"Veterinario con más reservas: {vet_mas_reservas}")
-            print(f"Edad mínima de mascotas:      {edad_min if edad_min else 'N/A'} años")
-            print(f"Edad máxima de mascotas:      {edad_max if edad_max else 'N/A'} años")
-            print(f"Edad promedio de mascotas:    {edad_promedio if edad_promedio else 'N/A'} años")
-            print("-" * 60)
+        return obtener_resumen_general()
     except sqlite3.DatabaseError as e:
         print("Error de base de datos:", e)
+    return None
 
 # -----------------------------------------
 # Exportar resumen general a TXT
 # Genera un archivo de texto con las métricas del sistema.
 # -----------------------------------------
-def exportar_resumen_general_txt(ruta: str = "reporte_resumen_general.txt") -> None:
+@medir_controlador
+def exportar_resumen_general_txt(ruta: str = "reporte_resumen_general.txt") -> Optional[str]:
     try:
-        with conectar() as conn:
-            c = conn.cursor()
+        resumen = obtener_resumen_general()
 
-            # Conteos generales
-            c.execute("SELECT COUNT(*) FROM usuarios"); total_usuarios = c.fetchone()[0]
-            c.execute("SELECT COUNT(*) FROM veterinarios"); total_veterinarios = c.fetchone()[0]
-            c.execute("SELECT COUNT(*) FROM mascotas"); total_mascotas = c.fetchone()[0]
-            c.execute("SELECT COUNT(*) FROM reservas"); total_reservas = c.fetchone()[0]
-
-            # Mascota más joven y más vieja
-            c.execute("SELECT MIN(edad), MAX(edad) FROM mascotas")
-            edad_min, edad_max = c.fetchone()
-
-            # Promedio de edad de las mascotas
-            c.execute("SELECT ROUND(AVG(edad), 1) FROM mascotas WHERE edad IS NOT NULL")
-            edad_promedio = c.fetchone()[0]
-
-            # Veterinario con más reservas
-            c.execute("""
-                SELECT v.nombre, COUNT(r.idReserva) AS total
-                FROM veterinarios v
-                LEFT JOIN reservas r ON v.idVeterinario = r.idVeterinario
-                GROUP BY v.idVeterinario
-                ORDER BY total DESC
-                LIMIT 1
-            """)
-            top_vet = c.fetchone()
-            vet_mas_reservas = f"{top_vet[0]} ({top_vet[1]} reservas)" if top_vet and top_vet[1] > 0 else "Sin registros"
-
-        # Crear o sobrescribir el archivo
-        with open(ruta, "w", encoding="utf-8") as archivo:
-            archivo.write("=== REPORTE GENERAL DEL SISTEMA ===\n\n")
-            archivo.write(f"Usuarios registrados:       {total_usuarios}\n")
-            archivo.write(f"Veterinarios registrados:   {total_veterinarios}\n")
-            archivo.write(f"Mascotas registradas:       {total_mascotas}\n")
-            archivo.write(f"Reservas registradas:       {total_reservas}\n")
-            archivo.write("-" * 60 + "\n")
-            archivo.write(f"Veterinario con más reservas: {vet_mas_reservas}\n")
-            archivo.write(f"Edad mínima de mascotas:      {edad_min if edad_min else 'N/A'} años\n")
-            archivo.write(f"Edad máxima de mascotas:      {edad_max if edad_max else 'N/A'} años\n")
-            archivo.write(f"Edad promedio de mascotas:    {edad_promedio if edad_promedio else 'N/A'} años\n")
-            archivo.write("-" * 60 + "\n")
+        # Crear o sobrescribir el archivo (temporal + rename: nunca queda un reporte a medias)
+        with escritura_atomica(ruta, "w", encoding="utf-8") as archivo:
+            archivo.write(TITULO_RESUMEN_GENERAL + "\n\n")
+            for linea in lineas_resumen_general(resumen):
+                archivo.write(linea + "\n")
 
         print(f"\nReporte exportado correctamente en: {ruta}")
+        return ruta
     except sqlite3.DatabaseError as e:
         print("Error de base de datos:", e)
     except OSError as e:
         print("Error al escribir archivo:", e)
+    return None
+
+# -----------------------------------------
+# Exportar datos
+# Exporta una tabla (o las reservas con mascota y veterinario) a CSV o JSON Lines, con .gz/.zst opcional.
+# Las fechas filtran por reservas.fecha. Devuelve la cantidad de filas exportadas (None si falla).
+# -----------------------------------------
+@medir_controlador
+def exportar_datos(fuente: str, ruta: str, fecha_desde: Optional[str] = None, fecha_hasta: Optional[str] = None) -> Optional[int]:
+    try:
+        filas = exportar(fuente, ruta, fecha_desde=fecha_desde, fecha_hasta=fecha_hasta)
+        print(f"\n{filas} filas exportadas correctamente en: {ruta}")
+        return filas
+    except ValueError as e:
+        print("\n Error:", e)
+    except RuntimeError as e:
+        print("\n Error:", e)
+    except sqlite3.DatabaseError as e:
+        print("Error de base de datos:", e)
+    except OSError as e:
+        print("Error al escribir archivo:", e)
+    return None
+
+# -----------------------------------------
+# Verificar contadores estadísticos
+# Compara los contadores incrementales con un recorrido completo de las tablas.
+# Devuelve True si coinciden.
+# -----------------------------------------
+@medir_controlador
+def verificar_contadores_estadisticos() -> bool:
+    try:
+        with conectar() as conn:
+            diferencias = verificar_estadisticas(conn)
+        if not diferencias:
+            print("\n Las estadísticas coinciden con las tablas.")
+            return True
+        print("\n Diferencias encontradas en las estadísticas:")
+        for metrica, contador, valor_real in diferencias:
+            print(f" {metrica}: contador={contador}, real={valor_real}")
+        return False
+    except sqlite3.DatabaseError as e:
+        print("Error de base de datos:", e)
+        return False
+
+# -----------------------------------------
+# Reconstruir contadores estadísticos
+# Recalcula los contadores desde las tablas dentro de una transacción de escritura.
+# -----------------------------------------
+@medir_controlador
+def reconstruir_contadores_estadisticos() -> bool:
+    try:
+        with conectar() as conn:
+            iniciar_escritura(conn)
+            reconstruir_estadisticas(conn)
+            conn.commit()
+            print("\n Estadísticas reconstruidas correctamente.")
+            return True
+    except sqlite3.DatabaseError as e:
+        print("Error de base de datos:", e)
+    return False
+
+# -----------------------------------------
+# Diagnóstico
+# Muestra el estado del pool, las sentencias con más tiempo acumulado, los controladores
+# y las últimas consultas lentas con su plan. Devuelve la instantánea de métricas.
+# -----------------------------------------
+def mostrar_diagnostico(limite: int = 10) -> dict:
+    metricas = instantanea_metricas(limite)
+    metricas["cache"] = cache = cache_lectura.estadisticas()
+    metricas["escrituras"] = escrituras = estado_escrituras()
+    pool = estado_pool()
+    print("\n--- Diagnóstico ---")
+    print(f"Pool: {pool['en_uso']} en uso, {pool['libres']} libres de {pool['tamano']} (perfil {pool['perfil']}, esperas: {pool['esperas']})")
+    print(f"Escrituras con base ocupada: {escrituras['reintentos']} reintentos, {escrituras['agotadas']} agotaron los {escrituras['reintentos_max']} reintentos")
+    print(f"Caché de lectura: {cache['entradas']} de {cache['capacidad']} entradas (TTL {cache['ttl_s']:g} s)")
+    for espacio, e in cache["espacios"].items():
+        tasa = f"{e['tasa_aciertos']:.1%}" if e["tasa_aciertos"] is not None else "-"
+        print(f" {espacio:<14} {e['aciertos']:>7} aciertos | {e['fallos']:>6} fallos | {tasa:>6} | {e['invalidaciones']} invalidaciones | {e['vencidas']} vencidas | {e['expulsadas']} expulsadas")
+    metricas["escritor"] = escritor = escritor_agrupado.estadisticas()
+    if escritor["lotes"]:
+        print(f"Escritor agrupado: {escritor['operaciones']} operaciones en {escritor['lotes']} lotes ({escritor['operaciones_por_lote']} por lote, "
+              f"p95 {escritor['tamano_lote']['p95']}) | commit p50 {escritor['commit_ms']['p50']} ms, p95 {escritor['commit_ms']['p95']} ms | "
+              f"latencia p95 {escritor['latencia_ms']['p95']} ms | {escritor['revertidas']} revertidas, {escritor['commits_fallidos']} commits fallidos")
+
+    print(f"\nSentencias con más tiempo acumulado ({metricas['sentencias_distintas']} distintas):")
+    if not metricas["sentencias"]:
+        print(" Sin consultas registradas.")
+    for s in metricas["sentencias"]:
+        p95 = f"{s['p95_ms']} ms" if s["p95_ms"] is not None else "> 1000 ms"
+        print(f" {s['total_ms']:>10.1f} ms total | {s['llamadas']:>6} llamadas | media {s['media_ms']:.3f} ms | p95 <= {p95} | {s['filas']} filas")
+        print(f"   {s['sql'][:120]}")
+
+    print("\nControladores:")
+    for nombre, c in metricas["controladores"].items():
+        print(f" {nombre:<38} {c['llamadas']:>6} llamadas | {c['consultas']:>6} consultas | {c['total_ms']:>10.1f} ms | {c['errores']} errores")
+
+    print(f"\nConsultas lentas (>= {metricas['umbral_lenta_ms']} ms):")
+    if not metricas["lentas"]:
+        print(" Ninguna.")
+    for lenta in metricas["lentas"][-limite:]:
+        print(f" {lenta['fecha']} {lenta['ms']} ms [{lenta['controlador'] or '-'}] {lenta['sql'][:100]}")
+        for paso in lenta["plan"]:
+            print(f"   plan: {paso}")
+    return metricas
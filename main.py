@@ -1,346 +1,597 @@
-# main.py
-# Trabajo Práctico N°3 - Programación Segura
-# Descripción general:
-# Programa principal que maneja el flujo de la aplicación de gestión de veterinaria.
-# Permite a los usuarios registrarse, iniciar sesión y acceder a un menú principal con opciones
-# para gestionar veterinarios, mascotas y reservas, utilizando funciones definidas en otros módulos.
-
-# Importación de módulos principales y funciones auxiliares
-# Cada módulo encapsula la lógica de una parte del sistema:
-# - sg_veterinaria: funciones CRUD de veterinarios y mascotas
-# - sg_funciones: utilidades generales, manejo de DB y autenticación
-# - controladores: capa intermedia de validación y conexión entre UI y lógica
-import sqlite3
-from sg_veterinaria import *
-from sg_funciones import *
-from controladores import *
-
-# ---------------------------------------------------------------------------------
-# Inicialización de la base de datos
-# Se crean las tablas en SQLite solo si no existen para garantizar la persistencia.
-# Esto permite ejecutar el programa sin pasos manuales previos de migración.
-# ---------------------------------------------------------------------------------
-crear_tabla_usuarios()       # Crear tabla usuarios si no existe
-crear_tablas_veterinaria()   # Crear tabla veterinarios si no existe
-crear_tabla_mascotas()       # Crear tabla mascotas si no existe
-crear_tabla_reservas()       # Crear tabla reservas si no existe
-
-# -----------------------------------------
-# Menú de Veterinarios
-# Permite registrar, listar, actualizar, eliminar y buscar veterinarios.
-# También incluye utilidades de conteo y filtros por nombre/especialidad.
-# -----------------------------------------
-def menu_veterinarios():
-    while True:
-        print("\n--- Veterinarios ---")
-        print("1.- Registrar nuevo")
-        print("2.- Listar")
-        print("3.- Actualizar")
-        print("4.- Eliminar")
-        print("5.- Buscar por nombre")
-        print("6.- Buscar por especialidad")
-        print("7.- Contar veterinarios")
-        print("8.- Volver\n")
-
-        opcion = input("Favor ingresar opción: ").strip().lower()
-
-        if opcion == '1':
-            # Entrada libre de texto. La especialidad es opcional.
-            nombre_veterinario = input("Nombre: ").strip()
-            especialidad_veterinario = input("Especialidad (opcional): ").strip() or None
-            registrar_nuevo_veterinario(nombre_veterinario, especialidad_veterinario)
-        elif opcion == '2':
-            listar_veterinarios()
-        elif opcion == '3':
-            # Se valida que el ID sea numérico antes de actualizar.
-            try:
-                id_veterinario = int(input("ID del veterinario: "))
-            except ValueError:
-                print("ID inválido."); continue
-            # Si el usuario presiona Enter, se conserva el valor anterior mediante None.
-            nuevo_nombre = input("Nuevo nombre (Enter mantiene): ").strip()
-            nueva_especialidad = input("Nueva especialidad (Enter mantiene): ").strip()
-            actualizar_veterinario(
-                id_veterinario,
-                nuevo_nombre if nuevo_nombre else None,
-                nueva_especialidad if nueva_especialidad else None
-            )
-        elif opcion == '4':
-            # Validación de ID numérico para eliminación.
-            try:
-                id_veterinario = int(input("ID del veterinario: "))
-            except ValueError:
-                print("ID inválido."); continue
-            eliminar_veterinario(id_veterinario)
-        elif opcion == '5':
-            texto_nombre = input("Nombre contiene (Vacío para mostrar todos): ").strip()
-            buscar_veterinarios_por_nombre(texto_nombre)
-        elif opcion == '6':
-            especialidad = input("Especialidad exacta: ").strip()
-            buscar_veterinarios_por_especialidad(especialidad)
-        elif opcion == '7':
-            contar_veterinarios()
-        elif opcion == '8':
-            break
-        else:
-            print("Favor ingresar una de las opciones válidas\n")
-
-# -----------------------------------------
-# Menú de Mascotas
-# Permite CRUD de mascotas y consultas por propietario o especie.
-# Incluye validación de tipos para edad, peso e IDs relacionados.
-# -----------------------------------------
-def menu_mascotas():
-    while True:
-        print("\n--- Mascotas ---")
-        print("1.- Registrar nueva")
-        print("2.- Listar")
-        print("3.- Actualizar")
-        print("4.- Eliminar")
-        print("5.- Buscar por responsable")
-        print("6.- Buscar por especie")
-        print("7.- Contar")
-        print("8.- Volver\n")
-        opcion = input("Favor ingresar opción: ").strip().lower()
-
-        if opcion == '1':
-            # Registro con validación de tipos básicos. Puede lanzar ValueError si no es numérico.
-            nombre = input("Nombre: ").strip()
-            especie = input("Especie: ").strip()
-            raza = input("Raza: ").strip()
-            edad = int(input("Edad (Ingresar Entero): ").strip())
-            peso = float(input("Peso (En KG / Ingresar Flotante): ").strip())
-            responsable = input("Responsable (Tutor): ").strip()
-            registrar_nueva_mascota(nombre, especie, raza, edad, peso, responsable)
-        elif opcion == '2':
-            listar_mascotas()
-        elif opcion == '3':
-            # Validación de ID de la mascota a actualizar.
-            try:
-                id_mascota = int(input("ID mascota: "))
-            except ValueError:
-                print("ID inválido."); continue
-            # Campos opcionales: Enter conserva valor previo (se envía None).
-            nombre = input("Nuevo nombre (Enter mantiene): ").strip()
-            especie = input("Nueva especie (Enter mantiene): ").strip()
-            raza = input("Nueva raza (Enter mantiene): ").strip()
-            edad_txt = input("Nueva edad (Enter mantiene): ").strip()
-            peso_txt = input("Nuevo peso (Enter mantiene): ").strip()
-            responsable_txt = input("Nuevo Responsable (Enter mantiene): ").strip()
-            actualizar_mascota(
-                id_mascota,
-                nombre or None,
-                especie or None,
-                raza or None,
-                int(edad_txt) if edad_txt else None,
-                float(peso_txt) if peso_txt else None,
-                int(responsable_txt) if responsable_txt else None
-            )
-        elif opcion == '4':
-            try:
-                id_mascota = int(input("ID mascota: "))
-            except ValueError:
-                print("ID inválido."); continue
-            eliminar_mascota(id_mascota)
-        elif opcion == '5':
-            responsable = input("Responsable: ")
-            buscar_mascotas_por_responsable(responsable)
-        elif opcion == '6':
-            especie = input("Especie: ").strip()
-            buscar_mascotas_por_especie(especie)
-        elif opcion == '7':
-            contar_mascotas()
-        elif opcion == '8':
-            break
-        else:
-            print("Favor ingresar una de las opciones válidas\n")
-
-# -----------------------------------------
-# Menú de Reservas
-# Gestiona creación, visualización, modificación y eliminación de reservas.
-# Valida IDs y permite actualizaciones parciales manteniendo valores previos con None.
-# -----------------------------------------
-def menu_reservas():
-    while True:
-        print("\n--- Reservas ---")
-        print("1.- Crear nueva reserva")
-        print("2.- Mostrar todas las reservas")
-        print("3.- Modificar una reserva")
-        print("4.- Eliminar una reserva")
-        print("5.- Volver\n")
-
-        opcion_menu = input("Elige una opción: ").strip().lower()
-
-        if opcion_menu == '1':
-            # Validación de IDs numéricos para relaciones foráneas.
-            try:
-                id_mascota = int(input("ID de la mascota: ").strip())
-                id_veterinario = int(input("ID del veterinario: ").strip())
-            except ValueError:
-                print("Algún ID no es numérico."); continue
-
-            # Formatos de fecha y hora esperados: YYYY-MM-DD y HH:MM:SS
-            fecha_reserva = input("Fecha (YYYY-MM-DD): ").strip()
-            hora_reserva = input("Hora (HH:MM:SS): ").strip()
-            motivo_reserva = input("Motivo de la reserva: ").strip()
-            estado_mascota = input("Estado de la mascota: ").strip()
-
-            crear_reserva(
-                id_mascota,
-                id_veterinario,
-                fecha_reserva,
-                hora_reserva,
-                motivo_reserva,
-                estado_mascota
-            )
-
-        elif opcion_menu == '2':
-            mostrar_reservas()
-
-        elif opcion_menu == '3':
-            # Se valida ID numérico de la reserva a modificar.
-            try:
-                id_reserva = int(input("ID de la reserva a modificar: ").strip())
-            except ValueError:
-                print("El ID de la reserva debe ser numérico."); continue
-
-            # Entradas opcionales: si el usuario presiona Enter se envía None para conservar.
-            texto_id_mascota = input("Nuevo ID de mascota (Enter mantiene): ").strip()
-            texto_id_veterinario = input("Nuevo ID de veterinario (Enter mantiene): ").strip()
-            nueva_fecha = input("Nueva fecha (YYYY-MM-DD, Enter mantiene): ").strip()
-            nueva_hora = input("Nueva hora (HH:MM:SS, Enter mantiene): ").strip()
-            nuevo_motivo = input("Nuevo motivo (Enter mantiene): ").strip()
-            nuevo_estado = input("Nuevo estado (Enter mantiene): ").strip()
-            nuevo_id_mascota = int(texto_id_mascota) if texto_id_mascota else None
-            nuevo_id_veterinario = int(texto_id_veterinario) if texto_id_veterinario else None
-
-            modificar_reserva(
-                id_reserva,
-                nuevo_id_mascota,
-                nuevo_id_veterinario,
-                nueva_fecha or None,
-                nueva_hora or None,
-                nuevo_motivo or None,
-                nuevo_estado or None
-            )
-
-        elif opcion_menu == '4':
-            try:
-                id_reserva = int(input("ID de la reserva a eliminar: ").strip())
-            except ValueError:
-                print("El ID de la reserva debe ser numérico."); continue
-            eliminar_reserva(id_reserva)
-
-        elif opcion_menu == '5':
-            break
-        else:
-            print("Opción no válida. Intenta nuevamente.")
-
-# -----------------------------------------
-# Menú de Reportes
-# Opción 1: muestra en pantalla el resumen general (conteos por entidad).
-# Opción 2: exporta el mismo resumen a un archivo .txt en la ruta indicada.
-# -----------------------------------------
-def menu_reportes():
-    while True:
-        print("\n--- Reportes ---")
-        print("1.- Resumen general en pantalla")
-        print("2.- Exportar resumen general a TXT")
-        print("3.- Volver\n")
-        opcion = input("Favor ingresar opción: ").strip().lower()
-
-        if opcion == '1':
-            # Muestra métricas generales útiles para entrega y verificación rápida.
-            reporte_resumen_general()
-        elif opcion == '2':
-            # Exporta el reporte a texto plano. Si se deja vacío, usa un nombre por defecto.
-            ruta_archivo = input("Ruta del archivo (Enter por defecto): ").strip() or "reporte_resumen_general.txt"
-            exportar_resumen_general_txt(ruta_archivo)
-        elif opcion == '3':
-            break
-        else:
-            print("Favor ingresar una de las opciones válidas\n")
-
-# -----------------------------------------
-# Menú principal
-# Dirige a los submódulos del sistema tras la autenticación.
-# Mantiene un bucle hasta que el usuario decide salir.
-# -----------------------------------------
-def menu_principal(nombre_usuario): # Menú principal después de iniciar sesión
-    print(f"\nBienvenido Usuario {nombre_usuario}.")
-    while True:
-        print("\n--- Sistema de Gestión de Veterinaria ---")
-        print("1.- Veterinarios")
-        print("2.- Mascotas")
-        print("3.- Reservas")
-        print("4.- Reportes")
-        print("5.- Salir\n")
-         # Sistema de primer nivel de menú
-        opcion = input("Favor ingresar opción: ").strip().lower() # input de la opción del menú
-        print("")
-
-        if opcion == '1':
-            menu_veterinarios()
-        elif opcion == '2':
-            menu_mascotas()
-        elif opcion == '3':
-            menu_reservas()
-        elif opcion == '4':
-            menu_reportes()
-        elif opcion == '5':
-            print("Que tenga buen día <3.")
-            break
-        else:
-            print("Favor ingresar una de las opciones válidas\n") # Mensaje de error para opción inválida
-
-# -----------------------------------------
-# Menú de Login y Registro
-# - 'Ingresar' valida credenciales y abre el menú principal.
-# - 'Registrar' crea un usuario nuevo si los campos no están vacíos.
-# Las funciones de verificación/registro delegan seguridad a sg_funciones/controladores.
-# -----------------------------------------
-def menu_login(): # Menú de login y registro
-    while True: # Bucle infinito para el menú de login
-        print("\n--- Inicio de Sesión Sistema de Gestión de Veterinaria ---")
-        print("1.- Ingresar")
-        print("2.- Registrar")
-        print("3.- Salir\n")
-
-        opcion = input("Favor ingresar opción: ").lower().strip() # input de la opción del menú
-        print("")
-
-        if opcion == '1': # Opción de ingresar
-            username = input("Favor ingresar usuario: ").strip()
-            password = input("Favor ingresar contraseña: ").strip()
-            if username == '' or password == '':
-                print("\nFavor ingresar valor distinto a vacío.")
-            else:
-                # verificar_login devuelve True/False según credenciales válidas
-                login = verificar_login(username, password)
-                if login:
-                    menu_principal(username)
-                else:
-                    print("\nUsuario o password incorrecto.")
-        elif opcion == '2': # Opción de registrar
-            username = input("Favor ingresar usuario: ").strip()
-            email = input("Favor ingresar email: ").strip()
-            password = input("Favor ingresar contraseña: ").strip()
-            rol = input("Favor ingresar rol: ").strip()
-            if username == '' or email == '' or password == '' or rol == '':
-                print("\nFavor ingresar valor distinto a vacío.")
-            else:
-                # registrar_login se encarga de aplicar hashing/validaciones en capa inferior
-                registrar_login(username, email, password, rol)
-        elif opcion == '3':
-            print("Que tenga buen día <3.") # Mensaje del equipo
-            break # Salir del programa
-        else:
-            print("Favor ingresar una de las opciones válidas\n")
-
-# ---------------------------------------------------------------------------------
-# Punto de entrada del programa
-# Inicia la aplicación mostrando el menú de login.
-# Este bloque permite que el archivo sea importable sin ejecutar la UI.
-# ---------------------------------------------------------------------------------
-if __name__ == "__main__": # Punto de entrada del programa
-    menu_login() # Llamar al menú de login
+# main.py
+# Trabajo Práctico N°3 - Programación Segura
+# Descripción general:
+# Programa principal que maneja el flujo de la aplicación de gestión de veterinaria.
+# Permite a los usuarios registrarse, iniciar sesión y acceder a un menú principal con opciones
+# para gestionar veterinarios, mascotas, sus responsables y reservas, utilizando funciones definidas en otros módulos.
+
+# Importación de módulos principales y funciones auxiliares
+# Cada módulo encapsula la lógica de una parte del sistema:
+# - sg_veterinaria: funciones CRUD de veterinarios y mascotas
+# - sg_funciones: utilidades generales, manejo de DB y autenticación
+# - controladores: capa intermedia de validación y conexión entre UI y lógica
+import sqlite3
+from typing import Optional
+from sg_veterinaria import *
+from sg_funciones import *
+from controladores import *
+from sg_modelos import Mascota, Responsable, Veterinario, Reserva
+from sg_reportes import lineas_resumen_general, TITULO_RESUMEN_GENERAL
+from sg_migraciones import aplicar_migraciones
+from sg_sesiones import iniciar_sesion, validar_sesion, cerrar_sesion
+
+# ---------------------------------------------------------------------------------
+# Inicialización de la base de datos
+# Se aplican las migraciones pendientes (tablas, índices y cambios de esquema posteriores).
+# Cada migración se registra en schema_version, así que arrancar varias veces es seguro.
+# Esto permite ejecutar el programa sin pasos manuales previos de migración.
+# ---------------------------------------------------------------------------------
+aplicar_migraciones()
+
+# -----------------------------------------
+# Presentación de registros
+# Los controladores devuelven registros (sg_modelos); el formato de pantalla se decide aquí.
+# -----------------------------------------
+def formato_mascota(m: Mascota) -> str:
+    return f"ID: {m.idMascota}, Nombre: {m.nombre}, Especie: {m.especie}, Raza: {m.raza}, Edad: {m.edad}, Peso: {m.peso}, ID Responsable: {m.idResponsable}"
+
+def formato_responsable(r: Responsable) -> str:
+    return f"ID: {r.idResponsable}, Nombre: {r.nombre}, Teléfono: {r.telefono}, Email: {r.email}"
+
+def formato_veterinario(v: Veterinario) -> str:
+    return f"ID: {v.idVeterinario}, Nombre: {v.nombre}, Especialidad: {v.especialidad}"
+
+def formato_reserva(r: Reserva) -> str:
+    return (f"ID Reserva: {r.idReserva}, ID Mascota: {r.idMascota}, ID Veterinario: {r.idVeterinario}, "
+            f"Fecha: {r.fecha}, Hora: {r.hora}, Motivo: {r.motivo}, Estado Mascota: {r.estadoMascota}")
+
+# -----------------------------------------
+# Paginación en menús
+# Muestra la primera página y, mientras haya más resultados, ofrece pasar a la siguiente.
+# Las funciones de listado reciben el cursor como despues_de y devuelven una Pagina
+# (None si falló la consulta; el controlador ya informó el error).
+# -----------------------------------------
+def mostrar_paginado(listar, *args, titulo: str, vacio: str, formato):
+    pagina = listar(*args)
+    while pagina is not None:
+        if not pagina.elementos:
+            print(f"\n {vacio}")
+            break
+        if getattr(pagina, "aproximada", False): # Búsqueda de texto sin coincidencias exactas
+            titulo = f"{titulo} (sin coincidencias exactas, resultados parecidos)"
+        print(f"\n {titulo}:")
+        print("-" * 80)
+        for registro in pagina:
+            print(formato(registro))
+        print("-" * 80)
+        if pagina.siguiente is None:
+            break
+        if input("\n's' para siguiente página, Enter para volver: ").strip().lower() != 's':
+            break
+        pagina = listar(*args, despues_de=pagina.siguiente)
+
+# -----------------------------------------
+# Lista de IDs para operaciones por lote
+# Acepta IDs separados por comas y rangos: "3, 7, 10-12". Devuelve None si algún valor no es válido.
+# -----------------------------------------
+def leer_ids(mensaje: str) -> Optional[list]:
+    ids = []
+    for parte in input(mensaje).replace(" ", "").split(","):
+        if not parte:
+            continue
+        desde, _, hasta = parte.partition("-")
+        if not desde.isdigit() or (hasta and not hasta.isdigit()):
+            print(f"'{parte}' no es un ID ni un rango válido.")
+            return None
+        ids.extend(range(int(desde), int(hasta or desde) + 1))
+    return ids
+
+# -----------------------------------------
+# Menú de Veterinarios
+# Permite registrar, listar, actualizar, eliminar y buscar veterinarios.
+# También incluye utilidades de conteo, filtros por nombre/especialidad y búsqueda libre.
+# -----------------------------------------
+def menu_veterinarios():
+    while True:
+        print("\n--- Veterinarios ---")
+        print("1.- Registrar nuevo")
+        print("2.- Listar")
+        print("3.- Actualizar")
+        print("4.- Eliminar")
+        print("5.- Buscar por nombre")
+        print("6.- Buscar por especialidad")
+        print("7.- Contar veterinarios")
+        print("8.- Búsqueda libre (nombre o especialidad)")
+        print("9.- Volver\n")
+
+        opcion = input("Favor ingresar opción: ").strip().lower()
+
+        if opcion == '1':
+            # Entrada libre de texto. La especialidad es opcional.
+            nombre_veterinario = input("Nombre: ").strip()
+            especialidad_veterinario = input("Especialidad (opcional): ").strip() or None
+            registrar_nuevo_veterinario(nombre_veterinario, especialidad_veterinario)
+        elif opcion == '2':
+            mostrar_paginado(listar_veterinarios, titulo="Lista de Veterinarios", vacio="No hay veterinarios registrados.",
+                             formato=formato_veterinario)
+        elif opcion == '3':
+            # Se valida que el ID sea numérico antes de actualizar.
+            try:
+                id_veterinario = int(input("ID del veterinario: "))
+            except ValueError:
+                print("ID inválido."); continue
+            # Si el usuario presiona Enter, se conserva el valor anterior mediante None.
+            nuevo_nombre = input("Nuevo nombre (Enter mantiene): ").strip()
+            nueva_especialidad = input("Nueva especialidad (Enter mantiene): ").strip()
+            actualizar_veterinario(
+                id_veterinario,
+                nuevo_nombre if nuevo_nombre else None,
+                nueva_especialidad if nueva_especialidad else None
+            )
+        elif opcion == '4':
+            # Validación de ID numérico para eliminación.
+            try:
+                id_veterinario = int(input("ID del veterinario: "))
+            except ValueError:
+                print("ID inválido."); continue
+            eliminar_veterinario(id_veterinario)
+        elif opcion == '5':
+            texto_nombre = input("Nombre contiene (Vacío para mostrar todos): ").strip()
+            mostrar_paginado(buscar_veterinarios_por_nombre, texto_nombre, titulo=f"Búsqueda por nombre contiene '{texto_nombre}'",
+                             vacio=f"No hay veterinarios que coincidan con '{texto_nombre}'.", formato=formato_veterinario)
+        elif opcion == '6':
+            especialidad = input("Especialidad exacta: ").strip()
+            mostrar_paginado(buscar_veterinarios_por_especialidad, especialidad, titulo=f"Veterinarios con especialidad '{especialidad}'",
+                             vacio=f"No hay veterinarios con especialidad '{especialidad}'.", formato=formato_veterinario)
+        elif opcion == '7':
+            total = contar_veterinarios()
+            if total is not None:
+                print(f"\n Total de veterinarios registrados: {total}")
+        elif opcion == '8':
+            texto = input("Buscar: ").strip()
+            mostrar_paginado(buscar_veterinarios, texto, titulo=f"Veterinarios que coinciden con '{texto}'",
+                             vacio=f"No hay veterinarios que coincidan con '{texto}'.", formato=formato_veterinario)
+        elif opcion == '9':
+            break
+        else:
+            print("Favor ingresar una de las opciones válidas\n")
+
+# -----------------------------------------
+# Menú de Mascotas
+# Permite CRUD de mascotas y consultas por propietario o especie.
+# Incluye validación de tipos para edad, peso e IDs relacionados.
+# -----------------------------------------
+def menu_mascotas():
+    while True:
+        print("\n--- Mascotas ---")
+        print("1.- Registrar nueva")
+        print("2.- Listar")
+        print("3.- Actualizar")
+        print("4.- Eliminar")
+        print("5.- Buscar por responsable (ID)")
+        print("6.- Buscar por especie")
+        print("7.- Contar")
+        print("8.- Búsqueda libre (nombre, especie o raza)")
+        print("9.- Eliminar varias")
+        print("10.- Volver\n")
+        opcion = input("Favor ingresar opción: ").strip().lower()
+
+        if opcion == '1':
+            # Registro con validación de tipos básicos. Puede lanzar ValueError si no es numérico.
+            nombre = input("Nombre: ").strip()
+            especie = input("Especie: ").strip()
+            raza = input("Raza: ").strip()
+            edad = int(input("Edad (Ingresar Entero): ").strip())
+            peso = float(input("Peso (En KG / Ingresar Flotante): ").strip())
+            responsable_txt = input("ID del responsable (Enter si no tiene): ").strip()
+            if responsable_txt and not responsable_txt.isdigit():
+                print("El ID del responsable debe ser numérico."); continue
+            registrar_nueva_mascota(nombre, especie, raza, edad, peso, int(responsable_txt) if responsable_txt else None)
+        elif opcion == '2':
+            mostrar_paginado(listar_mascotas, titulo="Lista de Mascotas", vacio="No hay mascotas registradas.", formato=formato_mascota)
+        elif opcion == '3':
+            # Validación de ID de la mascota a actualizar.
+            try:
+                id_mascota = int(input("ID mascota: "))
+            except ValueError:
+                print("ID inválido."); continue
+            # Campos opcionales: Enter conserva valor previo (se envía None).
+            nombre = input("Nuevo nombre (Enter mantiene): ").strip()
+            especie = input("Nueva especie (Enter mantiene): ").strip()
+            raza = input("Nueva raza (Enter mantiene): ").strip()
+            edad_txt = input("Nueva edad (Enter mantiene): ").strip()
+            peso_txt = input("Nuevo peso (Enter mantiene): ").strip()
+            responsable_txt = input("Nuevo ID de responsable (Enter mantiene): ").strip()
+            if responsable_txt and not responsable_txt.isdigit():
+                print("El ID del responsable debe ser numérico."); continue
+            actualizar_mascota(
+                id_mascota,
+                nombre or None,
+                especie or None,
+                raza or None,
+                int(edad_txt) if edad_txt else None,
+                float(peso_txt) if peso_txt else None,
+                int(responsable_txt) if responsable_txt else None
+            )
+        elif opcion == '4':
+            try:
+                id_mascota = int(input("ID mascota: "))
+            except ValueError:
+                print("ID inválido."); continue
+            eliminar_mascota(id_mascota)
+        elif opcion == '5':
+            try:
+                id_responsable = int(input("ID del responsable: ").strip())
+            except ValueError:
+                print("ID inválido."); continue
+            mostrar_paginado(buscar_mascotas_por_responsable, id_responsable, titulo=f"Mascotas del responsable {id_responsable}",
+                             vacio=f"No hay mascotas registradas para el responsable {id_responsable}.", formato=formato_mascota)
+        elif opcion == '6':
+            especie = input("Especie: ").strip()
+            mostrar_paginado(buscar_mascotas_por_especie, especie, titulo=f"Mascotas de la Especie '{especie}'",
+                             vacio=f"No hay mascotas registradas de la especie '{especie}'.", formato=formato_mascota)
+        elif opcion == '7':
+            total = contar_mascotas()
+            if total is not None:
+                print(f"\n Total de mascotas registradas: {total}")
+        elif opcion == '8':
+            texto = input("Buscar: ").strip()
+            mostrar_paginado(buscar_mascotas, texto, titulo=f"Mascotas que coinciden con '{texto}'",
+                             vacio=f"No hay mascotas que coincidan con '{texto}'.", formato=formato_mascota)
+        elif opcion == '9':
+            ids = leer_ids("IDs de las mascotas (ej: 3, 7, 10-12): ")
+            if ids and input(f"¿Eliminar {len(ids)} mascotas? (s/n): ").strip().lower() == 's':
+                eliminar_mascotas(ids)
+        elif opcion == '10':
+            break
+        else:
+            print("Favor ingresar una de las opciones válidas\n")
+
+# -----------------------------------------
+# Menú de Responsables
+# Dueños de las mascotas: alta, edición, baja (solo sin mascotas), búsqueda libre,
+# y sus mascotas o las reservas de todas ellas.
+# -----------------------------------------
+def menu_responsables():
+    while True:
+        print("\n--- Responsables ---")
+        print("1.- Registrar nuevo")
+        print("2.- Listar")
+        print("3.- Actualizar")
+        print("4.- Eliminar")
+        print("5.- Buscar (nombre, teléfono o email)")
+        print("6.- Ver sus mascotas")
+        print("7.- Ver las reservas de sus mascotas")
+        print("8.- Volver\n")
+        opcion = input("Favor ingresar opción: ").strip().lower()
+
+        if opcion == '1':
+            nombre = input("Nombre: ").strip()
+            telefono = input("Teléfono (Enter si no tiene): ").strip()
+            email = input("Email (Enter si no tiene): ").strip()
+            if not nombre:
+                print("El nombre es obligatorio."); continue
+            registrar_nuevo_responsable(nombre, telefono or None, email or None)
+        elif opcion == '2':
+            mostrar_paginado(listar_responsables, titulo="Lista de Responsables", vacio="No hay responsables registrados.", formato=formato_responsable)
+        elif opcion in ('3', '4', '6', '7'):
+            try:
+                id_responsable = int(input("ID del responsable: ").strip())
+            except ValueError:
+                print("ID inválido."); continue
+            if opcion == '3':
+                # Campos opcionales: Enter conserva valor previo (se envía None).
+                nombre = input("Nuevo nombre (Enter mantiene): ").strip()
+                telefono = input("Nuevo teléfono (Enter mantiene): ").strip()
+                email = input("Nuevo email (Enter mantiene): ").strip()
+                actualizar_responsable(id_responsable, nombre or None, telefono or None, email or None)
+            elif opcion == '4':
+                eliminar_responsable(id_responsable)
+            elif opcion == '6':
+                mostrar_paginado(buscar_mascotas_por_responsable, id_responsable, titulo=f"Mascotas del responsable {id_responsable}",
+                                 vacio=f"No hay mascotas registradas para el responsable {id_responsable}.", formato=formato_mascota)
+            else:
+                mostrar_paginado(buscar_reservas_por_responsable, id_responsable, titulo=f"Reservas de las mascotas del responsable {id_responsable}",
+                                 vacio=f"No hay reservas para las mascotas del responsable {id_responsable}.", formato=formato_reserva)
+        elif opcion == '5':
+            texto = input("Buscar: ").strip()
+            mostrar_paginado(buscar_responsables, texto, titulo=f"Responsables que coinciden con '{texto}'",
+                             vacio=f"No hay responsables que coincidan con '{texto}'.", formato=formato_responsable)
+        elif opcion == '8':
+            break
+        else:
+            print("Favor ingresar una de las opciones válidas\n")
+
+# -----------------------------------------
+# Menú de Reservas
+# Gestiona creación, visualización, modificación y eliminación de reservas.
+# Valida IDs y permite actualizaciones parciales manteniendo valores previos con None.
+# -----------------------------------------
+def menu_reservas():
+    while True:
+        print("\n--- Reservas ---")
+        print("1.- Crear nueva reserva")
+        print("2.- Mostrar todas las reservas")
+        print("3.- Modificar una reserva")
+        print("4.- Eliminar una reserva")
+        print("5.- Buscar horarios disponibles")
+        print("6.- Buscar por motivo")
+        print("7.- Eliminar varias reservas")
+        print("8.- Cancelar la agenda de un veterinario")
+        print("9.- Reprogramar un día de un veterinario")
+        print("10.- Cambiar motivo o estado de varias reservas")
+        print("11.- Volver\n")
+
+        opcion_menu = input("Elige una opción: ").strip().lower()
+
+        if opcion_menu == '1':
+            # Validación de IDs numéricos para relaciones foráneas.
+            try:
+                id_mascota = int(input("ID de la mascota: ").strip())
+                id_veterinario = int(input("ID del veterinario: ").strip())
+            except ValueError:
+                print("Algún ID no es numérico."); continue
+
+            # Formatos de fecha y hora esperados: YYYY-MM-DD y HH:MM:SS
+            fecha_reserva = input("Fecha (YYYY-MM-DD): ").strip()
+            hora_reserva = input("Hora (HH:MM:SS): ").strip()
+            motivo_reserva = input("Motivo de la reserva: ").strip()
+            estado_mascota = input("Estado de la mascota: ").strip()
+
+            crear_reserva(
+                id_mascota,
+                id_veterinario,
+                fecha_reserva,
+                hora_reserva,
+                motivo_reserva,
+                estado_mascota
+            )
+
+        elif opcion_menu == '2':
+            mostrar_paginado(mostrar_reservas, titulo="Listado de Reservas", vacio="No hay reservas registradas.", formato=formato_reserva)
+
+        elif opcion_menu == '3':
+            # Se valida ID numérico de la reserva a modificar.
+            try:
+                id_reserva = int(input("ID de la reserva a modificar: ").strip())
+            except ValueError:
+                print("El ID de la reserva debe ser numérico."); continue
+
+            # Entradas opcionales: si el usuario presiona Enter se envía None para conservar.
+            texto_id_mascota = input("Nuevo ID de mascota (Enter mantiene): ").strip()
+            texto_id_veterinario = input("Nuevo ID de veterinario (Enter mantiene): ").strip()
+            nueva_fecha = input("Nueva fecha (YYYY-MM-DD, Enter mantiene): ").strip()
+            nueva_hora = input("Nueva hora (HH:MM:SS, Enter mantiene): ").strip()
+            nuevo_motivo = input("Nuevo motivo (Enter mantiene): ").strip()
+            nuevo_estado = input("Nuevo estado (Enter mantiene): ").strip()
+            nuevo_id_mascota = int(texto_id_mascota) if texto_id_mascota else None
+            nuevo_id_veterinario = int(texto_id_veterinario) if texto_id_veterinario else None
+
+            modificar_reserva(
+                id_reserva,
+                nuevo_id_mascota,
+                nuevo_id_veterinario,
+                nueva_fecha or None,
+                nueva_hora or None,
+                nuevo_motivo or None,
+                nuevo_estado or None
+            )
+
+        elif opcion_menu == '4':
+            try:
+                id_reserva = int(input("ID de la reserva a eliminar: ").strip())
+            except ValueError:
+                print("El ID de la reserva debe ser numérico."); continue
+            eliminar_reserva(id_reserva)
+
+        elif opcion_menu == '5':
+            # Especialidad vacía busca entre todos los veterinarios
+            especialidad = input("Especialidad (Enter para todas): ").strip()
+            fecha_desde = input("Desde (YYYY-MM-DD): ").strip()
+            fecha_hasta = input("Hasta (YYYY-MM-DD): ").strip()
+            try:
+                texto_duracion = input(f"Duración en minutos (Enter = {DURACION_CITA_MINUTOS}): ").strip()
+                duracion = int(texto_duracion) if texto_duracion else DURACION_CITA_MINUTOS
+                texto_cantidad = input("Cantidad de horarios (Enter = 5): ").strip()
+                cantidad = int(texto_cantidad) if texto_cantidad else 5
+            except ValueError:
+                print("Duración y cantidad deben ser numéricas."); continue
+            horarios = buscar_horarios_disponibles(especialidad or None, fecha_desde, fecha_hasta, duracion, cantidad)
+            if horarios is None:
+                continue
+            if not horarios:
+                print("\n No hay horarios disponibles en ese rango.")
+                continue
+            print("\n--- Horarios Disponibles ---")
+            for h in horarios:
+                print(f"Fecha: {h.fecha}, Hora: {h.hora}, ID Veterinario: {h.idVeterinario}, Veterinario: {h.veterinario}")
+
+        elif opcion_menu == '6':
+            texto = input("Motivo contiene las palabras: ").strip()
+            mostrar_paginado(buscar_reservas_por_motivo, texto, titulo=f"Reservas con motivo '{texto}'",
+                             vacio=f"No hay reservas con motivo '{texto}'.", formato=formato_reserva)
+
+        # Operaciones por lote: una sola transacción, con el resultado de cada reserva
+        elif opcion_menu == '7':
+            ids = leer_ids("IDs de las reservas (ej: 3, 7, 10-12): ")
+            if ids and input(f"¿Eliminar {len(ids)} reservas? (s/n): ").strip().lower() == 's':
+                eliminar_reservas(ids)
+
+        elif opcion_menu == '8':
+            try:
+                id_veterinario = int(input("ID del veterinario: ").strip())
+            except ValueError:
+                print("El ID del veterinario debe ser numérico."); continue
+            fecha_desde = input("Desde (YYYY-MM-DD): ").strip()
+            fecha_hasta = input("Hasta (YYYY-MM-DD, Enter = mismo día): ").strip() or fecha_desde
+            if input("¿Cancelar todas sus reservas en ese rango? (s/n): ").strip().lower() == 's':
+                cancelar_reservas_veterinario(id_veterinario, fecha_desde, fecha_hasta)
+
+        elif opcion_menu == '9':
+            try:
+                id_veterinario = int(input("ID del veterinario: ").strip())
+                fecha = input("Fecha a reprogramar (YYYY-MM-DD): ").strip()
+                nueva_fecha = input("Nueva fecha (YYYY-MM-DD, Enter mantiene): ").strip()
+                texto_id_veterinario = input("Nuevo ID de veterinario (Enter mantiene): ").strip()
+                nuevo_id_veterinario = int(texto_id_veterinario) if texto_id_veterinario else None
+            except ValueError:
+                print("El ID del veterinario debe ser numérico."); continue
+            reprogramar_reservas(id_veterinario, fecha, nueva_fecha or None, nuevo_id_veterinario)
+
+        elif opcion_menu == '10':
+            ids = leer_ids("IDs de las reservas (ej: 3, 7, 10-12): ")
+            if not ids:
+                continue
+            nuevo_motivo = input("Nuevo motivo (Enter mantiene): ").strip()
+            nuevo_estado = input("Nuevo estado (Enter mantiene): ").strip()
+            actualizar_reservas(ids, nuevo_motivo or None, nuevo_estado or None)
+
+        elif opcion_menu == '11':
+            break
+        else:
+            print("Opción no válida. Intenta nuevamente.")
+
+# -----------------------------------------
+# Menú de Reportes
+# Opción 1: muestra en pantalla el resumen general (conteos por entidad).
+# Opción 2: exporta el mismo resumen a un archivo .txt en la ruta indicada.
+# Opción 3: exporta una tabla (o el detalle de reservas) a CSV o JSON Lines, con compresión opcional.
+# Opción 4: verifica los contadores estadísticos contra las tablas y permite reconstruirlos.
+# Opción 5: muestra el diagnóstico de consultas, controladores y consultas lentas desde el arranque.
+# -----------------------------------------
+def menu_reportes():
+    while True:
+        print("\n--- Reportes ---")
+        print("1.- Resumen general en pantalla")
+        print("2.- Exportar resumen general a TXT")
+        print("3.- Exportar datos (CSV / JSON Lines)")
+        print("4.- Verificar estadísticas")
+        print("5.- Diagnóstico")
+        print("6.- Volver\n")
+        opcion = input("Favor ingresar opción: ").strip().lower()
+
+        if opcion == '1':
+            # Muestra métricas generales útiles para entrega y verificación rápida.
+            resumen = reporte_resumen_general()
+            if resumen is not None:
+                print("\n" + TITULO_RESUMEN_GENERAL)
+                for linea in lineas_resumen_general(resumen):
+                    print(linea)
+        elif opcion == '2':
+            # Exporta el reporte a texto plano. Si se deja vacío, usa un nombre por defecto.
+            ruta_archivo = input("Ruta del archivo (Enter por defecto): ").strip() or "reporte_resumen_general.txt"
+            exportar_resumen_general_txt(ruta_archivo)
+        elif opcion == '3':
+            # La extensión define formato y compresión: .csv, .jsonl, .csv.gz, .jsonl.zst, ...
+            fuente = input("Fuente (mascotas, responsables, veterinarios, reservas, reservas_detalle): ").strip().lower()
+            ruta_archivo = input("Ruta del archivo (Enter = <fuente>.csv): ").strip() or f"{fuente}.csv"
+            fecha_desde = fecha_hasta = None
+            if fuente.startswith("reservas"):
+                fecha_desde = input("Desde (YYYY-MM-DD, Enter sin límite): ").strip() or None
+                fecha_hasta = input("Hasta (YYYY-MM-DD, Enter sin límite): ").strip() or None
+            exportar_datos(fuente, ruta_archivo, fecha_desde, fecha_hasta)
+        elif opcion == '4':
+            # Recorre las tablas completas: puede tardar en bases grandes.
+            if not verificar_contadores_estadisticos():
+                if input("¿Reconstruir estadísticas? (s/n): ").strip().lower() == 's':
+                    reconstruir_contadores_estadisticos()
+        elif opcion == '5':
+            # Métricas acumuladas desde el arranque: consultas, controladores y consultas lentas.
+            mostrar_diagnostico()
+        elif opcion == '6':
+            break
+        else:
+            print("Favor ingresar una de las opciones válidas\n")
+
+# -----------------------------------------
+# Menú principal
+# Dirige a los submódulos del sistema tras la autenticación.
+# Mantiene un bucle hasta que el usuario decide salir o la sesión expira.
+# La sesión se valida con el token (HMAC) en cada vuelta, sin repetir el scrypt del login.
+# -----------------------------------------
+def menu_principal(nombre_usuario, token=None): # Menú principal después de iniciar sesión
+    print(f"\nBienvenido Usuario {nombre_usuario}.")
+    while True:
+        if token is not None and validar_sesion(token) is None:
+            print("\nLa sesión expiró. Favor ingresar nuevamente.")
+            break
+        print("\n--- Sistema de Gestión de Veterinaria ---")
+        print("1.- Veterinarios")
+        print("2.- Mascotas")
+        print("3.- Responsables")
+        print("4.- Reservas")
+        print("5.- Reportes")
+        print("6.- Salir\n")
+         # Sistema de primer nivel de menú
+        opcion = input("Favor ingresar opción: ").strip().lower() # input de la opción del menú
+        print("")
+
+        if opcion == '1':
+            menu_veterinarios()
+        elif opcion == '2':
+            menu_mascotas()
+        elif opcion == '3':
+            menu_responsables()
+        elif opcion == '4':
+            menu_reservas()
+        elif opcion == '5':
+            menu_reportes()
+        elif opcion == '6':
+            if token is not None:
+                cerrar_sesion(token)
+            print("Que tenga buen día <3.")
+            break
+        else:
+            print("Favor ingresar una de las opciones válidas\n") # Mensaje de error para opción inválida
+
+# -----------------------------------------
+# Menú de Login y Registro
+# - 'Ingresar' valida credenciales y abre el menú principal.
+# - 'Registrar' crea un usuario nuevo si los campos no están vacíos.
+# Las funciones de verificación/registro delegan seguridad a sg_funciones/controladores.
+# -----------------------------------------
+def menu_login(): # Menú de login y registro
+    while True: # Bucle infinito para el menú de login
+        print("\n--- Inicio de Sesión Sistema de Gestión de Veterinaria ---")
+        print("1.- Ingresar")
+        print("2.- Registrar")
+        print("3.- Salir\n")
+
+        opcion = input("Favor ingresar opción: ").lower().strip() # input de la opción del menú
+        print("")
+
+        if opcion == '1': # Opción de ingresar
+            username = input("Favor ingresar usuario: ").strip()
+            password = input("Favor ingresar contraseña: ").strip()
+            if username == '' or password == '':
+                print("\nFavor ingresar valor distinto a vacío.")
+            else:
+                # iniciar_sesion verifica las credenciales y devuelve un token firmado (o None)
+                token = iniciar_sesion(username, password)
+                if token:
+                    menu_principal(username, token)
+                else:
+                    print("\nUsuario o password incorrecto.")
+        elif opcion == '2': # Opción de registrar
+            username = input("Favor ingresar usuario: ").strip()
+            email = input("Favor ingresar email: ").strip()
+            password = input("Favor ingresar contraseña: ").strip()
+            rol = input("Favor ingresar rol: ").strip()
+            if username == '' or email == '' or password == '' or rol == '':
+                print("\nFavor ingresar valor distinto a vacío.")
+            else:
+                # registrar_login se encarga de aplicar hashing/validaciones en capa inferior
+                registrar_login(username, email, password, rol)
+        elif opcion == '3':
+            print("Que tenga buen día <3.") # Mensaje del equipo
+            break # Salir del programa
+        else:
+            print("Favor ingresar una de las opciones válidas\n")
+
+# ---------------------------------------------------------------------------------
+# Punto de entrada del programa
+# Inicia la aplicación mostrando el menú de login.
+# Este bloque permite que el archivo sea importable sin ejecutar la UI.
+# ---------------------------------------------------------------------------------
+if __name__ == "__main__": # Punto de entrada del programa
+    menu_login() # Llamar al menú de login
@@ -0,0 +1,123 @@
+# sg_agenda.py - Motor de agenda: detección de choques entre reservas de un mismo veterinario.
+# Descripción: Cada reserva es un intervalo [hora, hora + DURACION_CITA_MINUTOS) dentro de su fecha.
+# Dos citas del mismo veterinario chocan si sus inicios están a menos de una duración de distancia.
+# - En memoria: IndiceAgenda guarda, por (veterinario, fecha), los inicios ordenados y responde
+#   choques y horarios alternativos con búsqueda binaria (O(log n)).
+# - En SQL: buscar_conflicto() consulta el rango de horas sobre el índice (idVeterinario, fecha, hora);
+#   es la verificación autoritativa y se ejecuta dentro de la transacción de escritura.
+# Requiere: sg_veterinaria.py
+import bisect, datetime, os, sqlite3, threading
+from collections import OrderedDict
+from typing import Optional
+from sg_veterinaria import iterar_consulta, version_datos
+
+DURACION_CITA_MINUTOS = int(os.environ.get("SG_DURACION_CITA", "30")) # Duración de cada cita
+HORA_APERTURA = "09:00:00" # Inicio de la jornada para sugerir horarios
+HORA_CIERRE = "18:00:00" # Fin de la jornada (la última cita debe terminar antes)
+DIAS_EN_CACHE = 1024 # Agendas (veterinario, fecha) que se mantienen en memoria
+
+# -----------------------------------------
+# Normalización de fecha y hora
+# Se guardan como 'YYYY-MM-DD' y 'HH:MM:SS' para que el orden de texto coincida con el temporal.
+# Lanzan ValueError si el formato no es válido.
+# -----------------------------------------
+def normalizar_fecha(fecha: str) -> str:
+    return datetime.date.fromisoformat(fecha.strip()).isoformat()
+
+def normalizar_hora(hora: str) -> str:
+    return datetime.time.fromisoformat(hora.strip()).strftime("%H:%M:%S")
+
+def a_minutos(hora: str) -> int:
+    t = datetime.time.fromisoformat(hora.strip())
+    return t.hour * 60 + t.minute
+
+def desde_minutos(minutos: int) -> str:
+    return f"{minutos // 60:02d}:{minutos % 60:02d}:00"
+
+# -----------------------------------------
+# Conflicto en SQL
+# Devuelve (idReserva, hora) de una cita del veterinario que se superpone con la indicada, o None.
+# Usa el rango abierto (hora - duración, hora + duración) sobre el índice compuesto.
+# -----------------------------------------
+def buscar_conflicto(conn: sqlite3.Connection, idVeterinario: int, fecha: str, hora: str,
+    excluir_reserva: Optional[int] = None, duracion: int = DURACION_CITA_MINUTOS) -> Optional[tuple]:
+    inicio = a_minutos(hora)
+    desde = desde_minutos(inicio - duracion) if inicio - duracion >= 0 else ""
+    hasta = desde_minutos(inicio + duracion)
+    return conn.execute(
+        """SELECT idReserva, hora FROM reservas
+           WHERE idVeterinario = ? AND fecha = ? AND hora > ? AND hora < ? AND idReserva IS NOT ?
+           LIMIT 1""",
+        (idVeterinario, fecha, desde, hasta, excluir_reserva)
+    ).fetchone()
+
+# -----------------------------------------
+# Índice de agenda en memoria
+# Por cada (veterinario, fecha) mantiene los minutos de inicio ordenados y sus IDs de reserva.
+# Se recarga desde SQL cuando cambia version_datos(), y guarda hasta DIAS_EN_CACHE días (LRU).
+# -----------------------------------------
+class IndiceAgenda:
+    def __init__(self, capacidad: int = DIAS_EN_CACHE):
+        self.capacidad = capacidad
+        self._dias = OrderedDict() # (vet, fecha) -> (version, inicios, ids)
+        self._lock = threading.Lock()
+
+    def _cargar(self, idVeterinario: int, fecha: str) -> tuple:
+        inicios, ids = [], []
+        for id_reserva, hora in iterar_consulta(
+            "SELECT idReserva, hora FROM reservas WHERE idVeterinario = ? AND fecha = ? ORDER BY hora",
+            (idVeterinario, fecha)
+        ):
+            try:
+                inicios.append(a_minutos(hora))
+            except (ValueError, AttributeError, TypeError): # Registros antiguos sin hora válida
+                continue
+            ids.append(id_reserva)
+        return inicios, ids
+
+    def agenda(self, idVeterinario: int, fecha: str) -> tuple: # (inicios, ids) ordenados por inicio
+        version = version_datos()
+        clave = (idVeterinario, fecha)
+        with self._lock:
+            guardado = self._dias.get(clave)
+            if guardado is not None and guardado[0] == version:
+                self._dias.move_to_end(clave)
+                return guardado[1], guardado[2]
+        inicios, ids = self._cargar(idVeterinario, fecha)
+        with self._lock:
+            self._dias[clave] = (version, inicios, ids)
+            self._dias.move_to_end(clave)
+            while len(self._dias) > self.capacidad:
+                self._dias.popitem(last=False)
+        return inicios, ids
+
+    def invalidar(self) -> None: # Descarta todas las agendas en memoria
+        with self._lock:
+            self._dias.clear()
+
+    def conflicto(self, idVeterinario: int, fecha: str, hora: str, excluir_reserva: Optional[int] = None,
+        duracion: int = DURACION_CITA_MINUTOS) -> Optional[tuple]:
+        inicios, ids = self.agenda(idVeterinario, fecha)
+        inicio = a_minutos(hora)
+        i = bisect.bisect_right(inicios, inicio - duracion) # Primer inicio dentro de la ventana de choque
+        while i < len(inicios) and inicios[i] < inicio + duracion:
+            if ids[i] != excluir_reserva:
+                return ids[i], desde_minutos(inicios[i])
+            i += 1
+        return None
+
+    def sugerir(self, idVeterinario: int, fecha: str, hora: str, cantidad: int = 3,
+        excluir_reserva: Optional[int] = None, duracion: int = DURACION_CITA_MINUTOS) -> list:
+        # Horarios libres de la jornada (alineados a la duración), ordenados por cercanía al pedido
+        pedido = a_minutos(hora)
+        apertura, cierre = a_minutos(HORA_APERTURA), a_minutos(HORA_CIERRE)
+        candidatos = sorted(range(apertura, cierre - duracion + 1, duracion), key=lambda m: (abs(m - pedido), m))
+        libres = []
+        for minuto in candidatos:
+            if self.conflicto(idVeterinario, fecha, desde_minutos(minuto), excluir_reserva, duracion) is None:
+                libres.append(desde_minutos(minuto))
+                if len(libres) == cantidad:
+                    break
+        return sorted(libres)
+
+indice_agenda = IndiceAgenda()
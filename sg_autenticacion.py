@@ -0,0 +1,115 @@
+# sg_autenticacion.py - Servicio de hashing de contraseñas en un pool acotado de hilos.
+# Descripción: scrypt usa ~128 * N * r bytes de memoria (16 MB con los parámetros actuales) y decenas
+# de milisegundos por llamada. Este servicio lo ejecuta en hilos dedicados (hashlib.scrypt libera el GIL),
+# limita cuántos corren a la vez según un presupuesto de memoria, acota la cola de espera y mide
+# la latencia de cola y de cómputo. Expone una API síncrona y otra para asyncio.
+# Requiere: sg_hash.py
+import asyncio, os, threading, time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+from sg_hash import *
+
+MEMORIA_SCRYPT_MAX = int(os.environ.get("SG_SCRYPT_MEMORIA_MB", "64")) * 1024 * 1024 # Presupuesto total para hashes simultáneos
+COLA_SCRYPT_MAX = int(os.environ.get("SG_SCRYPT_COLA", "64")) # Solicitudes que pueden esperar turno
+ESPERA_ADMISION = 5.0 # Segundos que un llamador espera lugar en la cola antes de recibir ServicioSaturado
+
+class ServicioSaturado(RuntimeError):
+    """La cola de hashing está llena: demasiados logins simultáneos."""
+
+def memoria_scrypt(n: Optional[int] = None, r: Optional[int] = None) -> int: # Bytes que usa una llamada a scrypt
+    politica_n, politica_r, _ = politica_actual()
+    return 128 * (n or politica_n) * (r or politica_r)
+
+# -----------------------------------------
+# Servicio de hashing
+# hilos = cuántos scrypt corren en paralelo (tope de memoria); cola_max = cuántos pueden esperar.
+# -----------------------------------------
+class ServicioHash:
+    def __init__(self, hilos: Optional[int] = None, cola_max: int = COLA_SCRYPT_MAX):
+        if hilos is None:
+            hilos = max(1, min(os.cpu_count() or 1, MEMORIA_SCRYPT_MAX // memoria_scrypt()))
+        self.hilos = hilos
+        self.cola_max = cola_max
+        self._executor = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="scrypt")
+        self._cupos = threading.BoundedSemaphore(hilos + cola_max) # Admisión: en curso + en espera
+        self._lock = threading.Lock()
+        self._esperas = deque(maxlen=1000) # Últimas latencias de cola (s)
+        self._computos = deque(maxlen=1000) # Últimas duraciones de scrypt (s)
+        self.enviados = 0
+        self.completados = 0
+        self.rechazados = 0
+        self.en_curso = 0
+
+    def enviar(self, password: str, salt: bytes, n: Optional[int] = None, r: Optional[int] = None, p: Optional[int] = None) -> Future:
+        if not self._cupos.acquire(timeout=ESPERA_ADMISION):
+            with self._lock:
+                self.rechazados += 1
+            raise ServicioSaturado("Servicio de autenticación saturado, intente nuevamente.")
+        encolado = time.perf_counter()
+        with self._lock:
+            self.enviados += 1
+
+        def tarea() -> bytes:
+            inicio = time.perf_counter()
+            with self._lock:
+                self.en_curso += 1
+                self._esperas.append(inicio - encolado)
+            try:
+                return hash_password(password, salt, n, r, p)
+            finally:
+                with self._lock:
+                    self.en_curso -= 1
+                    self.completados += 1
+                    self._computos.append(time.perf_counter() - inicio)
+                self._cupos.release()
+
+        try:
+            return self._executor.submit(tarea)
+        except BaseException:
+            self._cupos.release()
+            raise
+
+    def hash(self, password: str, salt: bytes, n: Optional[int] = None, r: Optional[int] = None, p: Optional[int] = None) -> bytes: # API síncrona
+        return self.enviar(password, salt, n, r, p).result()
+
+    async def hash_async(self, password: str, salt: bytes, n: Optional[int] = None, r: Optional[int] = None, p: Optional[int] = None) -> bytes: # API asyncio
+        # La admisión puede bloquear si la cola está llena, así que se hace fuera del event loop
+        futuro = await asyncio.to_thread(self.enviar, password, salt, n, r, p)
+        return await asyncio.wrap_future(futuro)
+
+    def metricas(self) -> dict:
+        def percentil(valores: list, p: float) -> Optional[float]:
+            if not valores:
+                return None
+            ordenados = sorted(valores)
+            return round(ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))] * 1000, 2)
+        with self._lock:
+            esperas, computos = list(self._esperas), list(self._computos)
+            return {
+                "hilos": self.hilos,
+                "cola_max": self.cola_max,
+                "memoria_max_bytes": self.hilos * memoria_scrypt(),
+                "enviados": self.enviados,
+                "completados": self.completados,
+                "rechazados": self.rechazados,
+                "en_curso": self.en_curso,
+                "en_cola": self.enviados - self.completados - self.en_curso,
+                "espera_cola_p50_ms": percentil(esperas, 0.50),
+                "espera_cola_p95_ms": percentil(esperas, 0.95),
+                "scrypt_p50_ms": percentil(computos, 0.50),
+                "scrypt_p95_ms": percentil(computos, 0.95),
+            }
+
+    def cerrar(self) -> None:
+        self._executor.shutdown(wait=True)
+
+_servicio = None
+_servicio_lock = threading.Lock()
+
+def obtener_servicio_hash() -> ServicioHash: # Servicio compartido, creado en el primer uso
+    global _servicio
+    with _servicio_lock:
+        if _servicio is None:
+            _servicio = ServicioHash()
+        return _servicio
@@ -0,0 +1,188 @@
+# sg_busqueda.py - Búsqueda de texto libre sobre veterinarios, mascotas y motivos de reserva.
+# Descripción: Índices FTS5 de contenido externo (los textos siguen viviendo en sus tablas; el índice
+# guarda solo los términos) que mantienen al día triggers de INSERT, UPDATE y DELETE.
+# - Índice principal: tokenizador unicode61 sin tildes ni mayúsculas ("Pérez" = "perez"),
+#   cada término de la consulta se busca como prefijo y los resultados se ordenan por bm25.
+# - Índice de trigramas (veterinarios, mascotas y responsables): si la búsqueda principal no encuentra nada,
+#   se buscan los trigramas de la consulta y se ordenan los candidatos por trigramas en común,
+#   lo que tolera errores de tipeo y plurales ("perros", "pero" -> "perro").
+#   Los motivos de reserva no tienen trigramas: es la tabla más grande y el índice la triplicaría.
+#   Por la misma razón se listan de la más reciente a la más antigua en lugar de por bm25: ordenar
+#   por relevancia obliga a puntuar todas las coincidencias, y un motivo común aparece en miles.
+# Requiere: sg_veterinaria.py, sg_modelos.py
+import re, sqlite3, unicodedata
+from dataclasses import dataclass
+from typing import Optional
+from sg_veterinaria import conectar
+from sg_modelos import *
+
+CANDIDATOS_APROXIMADOS = 200 # Filas del índice de trigramas que se comparan en la búsqueda aproximada
+SIMILITUD_MINIMA = 0.5 # Fracción de trigramas de la consulta (con bordes de palabra) que debe aparecer en el registro
+
+# -----------------------------------------
+# Entidades indexadas
+# columnas y pesos van en el mismo orden (bm25 recibe un peso por columna del índice).
+# Sin relevancia, los resultados van por ID descendente y el cursor es el último ID mostrado.
+# -----------------------------------------
+@dataclass(frozen=True)
+class EntidadBusqueda:
+    tabla: str
+    clave: str
+    columnas: tuple
+    pesos: tuple
+    registro: type
+    fabrica: object
+    trigramas: bool
+    relevancia: bool = True
+
+ENTIDADES_BUSQUEDA = {
+    "veterinarios": EntidadBusqueda("veterinarios", "idVeterinario", ("nombre", "especialidad"), (10.0, 4.0),
+                                    Veterinario, fila_veterinario, trigramas=True),
+    "mascotas": EntidadBusqueda("mascotas", "idMascota", ("nombre", "especie", "raza"), (10.0, 4.0, 4.0),
+                                Mascota, fila_mascota, trigramas=True),
+    "responsables": EntidadBusqueda("responsables", "idResponsable", ("nombre", "telefono", "email"), (10.0, 2.0, 2.0),
+                                    Responsable, fila_responsable, trigramas=True),
+    "reservas": EntidadBusqueda("reservas", "idReserva", ("motivo",), (1.0,), Reserva, fila_reserva,
+                                trigramas=False, relevancia=False),
+}
+
+def _indices(e: EntidadBusqueda) -> list: # [(tabla FTS, tokenizador)]
+    indices = [(f"busqueda_{e.tabla}", "unicode61 remove_diacritics 2")]
+    if e.trigramas:
+        indices.append((f"busqueda_{e.tabla}_trigramas", "trigram"))
+    return indices
+
+def _esquema(e: EntidadBusqueda) -> list:
+    columnas = ", ".join(e.columnas)
+    nuevos = ", ".join(f"new.{c}" for c in e.columnas)
+    viejos = ", ".join(f"old.{c}" for c in e.columnas)
+    sentencias = []
+    for fts, tokenizador in _indices(e):
+        prefijos = ", prefix='2 3'" if tokenizador.startswith("unicode61") else ""
+        sentencias.append(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({columnas}, content='{e.tabla}', "
+            f"content_rowid='{e.clave}', tokenize='{tokenizador}'{prefijos})"
+        )
+        borrar = f"INSERT INTO {fts} ({fts}, rowid, {columnas}) VALUES ('delete', old.{e.clave}, {viejos});"
+        insertar = f"INSERT INTO {fts} (rowid, {columnas}) VALUES (new.{e.clave}, {nuevos});"
+        sentencias += [
+            f"CREATE TRIGGER IF NOT EXISTS trg_{fts}_ai AFTER INSERT ON {e.tabla} BEGIN {insertar} END",
+            f"CREATE TRIGGER IF NOT EXISTS trg_{fts}_ad AFTER DELETE ON {e.tabla} BEGIN {borrar} END",
+            # Solo si cambia una columna indexada: en reservas la mayoría de los UPDATE no tocan el motivo
+            f"CREATE TRIGGER IF NOT EXISTS trg_{fts}_au AFTER UPDATE OF {columnas} ON {e.tabla} BEGIN {borrar} {insertar} END",
+        ]
+    return sentencias
+
+# Sentencias de creación (o de borrado) de los índices y triggers de las entidades pedidas.
+# Cada migración nombra las suyas: una entidad agregada después no aparece en migraciones anteriores.
+def esquema_busqueda(*entidades: str) -> list:
+    return [sentencia for entidad in entidades for sentencia in _esquema(ENTIDADES_BUSQUEDA[entidad])]
+
+def borrar_busqueda(*entidades: str) -> list:
+    sentencias = []
+    for entidad in entidades:
+        for fts, _ in _indices(ENTIDADES_BUSQUEDA[entidad]):
+            sentencias += [f"DROP TRIGGER IF EXISTS trg_{fts}_{sufijo}" for sufijo in ("ai", "ad", "au")]
+            sentencias.append(f"DROP TABLE IF EXISTS {fts}")
+    return sentencias
+
+# -----------------------------------------
+# Reconstruir índices
+# Vuelve a leer las tablas de contenido (de las entidades indicadas, o de todas); se usa al crear los
+# índices y tras cargas masivas sin triggers.
+# -----------------------------------------
+def reconstruir_indices_busqueda(conn: sqlite3.Connection, *entidades: str) -> None:
+    for entidad in entidades or ENTIDADES_BUSQUEDA:
+        for fts, _ in _indices(ENTIDADES_BUSQUEDA[entidad]):
+            conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+# -----------------------------------------
+# Normalización de la consulta
+# -----------------------------------------
+def plegar(texto: str) -> str: # Minúsculas y sin tildes, igual que unicode61 remove_diacritics
+    descompuesto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(ch for ch in descompuesto if not unicodedata.combining(ch))
+
+def _terminos(texto: str) -> list:
+    return re.findall(r"\w+", plegar(texto))
+
+def consulta_prefijos(texto: str) -> Optional[str]:
+    # Cada término entre comillas (sin operadores de FTS5) y como prefijo; todos deben aparecer
+    terminos = _terminos(texto)
+    return " ".join(f'"{t}"*' for t in terminos) if terminos else None
+
+def _trigramas(palabras: list) -> set:
+    return {p[i:i + 3] for p in palabras for i in range(len(p) - 2)}
+
+def trigramas(texto: str) -> set:
+    # Cada palabra con dos espacios delante y uno detrás (como pg_trgm): los bordes también cuentan,
+    # así "lunna" comparte con "luna" 4 de sus 6 trigramas en lugar de 1 de 3
+    return _trigramas([f"  {t} " for t in _terminos(texto)])
+
+def consulta_trigramas(texto: str) -> Optional[str]:
+    # El índice no conoce los bordes de palabra: solo se buscan los trigramas internos.
+    # El tokenizador trigram no quita tildes: se buscan también los trigramas tal como se escribieron
+    todos = _trigramas(_terminos(texto)) | _trigramas(re.findall(r"\w+", texto.lower()))
+    return " OR ".join(f'"{t}"' for t in sorted(todos)) if todos else None
+
+def similitud(consulta: set, texto: str) -> float: # Fracción de los trigramas de la consulta presentes en el texto
+    return len(consulta & trigramas(texto)) / len(consulta) if consulta else 0.0
+
+# -----------------------------------------
+# Buscar
+# Devuelve una PaginaBusqueda ordenada por relevancia; el cursor es la cantidad de resultados ya vistos
+# (o el último ID, en las entidades sin relevancia).
+# Si la búsqueda exacta no encuentra nada, la primera página se completa con la búsqueda aproximada
+# (aproximada=True, sin más páginas).
+# -----------------------------------------
+def _columnas(e: EntidadBusqueda) -> str:
+    return ", ".join(f"{e.tabla}.{campo}" for campo in e.registro.__slots__)
+
+def _mejores(e: EntidadBusqueda, fts: str, puntaje: str) -> str:
+    # Primero los IDs mejor puntuados (solo el índice) y después la lectura de esas filas completas
+    return (f"SELECT {_columnas(e)} FROM (SELECT rowid AS id, {puntaje} AS puntaje FROM {fts} WHERE {fts} MATCH ? "
+            f"ORDER BY puntaje LIMIT ? OFFSET ?) AS mejores JOIN {e.tabla} ON {e.tabla}.{e.clave} = mejores.id ORDER BY mejores.puntaje")
+
+def buscar(entidad: str, texto: str, desde: int = 0, tamano: int = 20) -> PaginaBusqueda:
+    e = ENTIDADES_BUSQUEDA[entidad]
+    consulta = consulta_prefijos(texto)
+    if consulta is None:
+        return PaginaBusqueda([])
+    fts = f"busqueda_{e.tabla}"
+    with conectar() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = e.fabrica
+        if not e.relevancia: # FTS5 recorre las coincidencias por rowid y se detiene al llegar al límite
+            filas = cursor.execute(
+                f"SELECT {_columnas(e)} FROM {fts} JOIN {e.tabla} ON {e.tabla}.{e.clave} = {fts}.rowid "
+                f"WHERE {fts} MATCH ? AND {fts}.rowid < ? ORDER BY {fts}.rowid DESC LIMIT ?",
+                (consulta, desde or 2 ** 63 - 1, tamano + 1)).fetchall()
+            siguiente = getattr(filas[tamano - 1], e.clave) if len(filas) > tamano else None
+            return PaginaBusqueda(filas[:tamano], siguiente)
+        pesos = ", ".join(str(p) for p in e.pesos)
+        filas = cursor.execute(_mejores(e, fts, f"bm25({fts}, {pesos})"), (consulta, tamano + 1, desde)).fetchall()
+        if filas or desde or not e.trigramas:
+            siguiente = desde + tamano if len(filas) > tamano else None
+            return PaginaBusqueda(filas[:tamano], siguiente)
+
+        consulta = consulta_trigramas(texto)
+        if consulta is None: # Términos de menos de tres letras: no hay trigramas que comparar
+            return PaginaBusqueda([], aproximada=True)
+        fts = f"busqueda_{e.tabla}_trigramas"
+        candidatos = cursor.execute(_mejores(e, fts, "rank"), (consulta, CANDIDATOS_APROXIMADOS, 0)).fetchall()
+    buscados = trigramas(texto)
+    puntuados = []
+    for registro in candidatos:
+        puntaje = max(similitud(buscados, str(getattr(registro, c) or "")) for c in e.columnas)
+        if puntaje >= SIMILITUD_MINIMA:
+            puntuados.append((puntaje, registro))
+    puntuados.sort(key=lambda p: -p[0]) # Estable: a igual similitud se mantiene el orden de bm25
+    return PaginaBusqueda([registro for _, registro in puntuados[:tamano]], aproximada=True)
+
+# -----------------------------------------
+# Subcadena por trigramas
+# Subconsulta de IDs cuyo campo contiene el texto (LIKE '%texto%' resuelto con el índice de trigramas).
+# El índice solo se aprovecha con tres o más caracteres; con menos, conviene el LIKE sobre la tabla.
+# -----------------------------------------
+def sql_contiene(entidad: str, columna: str) -> str:
+    return f"SELECT rowid FROM busqueda_{ENTIDADES_BUSQUEDA[entidad].tabla}_trigramas WHERE {columna} LIKE ?"
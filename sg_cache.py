@@ -0,0 +1,138 @@
+# sg_cache.py - Caché de lectura (read-through) para mascotas y veterinarios.
+# Descripción: Guarda en memoria búsquedas por ID y páginas de listados de las tablas que cambian poco,
+# con expulsión LRU y vencimiento por TTL. Cada entrada pertenece a un espacio (el nombre de la tabla):
+# - En este proceso, los controladores de escritura llaman a invalidar(tabla) tras confirmar.
+# - Entre procesos, cuando cambia version_datos() (PRAGMA data_version) se lee versiones_tablas,
+#   cuyos contadores mantienen triggers, y se descarta solo el espacio cuya versión cambió: así las
+#   escrituras en reservas (frecuentes) no vacían la caché de mascotas y veterinarios.
+# Los valores leídos dentro de una transacción abierta no se guardan (podrían deshacerse con un rollback).
+# Requiere: sg_veterinaria.py
+import os, sqlite3, threading, time
+from collections import OrderedDict
+from typing import Callable, Optional
+from sg_veterinaria import conectar, version_datos
+
+CACHE_CAPACIDAD = int(os.environ.get("SG_CACHE_CAPACIDAD", "4096")) # Entradas en memoria entre todos los espacios
+CACHE_TTL = float(os.environ.get("SG_CACHE_TTL", "300")) # Segundos de vida de cada entrada
+TABLAS_CACHEADAS = ("mascotas", "veterinarios")
+
+# -----------------------------------------
+# Contadores de versión por tabla (migración 6)
+# Un trigger por operación incrementa la versión de la tabla afectada.
+# -----------------------------------------
+SQL_ESQUEMA_VERSIONES = [
+    """
+    CREATE TABLE IF NOT EXISTS versiones_tablas (
+        tabla TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+    """,
+    *(f"INSERT OR IGNORE INTO versiones_tablas (tabla, version) VALUES ('{tabla}', 0)" for tabla in TABLAS_CACHEADAS),
+    *(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_version_{tabla}_{sufijo} AFTER {operacion} ON {tabla}
+        BEGIN
+            UPDATE versiones_tablas SET version = version + 1 WHERE tabla = '{tabla}';
+        END
+        """
+        for tabla in TABLAS_CACHEADAS
+        for operacion, sufijo in (("INSERT", "ai"), ("UPDATE", "au"), ("DELETE", "ad"))
+    ),
+]
+
+_AUSENTE = object()
+
+# -----------------------------------------
+# Caché de lectura
+# Entradas: (espacio, clave) -> (vence_en, valor). Un valor None (ID inexistente) también se guarda.
+# -----------------------------------------
+class CacheLectura:
+    def __init__(self, capacidad: int = CACHE_CAPACIDAD, ttl: float = CACHE_TTL):
+        self.capacidad = capacidad
+        self.ttl = ttl
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None # Último version_datos() revisado
+        self._versiones_tablas = {} # tabla -> versión leída de versiones_tablas
+        self._generacion = {} # espacio -> invalidaciones locales (descarta cargas que se cruzaron con una)
+        self._contadores = {}
+
+    def _contar(self, espacio: str, campo: str) -> None:
+        c = self._contadores.setdefault(espacio, {"aciertos": 0, "fallos": 0, "invalidaciones": 0, "vencidas": 0, "expulsadas": 0})
+        c[campo] += 1
+
+    def _leer_versiones(self) -> Optional[dict]:
+        try:
+            with conectar() as conn:
+                return dict(conn.execute("SELECT tabla, version FROM versiones_tablas").fetchall())
+        except sqlite3.OperationalError: # Base sin la migración 6: cualquier cambio invalida todo
+            return None
+
+    def _sincronizar(self) -> None: # Detecta escrituras de otras conexiones o procesos
+        version = version_datos()
+        if version == self._version:
+            return
+        versiones = self._leer_versiones()
+        with self._lock:
+            if version == self._version:
+                return
+            misma_base = self._version is not None and self._version[0] == version[0]
+            anteriores = self._versiones_tablas if misma_base else {}
+            for espacio in {clave[0] for clave in self._entradas}:
+                if versiones is None or versiones.get(espacio) != anteriores.get(espacio):
+                    self._invalidar_espacio(espacio)
+            self._versiones_tablas = versiones or {}
+            self._version = version
+
+    def _invalidar_espacio(self, espacio: str) -> None: # Requiere tener el lock
+        for clave in [clave for clave in self._entradas if clave[0] == espacio]:
+            del self._entradas[clave]
+        self._generacion[espacio] = self._generacion.get(espacio, 0) + 1
+        self._contar(espacio, "invalidaciones")
+
+    def obtener(self, espacio: str, clave, cargar: Callable):
+        self._sincronizar()
+        completa = (espacio, clave)
+        with self._lock:
+            entrada = self._entradas.get(completa, _AUSENTE)
+            if entrada is not _AUSENTE:
+                if entrada[0] > time.monotonic():
+                    self._entradas.move_to_end(completa)
+                    self._contar(espacio, "aciertos")
+                    return entrada[1]
+                del self._entradas[completa]
+                self._contar(espacio, "vencidas")
+            self._contar(espacio, "fallos")
+            generacion = self._generacion.get(espacio, 0)
+
+        with conectar() as conn:
+            valor = cargar()
+            en_transaccion = conn.in_transaction
+
+        with self._lock:
+            if not en_transaccion and self._generacion.get(espacio, 0) == generacion:
+                self._entradas[completa] = (time.monotonic() + self.ttl, valor)
+                self._entradas.move_to_end(completa)
+                while len(self._entradas) > self.capacidad:
+                    expulsada, _ = self._entradas.popitem(last=False)
+                    self._contar(expulsada[0], "expulsadas")
+        return valor
+
+    def invalidar(self, espacio: Optional[str] = None) -> None: # Sin espacio descarta todo
+        with self._lock:
+            for e in ([espacio] if espacio is not None else {clave[0] for clave in self._entradas}):
+                self._invalidar_espacio(e)
+
+    def estadisticas(self) -> dict: # Por espacio: aciertos, fallos, tasa de aciertos y entradas vigentes
+        with self._lock:
+            entradas = {}
+            for espacio, _ in self._entradas:
+                entradas[espacio] = entradas.get(espacio, 0) + 1
+            espacios = {}
+            for espacio, c in sorted(self._contadores.items()):
+                consultas = c["aciertos"] + c["fallos"]
+                espacios[espacio] = {**c, "entradas": entradas.get(espacio, 0),
+                                     "tasa_aciertos": round(c["aciertos"] / consultas, 4) if consultas else None}
+            return {"capacidad": self.capacidad, "ttl_s": self.ttl, "entradas": len(self._entradas), "espacios": espacios}
+
+cache_lectura = CacheLectura()
@@ -0,0 +1,137 @@
+# sg_cambios.py - Actualizaciones parciales de mascotas, responsables, veterinarios y reservas.
+# Descripción: Arma un único UPDATE con solo las columnas informadas (None = mantener el valor actual),
+# validadas contra la lista de columnas editables de cada tabla, y devuelve el estado nuevo con RETURNING:
+# sin leer la fila antes ni reescribir columnas (ni entradas de índices o de FTS) que no cambian.
+# - El WHERE exige que al menos una columna tenga un valor distinto: si los datos ya eran esos, el UPDATE
+#   no toca la fila (no hay escritura, ni versión nueva, ni triggers).
+# - Con version_esperada, el mismo WHERE comprueba la versión (concurrencia optimista).
+# - Solo cuando el UPDATE no devuelve fila se lee la actual, para distinguir inexistente, conflicto de
+#   versión o sin cambios.
+# Requiere: sg_veterinaria.py, sg_modelos.py
+import json
+from dataclasses import dataclass
+from typing import Optional
+from sg_veterinaria import conectar, ejecutar_escritura
+from sg_modelos import *
+
+# -----------------------------------------
+# Entidades editables
+# columnas es la lista blanca de lo que un cambio parcial puede escribir (nunca la clave ni la versión).
+# reales son las columnas REAL: RETURNING entrega el valor tal como quedó guardado, y SQLite guarda los
+# REAL sin parte decimal como enteros (6.0 volvería como 6), así que se convierten en la consulta.
+# -----------------------------------------
+@dataclass(frozen=True)
+class EntidadEditable:
+    tabla: str
+    clave: str
+    columnas: tuple
+    registro: type
+    fabrica: object
+    reales: tuple = ()
+
+ENTIDADES_EDITABLES = {
+    "mascotas": EntidadEditable("mascotas", "idMascota", ("nombre", "especie", "raza", "edad", "peso", "idResponsable"),
+                                Mascota, fila_mascota, reales=("peso",)),
+    "responsables": EntidadEditable("responsables", "idResponsable", ("nombre", "telefono", "email"), Responsable, fila_responsable),
+    "veterinarios": EntidadEditable("veterinarios", "idVeterinario", ("nombre", "especialidad"), Veterinario, fila_veterinario),
+    "reservas": EntidadEditable("reservas", "idReserva", ("idMascota", "idVeterinario", "fecha", "hora", "motivo", "estadoMascota"),
+                                Reserva, fila_reserva),
+}
+
+# Estados de un cambio
+ACTUALIZADO = "actualizado"
+SIN_CAMBIOS = "sin_cambios"
+INEXISTENTE = "inexistente"
+CONFLICTO = "conflicto"
+
+# registro es la fila nueva (ACTUALIZADO) o la actual (SIN_CAMBIOS, CONFLICTO); None si no existe.
+@dataclass(frozen=True, slots=True)
+class ResultadoCambios:
+    estado: str
+    registro: Optional[object] = None
+
+def _retorno(e: EntidadEditable) -> str:
+    return ", ".join(f"CAST({campo} AS REAL)" if campo in e.reales else campo for campo in e.registro.__slots__)
+
+def _informados(e: EntidadEditable, cambios: dict) -> dict:
+    desconocidas = set(cambios) - set(e.columnas)
+    if desconocidas:
+        raise ValueError(f"Columnas no editables en {e.tabla}: {', '.join(sorted(desconocidas))}")
+    return {columna: valor for columna, valor in cambios.items() if valor is not None}
+
+def _leer(conn, e: EntidadEditable, id_: int, version_esperada: Optional[int]) -> ResultadoCambios:
+    cursor = conn.cursor()
+    cursor.row_factory = e.fabrica
+    actual = cursor.execute(f"SELECT {', '.join(e.registro.__slots__)} FROM {e.tabla} WHERE {e.clave} = ?", (id_,)).fetchone()
+    if actual is None:
+        return ResultadoCambios(INEXISTENTE)
+    if version_esperada is not None and actual.version != version_esperada:
+        return ResultadoCambios(CONFLICTO, actual)
+    return ResultadoCambios(SIN_CAMBIOS, actual)
+
+# -----------------------------------------
+# Aplicar cambios en una transacción abierta
+# Para quien ya tiene el lock de escritura (por ejemplo, tras verificar la agenda de una reserva).
+# -----------------------------------------
+def aplicar_cambios(conn, entidad: str, id_: int, cambios: dict, version_esperada: Optional[int] = None) -> ResultadoCambios:
+    e = ENTIDADES_EDITABLES[entidad]
+    cambios = _informados(e, cambios)
+    if not cambios:
+        return _leer(conn, e, id_, version_esperada)
+    asignaciones = ", ".join(f"{columna} = ?" for columna in cambios)
+    distintos = " OR ".join(f"{columna} IS NOT ?" for columna in cambios)
+    sql = f"UPDATE {e.tabla} SET {asignaciones}, version = version + 1 WHERE {e.clave} = ? AND ({distintos})"
+    parametros = [*cambios.values(), id_, *cambios.values()]
+    if version_esperada is not None:
+        sql += " AND version = ?"
+        parametros.append(version_esperada)
+    cursor = conn.cursor()
+    cursor.row_factory = e.fabrica
+    filas = cursor.execute(f"{sql} RETURNING {_retorno(e)}", parametros).fetchall()
+    if filas:
+        return ResultadoCambios(ACTUALIZADO, filas[0])
+    return _leer(conn, e, id_, version_esperada)
+
+# -----------------------------------------
+# Aplicar los mismos cambios a varias filas
+# Un único UPDATE sobre la lista de IDs (json_each) en la transacción abierta, y una sola lectura de las
+# que no cambiaron. Devuelve {id: ResultadoCambios} en el orden pedido (sin repetidos).
+# -----------------------------------------
+def aplicar_cambios_lote(conn, entidad: str, ids: list, cambios: dict) -> dict:
+    e = ENTIDADES_EDITABLES[entidad]
+    cambios = _informados(e, cambios)
+    ids = list(dict.fromkeys(ids))
+    cursor = conn.cursor()
+    cursor.row_factory = e.fabrica
+    actualizados = {}
+    if cambios:
+        asignaciones = ", ".join(f"{columna} = ?" for columna in cambios)
+        distintos = " OR ".join(f"{columna} IS NOT ?" for columna in cambios)
+        filas = cursor.execute(
+            f"UPDATE {e.tabla} SET {asignaciones}, version = version + 1 "
+            f"WHERE {e.clave} IN (SELECT value FROM json_each(?)) AND ({distintos}) RETURNING {_retorno(e)}",
+            [*cambios.values(), json.dumps(ids), *cambios.values()]).fetchall()
+        actualizados = {getattr(fila, e.clave): fila for fila in filas}
+    resto = [id_ for id_ in ids if id_ not in actualizados]
+    actuales = {}
+    if resto:
+        filas = cursor.execute(f"SELECT {', '.join(e.registro.__slots__)} FROM {e.tabla} WHERE {e.clave} IN (SELECT value FROM json_each(?))",
+                               (json.dumps(resto),)).fetchall()
+        actuales = {getattr(fila, e.clave): fila for fila in filas}
+    return {
+        id_: ResultadoCambios(ACTUALIZADO, actualizados[id_]) if id_ in actualizados
+        else ResultadoCambios(SIN_CAMBIOS, actuales[id_]) if id_ in actuales
+        else ResultadoCambios(INEXISTENTE)
+        for id_ in ids
+    }
+
+# -----------------------------------------
+# Actualizar parcialmente
+# Con cambios, corre en ejecutar_escritura (BEGIN IMMEDIATE y reintentos); sin ninguno, solo lee la fila.
+# -----------------------------------------
+def actualizar_parcial(entidad: str, id_: int, cambios: dict, version_esperada: Optional[int] = None) -> ResultadoCambios:
+    e = ENTIDADES_EDITABLES[entidad]
+    if not _informados(e, cambios):
+        with conectar() as conn:
+            return _leer(conn, e, id_, version_esperada)
+    return ejecutar_escritura(lambda conn: aplicar_cambios(conn, entidad, id_, cambios, version_esperada))
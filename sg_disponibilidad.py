@@ -0,0 +1,156 @@
+# sg_disponibilidad.py - Búsqueda de horarios libres entre todos los veterinarios.
+# Descripción: Cada día se representa como un mapa de bits de GRANULO_MINUTOS por bit (96 bits con 15 min).
+# - Jornada: bits de las franjas de horarios_veterinarios para ese día de la semana
+#   (si el veterinario no tiene franjas cargadas se usa la jornada por defecto, lunes a viernes).
+# - Ocupación: bits cubiertos por las reservas del veterinario en esa fecha, precalculados por
+#   bloques de días con una sola consulta y guardados en caché hasta que cambie version_datos().
+# Un horario libre es una posición donde (jornada & ~ocupación) tiene k bits seguidos en 1,
+# y eso se resuelve con desplazamientos y AND sobre enteros, sin recorrer reservas.
+# Requiere: sg_veterinaria.py, sg_agenda.py
+import datetime, threading
+from typing import Optional
+from sg_veterinaria import conectar, iterar_consulta, version_datos
+from sg_agenda import DURACION_CITA_MINUTOS, HORA_APERTURA, HORA_CIERRE, a_minutos, desde_minutos, normalizar_fecha, normalizar_hora
+
+GRANULO_MINUTOS = 15 # Resolución de los mapas de bits
+DIAS_POR_BLOQUE = 31 # Días de reservas que se cargan por consulta
+DIAS_LABORALES_DEFECTO = (0, 1, 2, 3, 4) # Lunes a viernes (datetime.weekday)
+
+def _bits(desde_min: int, hasta_min: int) -> int: # Bits que cubren el rango [desde, hasta) en minutos
+    primero = desde_min // GRANULO_MINUTOS
+    ultimo = -(-hasta_min // GRANULO_MINUTOS) # División con redondeo hacia arriba
+    if ultimo <= primero:
+        return 0
+    return ((1 << (ultimo - primero)) - 1) << primero
+
+# -----------------------------------------
+# Definir horario de un veterinario
+# Agrega una franja de atención para un día de la semana (0 = lunes ... 6 = domingo).
+# -----------------------------------------
+def definir_horario_veterinario(idVeterinario: int, dia_semana: int, hora_inicio: str, hora_fin: str) -> None:
+    if not 0 <= dia_semana <= 6:
+        raise ValueError("El día de la semana debe estar entre 0 (lunes) y 6 (domingo).")
+    hora_inicio, hora_fin = normalizar_hora(hora_inicio), normalizar_hora(hora_fin)
+    if hora_fin <= hora_inicio:
+        raise ValueError("La hora de fin debe ser posterior a la de inicio.")
+    with conectar() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO horarios_veterinarios (idVeterinario, dia_semana, hora_inicio, hora_fin) VALUES (?, ?, ?, ?)",
+            (idVeterinario, dia_semana, hora_inicio, hora_fin)
+        )
+        conn.commit()
+
+def borrar_horarios_veterinario(idVeterinario: int) -> None: # Vuelve a la jornada por defecto
+    with conectar() as conn:
+        conn.execute("DELETE FROM horarios_veterinarios WHERE idVeterinario = ?", (idVeterinario,))
+        conn.commit()
+
+# -----------------------------------------
+# Servicio de disponibilidad
+# Guarda en caché las jornadas por veterinario y la ocupación por (veterinario, fecha).
+# -----------------------------------------
+class ServicioDisponibilidad:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._jornadas = {} # idVeterinario -> [bits por día de semana]
+        self._ocupacion = {} # (idVeterinario, fecha) -> bits
+        self._dias_cargados = set() # Fechas cuya ocupación ya está en caché
+
+    def _validar_cache(self) -> None: # Se llama con el lock tomado
+        version = version_datos()
+        if version != self._version:
+            self._version = version
+            self._jornadas.clear()
+            self._ocupacion.clear()
+            self._dias_cargados.clear()
+
+    def invalidar(self) -> None: # Fuerza la recarga de jornadas y ocupación en la próxima búsqueda
+        with self._lock:
+            self._version = None
+
+    def _jornada(self, idVeterinario: int) -> list:
+        jornada = self._jornadas.get(idVeterinario)
+        if jornada is None:
+            jornada = [0] * 7
+            for dia, inicio, fin in iterar_consulta(
+                "SELECT dia_semana, hora_inicio, hora_fin FROM horarios_veterinarios WHERE idVeterinario = ?",
+                (idVeterinario,)
+            ):
+                jornada[dia] |= _bits(a_minutos(inicio), a_minutos(fin))
+            if not any(jornada): # Sin franjas cargadas: jornada por defecto
+                defecto = _bits(a_minutos(HORA_APERTURA), a_minutos(HORA_CIERRE))
+                for dia in DIAS_LABORALES_DEFECTO:
+                    jornada[dia] = defecto
+            self._jornadas[idVeterinario] = jornada
+        return jornada
+
+    def _cargar_ocupacion(self, desde: datetime.date, hasta: datetime.date) -> None:
+        # Una consulta por bloque de días (índice por fecha) para todos los veterinarios
+        for id_vet, fecha, hora in iterar_consulta(
+            "SELECT idVeterinario, fecha, hora FROM reservas WHERE fecha BETWEEN ? AND ?",
+            (desde.isoformat(), hasta.isoformat())
+        ):
+            try:
+                inicio = a_minutos(hora)
+            except (ValueError, AttributeError, TypeError): # Registros antiguos sin hora válida
+                continue
+            clave = (id_vet, fecha)
+            self._ocupacion[clave] = self._ocupacion.get(clave, 0) | _bits(inicio, inicio + DURACION_CITA_MINUTOS)
+        dia = desde
+        while dia <= hasta:
+            self._dias_cargados.add(dia.isoformat())
+            dia += datetime.timedelta(days=1)
+
+    def horarios_libres(self, idVeterinario: int, fecha: datetime.date, duracion: int = DURACION_CITA_MINUTOS,
+        desde_minuto: int = 0) -> list:
+        # Devuelve los minutos de inicio libres (alineados al gránulo) de un veterinario en una fecha
+        # La reserva ocupa al menos DURACION_CITA_MINUTOS: es la regla con que el motor de agenda detecta choques
+        k = -(-max(duracion, DURACION_CITA_MINUTOS) // GRANULO_MINUTOS)
+        with self._lock:
+            self._validar_cache()
+            clave_fecha = fecha.isoformat()
+            if clave_fecha not in self._dias_cargados:
+                self._cargar_ocupacion(fecha, fecha + datetime.timedelta(days=DIAS_POR_BLOQUE - 1))
+            libre = self._jornada(idVeterinario)[fecha.weekday()] & ~self._ocupacion.get((idVeterinario, clave_fecha), 0)
+        libre &= ~((1 << (desde_minuto // GRANULO_MINUTOS + (desde_minuto % GRANULO_MINUTOS > 0))) - 1)
+        inicios = libre
+        for i in range(1, k): # Posiciones con k bits libres consecutivos
+            inicios &= libre >> i
+        resultado = []
+        while inicios:
+            bit = inicios & -inicios
+            resultado.append((bit.bit_length() - 1) * GRANULO_MINUTOS)
+            inicios ^= bit
+        return resultado
+
+    # -----------------------------------------
+    # Próximos horarios disponibles
+    # Recorre los días en orden y, dentro de cada día, junta los horarios de todos los veterinarios
+    # de la especialidad; se detiene al reunir `cantidad`. Devuelve (fecha, hora, idVeterinario, nombre).
+    # -----------------------------------------
+    def proximos_disponibles(self, especialidad: Optional[str], fecha_desde: str, fecha_hasta: str,
+        duracion: int = DURACION_CITA_MINUTOS, cantidad: int = 5, ahora: Optional[datetime.datetime] = None) -> list:
+        desde = datetime.date.fromisoformat(normalizar_fecha(fecha_desde))
+        hasta = datetime.date.fromisoformat(normalizar_fecha(fecha_hasta))
+        ahora = ahora or datetime.datetime.now()
+        if especialidad:
+            vets = list(iterar_consulta(
+                "SELECT idVeterinario, nombre FROM veterinarios WHERE especialidad = ? ORDER BY idVeterinario", (especialidad,)))
+        else:
+            vets = list(iterar_consulta("SELECT idVeterinario, nombre FROM veterinarios ORDER BY idVeterinario"))
+        resultado = []
+        dia = max(desde, ahora.date())
+        while dia <= hasta and len(resultado) < cantidad:
+            desde_minuto = ahora.hour * 60 + ahora.minute if dia == ahora.date() else 0
+            del_dia = []
+            for id_vet, nombre in vets:
+                for minuto in self.horarios_libres(id_vet, dia, duracion, desde_minuto):
+                    del_dia.append((minuto, id_vet, nombre))
+            del_dia.sort()
+            for minuto, id_vet, nombre in del_dia[:cantidad - len(resultado)]:
+                resultado.append((dia.isoformat(), desde_minutos(minuto), id_vet, nombre))
+            dia += datetime.timedelta(days=1)
+        return resultado
+
+servicio_disponibilidad = ServicioDisponibilidad()
@@ -0,0 +1,206 @@
+# sg_escritor.py - Escritor agrupado (group commit) para las operaciones de escritura.
+# Descripción: Un único hilo escritor recibe operaciones (un controlador y sus argumentos) por una cola
+# y las ejecuta por lotes dentro de una sola transacción (sg_veterinaria.transaccion_unica): un commit,
+# y por lo tanto un fsync, por lote en lugar de uno por operación.
+# - Cada operación corre en su propio punto de guardado: si falla (excepción, o None/False según la
+#   convención de los controladores) se deshacen solo sus cambios y el resto del lote sigue.
+# - El lote se cierra al llegar a ESCRITOR_LOTE_MAX operaciones, al vencer ESCRITOR_ESPERA_MS desde la
+#   primera o, si ya juntó tantas como el lote anterior, cuando la cola queda vacía: con pocos clientes
+#   no se paga la espera completa en cada commit. Las que llegan mientras se confirma forman el siguiente.
+# - Quien envía recibe un Future que se resuelve recién después del commit con (resultado, texto impreso).
+#   ejecutar() espera ese Future y vuelve a imprimir el texto en el hilo que llamó, así un controlador
+#   se comporta igual que si se hubiera llamado directamente.
+# Requiere: sg_veterinaria.py, sg_salida.py, sg_agenda.py, sg_disponibilidad.py
+import os, queue, sqlite3, sys, threading, time
+from collections import deque
+from concurrent.futures import Future
+from sg_veterinaria import punto_guardado, transaccion_activa, transaccion_unica
+from sg_salida import salida
+from sg_agenda import indice_agenda
+from sg_disponibilidad import servicio_disponibilidad
+
+ESCRITOR_LOTE_MAX = int(os.environ.get("SG_ESCRITOR_LOTE", "64")) # Operaciones por transacción como máximo
+ESCRITOR_ESPERA_MS = float(os.environ.get("SG_ESCRITOR_ESPERA_MS", "2")) # Espera máxima para completar un lote
+MUESTRAS_ESCRITOR = 1000 # Últimos lotes considerados en los percentiles
+
+_FIN = object()
+
+class _Revertir(Exception): # El controlador informó un error: se deshace su punto de guardado
+    pass
+
+class EscritorAgrupado:
+    def __init__(self, lote_max: int = ESCRITOR_LOTE_MAX, espera_ms: float = ESCRITOR_ESPERA_MS):
+        self.lote_max = max(1, lote_max)
+        self.espera = max(0.0, espera_ms) / 1000
+        self._cola = queue.SimpleQueue()
+        self._hilo = None
+        self._lock = threading.Lock()
+        self._metricas_lock = threading.Lock()
+        self.reiniciar_metricas()
+
+    # -----------------------------------------
+    # Envío de operaciones
+    # -----------------------------------------
+    def enviar(self, funcion, *args, **kwargs) -> Future:
+        futuro = Future()
+        # Desde el propio escritor o con una transacción ya abierta en este hilo, encolar esperaría
+        # un lock de escritura que tiene quien espera: se ejecuta en el momento
+        if threading.current_thread() is self._hilo or transaccion_activa():
+            futuro.set_running_or_notify_cancel()
+            try:
+                futuro.set_result((funcion(*args, **kwargs), ""))
+            except BaseException as e:
+                futuro.set_exception(e)
+            return futuro
+        self.iniciar()
+        self._cola.put((funcion, args, kwargs, futuro, time.perf_counter()))
+        return futuro
+
+    def ejecutar(self, funcion, *args, **kwargs):
+        # Como llamar al controlador directamente, pero confirmado junto con otras escrituras
+        try:
+            resultado, texto = self.enviar(funcion, *args, **kwargs).result()
+        except sqlite3.DatabaseError as e: # Falló el commit del lote: ninguna operación quedó aplicada
+            print("\n Error general de base de datos:", e)
+            return None
+        sys.stdout.write(texto)
+        return resultado
+
+    # -----------------------------------------
+    # Ciclo de vida del hilo escritor
+    # -----------------------------------------
+    def iniciar(self) -> None:
+        with self._lock:
+            if self._hilo is not None and self._hilo.is_alive():
+                return
+            salida.instalar() # Lo que imprime cada operación se devuelve a quien la envió
+            self._hilo = threading.Thread(target=self._bucle, name="sg-escritor", daemon=True)
+            self._hilo.start()
+
+    def detener(self) -> None: # Procesa lo ya encolado y termina el hilo
+        with self._lock:
+            hilo, self._hilo = self._hilo, None
+            if hilo is None:
+                return
+            self._cola.put(_FIN)
+        hilo.join()
+        salida.restaurar()
+
+    def _bucle(self) -> None:
+        terminar = False
+        esperados = 1 # Tamaño del lote anterior: cuántas operaciones vale la pena esperar
+        while not terminar:
+            primera = self._cola.get()
+            if primera is _FIN:
+                break
+            lote = [primera]
+            limite = time.perf_counter() + self.espera
+            while len(lote) < self.lote_max:
+                try:
+                    if len(lote) < esperados:
+                        operacion = self._cola.get(timeout=max(0.0, limite - time.perf_counter()))
+                    else: # Ya se juntaron las esperadas: solo se suman las que están en la cola
+                        operacion = self._cola.get_nowait()
+                except queue.Empty:
+                    break
+                if operacion is _FIN:
+                    terminar = True
+                    break
+                lote.append(operacion)
+            esperados = len(lote)
+            self._procesar(lote)
+
+    # -----------------------------------------
+    # Procesar un lote
+    # Los Future se resuelven después del commit: un resultado entregado siempre está confirmado.
+    # -----------------------------------------
+    def _procesar(self, lote: list) -> None:
+        resultados = [] # (futuro, (resultado, texto) o excepción)
+        revertidas = 0
+        error_commit = None
+        inicio = time.perf_counter()
+        try:
+            with transaccion_unica() as conn:
+                for funcion, args, kwargs, futuro, _ in lote:
+                    if not futuro.set_running_or_notify_cancel(): # Cancelada antes de empezar
+                        continue
+                    valor = None
+                    try:
+                        with punto_guardado(conn, "sg_escritor"):
+                            valor = salida.capturar_texto(funcion, *args, **kwargs)
+                            if valor[0] is None or valor[0] is False:
+                                raise _Revertir()
+                    except _Revertir:
+                        revertidas += 1
+                    except Exception as e:
+                        revertidas += 1
+                        valor = e
+                    resultados.append((futuro, valor))
+                confirmacion = time.perf_counter()
+        except Exception as e: # BEGIN o COMMIT fallaron: se revirtió el lote completo
+            error_commit = e
+            confirmacion = time.perf_counter()
+        fin = time.perf_counter()
+
+        if revertidas or error_commit is not None:
+            # Las agendas en memoria pudieron cargarse con filas que ya no existen
+            indice_agenda.invalidar()
+            servicio_disponibilidad.invalidar()
+        if error_commit is not None:
+            for *_, futuro, _ in lote:
+                if not futuro.done():
+                    futuro.set_exception(error_commit)
+        else:
+            for futuro, valor in resultados:
+                if isinstance(valor, Exception):
+                    futuro.set_exception(valor)
+                else:
+                    futuro.set_result(valor)
+        self._registrar(len(lote), revertidas, error_commit is not None, fin - confirmacion, fin - inicio,
+                        [fin - encolada for *_, encolada in lote])
+
+    # -----------------------------------------
+    # Métricas
+    # Tamaño de lote, duración del commit y latencia total (desde que se encoló hasta confirmarse).
+    # -----------------------------------------
+    def reiniciar_metricas(self) -> None:
+        with self._metricas_lock:
+            self.lotes = self.operaciones = self.revertidas = self.commits_fallidos = 0
+            self._tamanos = deque(maxlen=MUESTRAS_ESCRITOR)
+            self._commits_ms = deque(maxlen=MUESTRAS_ESCRITOR)
+            self._lotes_ms = deque(maxlen=MUESTRAS_ESCRITOR)
+            self._latencias_ms = deque(maxlen=MUESTRAS_ESCRITOR)
+
+    def _registrar(self, tamano: int, revertidas: int, fallo_commit: bool, commit_s: float, lote_s: float, latencias: list) -> None:
+        with self._metricas_lock:
+            self.lotes += 1
+            self.operaciones += tamano
+            self.revertidas += revertidas
+            self.commits_fallidos += fallo_commit
+            self._tamanos.append(tamano)
+            self._commits_ms.append(commit_s * 1000)
+            self._lotes_ms.append(lote_s * 1000)
+            self._latencias_ms.extend(s * 1000 for s in latencias)
+
+    def estadisticas(self) -> dict:
+        def percentiles(muestras) -> dict:
+            ordenadas = sorted(muestras)
+            if not ordenadas:
+                return {"p50": None, "p95": None, "p99": None, "max": None}
+            p = lambda q: round(ordenadas[min(len(ordenadas) - 1, int(q * len(ordenadas)))], 3)
+            return {"p50": p(0.50), "p95": p(0.95), "p99": p(0.99), "max": round(ordenadas[-1], 3)}
+        with self._metricas_lock:
+            return {
+                "activo": self._hilo is not None and self._hilo.is_alive(),
+                "lote_max": self.lote_max, "espera_ms": self.espera * 1000,
+                "pendientes": self._cola.qsize(),
+                "lotes": self.lotes, "operaciones": self.operaciones,
+                "revertidas": self.revertidas, "commits_fallidos": self.commits_fallidos,
+                "operaciones_por_lote": round(self.operaciones / self.lotes, 2) if self.lotes else None,
+                "tamano_lote": percentiles(self._tamanos),
+                "commit_ms": percentiles(self._commits_ms),
+                "lote_ms": percentiles(self._lotes_ms),
+                "latencia_ms": percentiles(self._latencias_ms),
+            }
+
+escritor_agrupado = EscritorAgrupado()
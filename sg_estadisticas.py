@@ -0,0 +1,211 @@
+# sg_estadisticas.py - Contadores estadísticos mantenidos de forma incremental.
+# Descripción: Las tablas estadisticas (una sola fila) y estadisticas_veterinarios guardan totales,
+# agregados de edad y reservas por veterinario. Los triggers definidos aquí las actualizan en cada
+# INSERT/UPDATE/DELETE, de modo que el resumen general se lee sin recorrer las tablas.
+# Uso manual: python sg_estadisticas.py [verificar|reconstruir]
+# Requiere: sg_veterinaria.py, sg_reportes.py
+import sqlite3, sys
+from sg_veterinaria import conectar
+from sg_reportes import calcular_resumen_general_completo
+
+# -----------------------------------------
+# Esquema y triggers
+# MIN/MAX de edad se recalculan con subconsultas que resuelve el índice idx_mascotas_edad
+# en O(log n); sumas y conteos se ajustan con el valor anterior y el nuevo.
+# -----------------------------------------
+SQL_ESQUEMA_ESTADISTICAS = [
+    """
+    CREATE TABLE IF NOT EXISTS estadisticas (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        total_usuarios INTEGER NOT NULL DEFAULT 0,
+        total_veterinarios INTEGER NOT NULL DEFAULT 0,
+        total_mascotas INTEGER NOT NULL DEFAULT 0,
+        total_reservas INTEGER NOT NULL DEFAULT 0,
+        edad_suma REAL NOT NULL DEFAULT 0,
+        edad_cantidad INTEGER NOT NULL DEFAULT 0,
+        edad_min INTEGER,
+        edad_max INTEGER
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS estadisticas_veterinarios (
+        idVeterinario INTEGER PRIMARY KEY,
+        total_reservas INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_estadisticas_veterinarios_total ON estadisticas_veterinarios (total_reservas)",
+    "CREATE INDEX IF NOT EXISTS idx_mascotas_edad ON mascotas (edad)",
+    "INSERT OR IGNORE INTO estadisticas (id) VALUES (1)",
+    # usuarios y veterinarios: solo conteos
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_estadisticas_usuarios_ai AFTER INSERT ON usuarios BEGIN
+        UPDATE estadisticas SET total_usuarios = total_usuarios + 1 WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_estadisticas_usuarios_ad AFTER DELETE ON usuarios BEGIN
+        UPDATE estadisticas SET total_usuarios = total_usuarios - 1 WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_estadisticas_veterinarios_ai AFTER INSERT ON veterinarios BEGIN
+        UPDATE estadisticas SET total_veterinarios = total_veterinarios + 1 WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_estadisticas_veterinarios_ad AFTER DELETE ON veterinarios BEGIN
+        UPDATE estadisticas SET total_veterinarios = total_veterinarios - 1 WHERE id = 1;
+    END
+    """,
+    # mascotas: conteo y agregados de edad
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_estadisticas_mascotas_ai AFTER INSERT ON mascotas BEGIN
+        UPDATE estadisticas SET
+            total_mascotas = total_mascotas + 1,
+            edad_suma = edad_suma + COALESCE(NEW.edad, 0),
+            edad_cantidad = edad_cantidad + (NEW.edad IS NOT NULL),
+            edad_min = (SELECT MIN(edad) FROM mascotas),
+            edad_max = (SELECT MAX(edad) FROM mascotas)
+        WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_estadisticas_mascotas_ad AFTER DELETE ON mascotas BEGIN
+        UPDATE estadisticas SET
+            total_mascotas = total_mascotas - 1,
+            edad_suma = edad_suma - COALESCE(OLD.edad, 0),
+            edad_cantidad = edad_cantidad - (OLD.edad IS NOT NULL),
+            edad_min = (SELECT MIN(edad) FROM mascotas),
+            edad_max = (SELECT MAX(edad) FROM mascotas)
+        WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_estadisticas_mascotas_au AFTER UPDATE OF edad ON mascotas
+    WHEN OLD.edad IS NOT NEW.edad BEGIN
+        UPDATE estadisticas SET
+            edad_suma = edad_suma - COALESCE(OLD.edad, 0) + COALESCE(NEW.edad, 0),
+            edad_cantidad = edad_cantidad - (OLD.edad IS NOT NULL) + (NEW.edad IS NOT NULL),
+            edad_min = (SELECT MIN(edad) FROM mascotas),
+            edad_max = (SELECT MAX(edad) FROM mascotas)
+        WHERE id = 1;
+    END
+    """,
+    # reservas: conteo total y por veterinario
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_estadisticas_reservas_ai AFTER INSERT ON reservas BEGIN
+        UPDATE estadisticas SET total_reservas = total_reservas + 1 WHERE id = 1;
+        INSERT INTO estadisticas_veterinarios (idVeterinario, total_reservas)
+        SELECT NEW.idVeterinario, 1 WHERE NEW.idVeterinario IS NOT NULL
+        ON CONFLICT (idVeterinario) DO UPDATE SET total_reservas = total_reservas + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_estadisticas_reservas_ad AFTER DELETE ON reservas BEGIN
+        UPDATE estadisticas SET total_reservas = total_reservas - 1 WHERE id = 1;
+        UPDATE estadisticas_veterinarios SET total_reservas = total_reservas - 1 WHERE idVeterinario = OLD.idVeterinario;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_estadisticas_reservas_au AFTER UPDATE OF idVeterinario ON reservas
+    WHEN OLD.idVeterinario IS NOT NEW.idVeterinario BEGIN
+        UPDATE estadisticas_veterinarios SET total_reservas = total_reservas - 1 WHERE idVeterinario = OLD.idVeterinario;
+        INSERT INTO estadisticas_veterinarios (idVeterinario, total_reservas)
+        SELECT NEW.idVeterinario, 1 WHERE NEW.idVeterinario IS NOT NULL
+        ON CONFLICT (idVeterinario) DO UPDATE SET total_reservas = total_reservas + 1;
+    END
+    """,
+]
+
+# -----------------------------------------
+# Reconstruir estadísticas
+# Recalcula los contadores con un recorrido completo. Se usa al crear las tablas
+# (migración) y como reparación si verificar_estadisticas() encuentra diferencias.
+# -----------------------------------------
+def reconstruir_estadisticas(conn: sqlite3.Connection) -> None:
+    conn.execute("DELETE FROM estadisticas_veterinarios")
+    conn.execute(
+        """
+        INSERT INTO estadisticas_veterinarios (idVeterinario, total_reservas)
+        SELECT idVeterinario, COUNT(*) FROM reservas WHERE idVeterinario IS NOT NULL GROUP BY idVeterinario
+        """
+    )
+    conn.execute(
+        """
+        INSERT OR REPLACE INTO estadisticas
+            (id, total_usuarios, total_veterinarios, total_mascotas, total_reservas,
+             edad_suma, edad_cantidad, edad_min, edad_max)
+        SELECT 1,
+            (SELECT COUNT(*) FROM usuarios),
+            (SELECT COUNT(*) FROM veterinarios),
+            COUNT(*),
+            (SELECT COUNT(*) FROM reservas),
+            COALESCE(SUM(edad), 0), COUNT(edad), MIN(edad), MAX(edad)
+        FROM mascotas
+        """
+    )
+
+# -----------------------------------------
+# Verificar estadísticas
+# Compara los contadores con un recorrido completo de las tablas.
+# Devuelve la lista de diferencias como (métrica, valor en contador, valor real); vacía si todo cuadra.
+# -----------------------------------------
+def verificar_estadisticas(conn: sqlite3.Connection) -> list:
+    diferencias = []
+    real = calcular_resumen_general_completo(conn)
+    fila = conn.execute(
+        """
+        SELECT total_usuarios, total_veterinarios, total_mascotas, total_reservas, edad_min, edad_max,
+               CASE WHEN edad_cantidad > 0 THEN ROUND(edad_suma / edad_cantidad, 1) END
+        FROM estadisticas WHERE id = 1
+        """
+    ).fetchone()
+    if fila is None:
+        return [("estadisticas", None, "fila inexistente")]
+    esperado = (
+        real.total_usuarios, real.total_veterinarios, real.total_mascotas, real.total_reservas,
+        real.edad_min, real.edad_max, real.edad_promedio,
+    )
+    nombres = ("total_usuarios", "total_veterinarios", "total_mascotas", "total_reservas", "edad_min", "edad_max", "edad_promedio")
+    for nombre, contador, valor_real in zip(nombres, fila, esperado):
+        if contador != valor_real:
+            diferencias.append((nombre, contador, valor_real))
+    # Reservas por veterinario: diferencia simétrica entre contadores y GROUP BY completo
+    for id_vet, contador, valor_real in conn.execute(
+        """
+        SELECT e.idVeterinario, e.total_reservas, COALESCE(r.total, 0)
+        FROM estadisticas_veterinarios e
+        LEFT JOIN (SELECT idVeterinario, COUNT(*) AS total FROM reservas GROUP BY idVeterinario) r
+            ON r.idVeterinario = e.idVeterinario
+        WHERE e.total_reservas != COALESCE(r.total, 0)
+        UNION ALL
+        SELECT r.idVeterinario, 0, COUNT(*)
+        FROM reservas r
+        WHERE r.idVeterinario IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM estadisticas_veterinarios e WHERE e.idVeterinario = r.idVeterinario)
+        GROUP BY r.idVeterinario
+        """
+    ):
+        diferencias.append((f"reservas_veterinario_{id_vet}", contador, valor_real))
+    return diferencias
+
+if __name__ == "__main__":
+    from sg_migraciones import aplicar_migraciones
+    aplicar_migraciones()
+    accion = sys.argv[1] if len(sys.argv) > 1 else "verificar"
+    with conectar() as conn:
+        if accion == "reconstruir":
+            conn.execute("BEGIN IMMEDIATE")
+            reconstruir_estadisticas(conn)
+            conn.commit()
+            print("Estadísticas reconstruidas.")
+        elif accion == "verificar":
+            diferencias = verificar_estadisticas(conn)
+            for metrica, contador, valor_real in diferencias:
+                print(f"Diferencia en {metrica}: contador={contador}, real={valor_real}")
+            if diferencias:
+                sys.exit(1)
+            print("Las estadísticas coinciden con las tablas.")
+        else:
+            print("Uso: python sg_estadisticas.py [verificar|reconstruir]")
+            sys.exit(2)
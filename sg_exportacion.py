@@ -0,0 +1,169 @@
+# sg_exportacion.py - Exportación de tablas y reportes a CSV o JSON Lines, con compresión opcional.
+# Descripción: Las filas se leen en lotes con iterar_consulta() y se escriben a medida que llegan,
+# así la memoria usada no depende del tamaño de la tabla. La salida puede comprimirse con gzip o,
+# si el paquete opcional zstandard está instalado, con zstd.
+# Toda escritura va a un archivo temporal en la misma carpeta que se renombra (os.replace) al terminar:
+# si la exportación falla a mitad, el archivo anterior queda intacto.
+# Uso: python sg_exportacion.py FUENTE ARCHIVO [--desde YYYY-MM-DD] [--hasta YYYY-MM-DD]
+#      (formato y compresión se deducen de la extensión: .csv, .jsonl, con .gz o .zst opcional)
+# Requiere: sg_veterinaria.py, sg_agenda.py, sg_reportes.py
+import contextlib, csv, dataclasses, gzip, io, json, os, tempfile
+from typing import Optional
+from sg_veterinaria import iterar_consulta
+from sg_agenda import normalizar_fecha
+from sg_reportes import obtener_resumen_general
+
+try: # Dependencia opcional: solo necesaria para exportar en .zst
+    import zstandard
+except ImportError:
+    zstandard = None
+
+FORMATOS_EXPORTACION = ("csv", "jsonl")
+COMPRESIONES = {".gz": "gzip", ".zst": "zstd"}
+
+# -----------------------------------------
+# Fuentes exportables
+# nombre -> (SQL, columnas, columna de fecha para filtrar o None)
+# -----------------------------------------
+FUENTES_EXPORTACION = {
+    "mascotas": (
+        "SELECT idMascota, nombre, especie, raza, edad, peso, idResponsable FROM mascotas ORDER BY idMascota",
+        ("idMascota", "nombre", "especie", "raza", "edad", "peso", "idResponsable"), None),
+    "responsables": (
+        "SELECT idResponsable, nombre, telefono, email FROM responsables ORDER BY idResponsable",
+        ("idResponsable", "nombre", "telefono", "email"), None),
+    "veterinarios": (
+        "SELECT idVeterinario, nombre, especialidad FROM veterinarios ORDER BY idVeterinario",
+        ("idVeterinario", "nombre", "especialidad"), None),
+    "reservas": (
+        "SELECT idReserva, idMascota, idVeterinario, fecha, hora, motivo, estadoMascota FROM reservas {filtro} ORDER BY idReserva",
+        ("idReserva", "idMascota", "idVeterinario", "fecha", "hora", "motivo", "estadoMascota"), "fecha"),
+    # Reservas con los datos de mascota, responsable y veterinario ya resueltos (para contabilidad y análisis)
+    "reservas_detalle": (
+        """SELECT r.idReserva, r.fecha, r.hora, r.motivo, r.estadoMascota,
+                  r.idMascota, m.nombre, m.especie, m.idResponsable, d.nombre, d.telefono,
+                  r.idVeterinario, v.nombre, v.especialidad
+           FROM reservas AS r
+           LEFT JOIN mascotas AS m ON m.idMascota = r.idMascota
+           LEFT JOIN responsables AS d ON d.idResponsable = m.idResponsable
+           LEFT JOIN veterinarios AS v ON v.idVeterinario = r.idVeterinario
+           {filtro} ORDER BY r.idReserva""",
+        ("idReserva", "fecha", "hora", "motivo", "estadoMascota", "idMascota", "mascota", "especie", "idResponsable",
+         "responsable", "telefono", "idVeterinario", "veterinario", "especialidad"), "r.fecha"),
+}
+
+# -----------------------------------------
+# Escritura atómica
+# Entrega un archivo temporal abierto en la carpeta destino; al salir sin errores lo sincroniza
+# a disco y lo renombra sobre `ruta`. Si hay una excepción, el temporal se cierra y se elimina.
+# -----------------------------------------
+@contextlib.contextmanager
+def escritura_atomica(ruta: str, modo: str = "wb", **opciones):
+    carpeta = os.path.dirname(os.path.abspath(ruta))
+    descriptor, temporal = tempfile.mkstemp(prefix=f".{os.path.basename(ruta)}.", suffix=".tmp", dir=carpeta)
+    archivo = None
+    try:
+        # mkstemp crea el archivo con permisos 0600: se conservan los del archivo anterior, o 0644
+        os.chmod(temporal, os.stat(ruta).st_mode & 0o777 if os.path.exists(ruta) else 0o644)
+        archivo = os.fdopen(descriptor, modo, **opciones)
+        with archivo:
+            yield archivo
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, ruta)
+    except BaseException:
+        if archivo is None: # Falló antes de que el archivo se hiciera cargo del descriptor
+            with contextlib.suppress(OSError):
+                os.close(descriptor)
+        with contextlib.suppress(OSError):
+            os.unlink(temporal)
+        raise
+
+@contextlib.contextmanager
+def _salida_texto(binario, compresion: Optional[str]):
+    # Envuelve el archivo binario con el compresor elegido y un TextIOWrapper UTF-8
+    if compresion is None:
+        flujo = binario
+    elif compresion == "gzip":
+        flujo = gzip.GzipFile(fileobj=binario, mode="wb")
+    elif compresion == "zstd":
+        if zstandard is None:
+            raise RuntimeError("La compresión zstd requiere el paquete 'zstandard' (pip install zstandard).")
+        flujo = zstandard.ZstdCompressor().stream_writer(binario, closefd=False)
+    else:
+        raise ValueError(f"Compresión no soportada: {compresion}")
+    texto = io.TextIOWrapper(flujo, encoding="utf-8", newline="")
+    try:
+        yield texto
+    finally:
+        texto.flush()
+        texto.detach()
+        if flujo is not binario:
+            flujo.close() # Escribe el final del flujo comprimido sin cerrar el archivo
+
+def detectar_salida(ruta: str) -> tuple:
+    # Devuelve (formato, compresión) a partir de la extensión, p. ej. "reservas.csv.gz" -> ("csv", "gzip")
+    base, extension = os.path.splitext(ruta.lower())
+    compresion = COMPRESIONES.get(extension)
+    if compresion is not None:
+        base, extension = os.path.splitext(base)
+    formato = extension.lstrip(".")
+    if formato not in FORMATOS_EXPORTACION:
+        raise ValueError(f"No se reconoce el formato de '{ruta}' (use .csv o .jsonl, con .gz o .zst opcional).")
+    return formato, compresion
+
+def _filas_fuente(fuente: str, fecha_desde: Optional[str], fecha_hasta: Optional[str]) -> tuple:
+    # Devuelve (columnas, iterador de filas) aplicando el filtro de fechas si la fuente lo admite
+    if fuente == "resumen_general":
+        resumen = dataclasses.asdict(obtener_resumen_general())
+        return tuple(resumen), iter([tuple(resumen.values())])
+    if fuente not in FUENTES_EXPORTACION:
+        raise ValueError(f"Fuente no exportable: {fuente}")
+    sql, columnas, columna_fecha = FUENTES_EXPORTACION[fuente]
+    condiciones, parametros = [], []
+    if fecha_desde or fecha_hasta:
+        if columna_fecha is None:
+            raise ValueError(f"La fuente '{fuente}' no admite filtro por fecha.")
+        if fecha_desde:
+            condiciones.append(f"{columna_fecha} >= ?"); parametros.append(normalizar_fecha(fecha_desde))
+        if fecha_hasta:
+            condiciones.append(f"{columna_fecha} <= ?"); parametros.append(normalizar_fecha(fecha_hasta))
+    filtro = "WHERE " + " AND ".join(condiciones) if condiciones else ""
+    return columnas, iterar_consulta(sql.replace("{filtro}", filtro), tuple(parametros))
+
+# -----------------------------------------
+# Exportar
+# fuente: mascotas, veterinarios, reservas, reservas_detalle o resumen_general.
+# Devuelve la cantidad de filas escritas.
+# -----------------------------------------
+def exportar(fuente: str, ruta: str, formato: Optional[str] = None, compresion: Optional[str] = None,
+    fecha_desde: Optional[str] = None, fecha_hasta: Optional[str] = None) -> int:
+    if formato is None:
+        formato, compresion_ruta = detectar_salida(ruta)
+        compresion = compresion or compresion_ruta
+    columnas, filas = _filas_fuente(fuente, fecha_desde, fecha_hasta)
+    escritas = 0
+    with escritura_atomica(ruta) as binario, _salida_texto(binario, compresion) as salida:
+        if formato == "csv":
+            escritor = csv.writer(salida)
+            escritor.writerow(columnas)
+            for fila in filas:
+                escritor.writerow(fila)
+                escritas += 1
+        elif formato == "jsonl":
+            for fila in filas:
+                salida.write(json.dumps(dict(zip(columnas, fila)), ensure_ascii=False) + "\n")
+                escritas += 1
+        else:
+            raise ValueError(f"Formato no soportado: {formato}")
+    return escritas
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Exporta tablas y reportes a CSV o JSON Lines")
+    parser.add_argument("fuente", choices=sorted(FUENTES_EXPORTACION) + ["resumen_general"])
+    parser.add_argument("archivo", help="Destino: .csv o .jsonl, con .gz o .zst opcional")
+    parser.add_argument("--desde", help="Fecha mínima de la reserva (YYYY-MM-DD)")
+    parser.add_argument("--hasta", help="Fecha máxima de la reserva (YYYY-MM-DD)")
+    args = parser.parse_args()
+    print(f"{exportar(args.fuente, args.archivo, fecha_desde=args.desde, fecha_hasta=args.hasta)} filas exportadas en {args.archivo}.")
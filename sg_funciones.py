@@ -1,58 +1,142 @@
-import os, sqlite3, hashlib, hmac, base64
+import os, sqlite3, hashlib, hmac, base64, asyncio
 from sg_veterinaria import *
 from sg_hash import * 
+from sg_autenticacion import obtener_servicio_hash, ServicioSaturado
+from sg_metricas import medir_controlador
+from sg_modelos import Usuario, fila_usuario, COLUMNAS_USUARIO
+from typing import Optional
 
 # -----------------------------------------
 # Función de Registrar Login
 # Registra un nuevo usuario en la tabla usuarios para utilizarse en login
-# Realiza hash de contraseña para aplicar seguridad
+# Realiza hash de contraseña para aplicar seguridad (en el pool de hashing, sin bloquear a otros logins)
+# Guarda junto al hash los parámetros N, R y P de la política vigente
 # -----------------------------------------
-def registrar_login(username: str, email: str, password: str, rol: str) -> None:
+@medir_controlador
+def registrar_login(username: str, email: str, password: str, rol: str) -> bool:
     try: # incio del bloque try para manejar excepciones
+        n, r, p = politica_actual() # Parámetros de scrypt vigentes
         salt = os.urandom(SALT_LEN) # Generar una sal aleatoria
-        hash = hash_password(password, salt) # Hashear la contraseña con la sal
+        hash = obtener_servicio_hash().hash(password, salt, n, r, p) # Hashear la contraseña con la sal
         salt_b64 = base64.b64encode(salt).decode("utf-8") # Codificar la sal en base64 para almacenarla en la BD
         hash_b64 = base64.b64encode(hash).decode("utf-8") # Codificar el hash en base64 para almacenarlo en la BD
         with conectar() as conn:
             cursor = conn.cursor()
             cursor.execute(
-            "INSERT INTO usuarios (nombre, email, password_hash, password_salt, rol) VALUES (?, ?, ?, ?, ?)",
-            (username, email, hash_b64, salt_b64, rol)
+            "INSERT INTO usuarios (nombre, email, password_hash, password_salt, rol, scrypt_n, scrypt_r, scrypt_p) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (username, email, hash_b64, salt_b64, rol, n, r, p)
             )
             conn.commit() # Confirmar los cambios en la BD y fin del bloque with
             print(f"\n Usuario '{username}' agregado correctamente.") # Confirmación de registro
+            return True
     except sqlite3.IntegrityError as e:
         print(f"\n Error de integridad (posible duplicado o constraint):", e)
     except sqlite3.OperationalError as e:
         print(f"\n Error operacional (consulta mal escrita o BD inaccesible):", e)
     except sqlite3.DatabaseError as e:
         print(f"\n Error general de base de datos:", e)
+    except ServicioSaturado as e:
+        print(f"\n", e)
         # fin del bloque try-except
+    return False
+
+# -----------------------------------------
+# Obtener usuario
+# Devuelve el Usuario (sin credenciales) con ese nombre, o None si no existe.
+# -----------------------------------------
+def obtener_usuario(username: str) -> Optional[Usuario]:
+    with conectar() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = fila_usuario
+        cursor.execute(f"SELECT {COLUMNAS_USUARIO} FROM usuarios WHERE nombre = ?", (username,))
+        return cursor.fetchone()
+
+# -----------------------------------------
+# Leer credenciales
+# Devuelve (idUsuario, sal, hash, (N, R, P)) almacenados para el usuario, o None si no existe.
+# -----------------------------------------
+def _leer_credenciales(username: str):
+    with conectar() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+        "SELECT idUsuario, password_salt, password_hash, scrypt_n, scrypt_r, scrypt_p FROM usuarios WHERE nombre = ?",
+        (username,)
+        )
+        row = cursor.fetchone() # Obtener la sal y el hash almacenados, se usa fetchone porque solo debe haber un usuario con ese nombre
+    if not row:
+        return None
+    return row[0], base64.b64decode(row[1]), base64.b64decode(row[2]), (row[3], row[4], row[5])
+
+# -----------------------------------------
+# Guardar rehash
+# Reemplaza el hash de un usuario por uno calculado con la política vigente.
+# El WHERE sobre el hash anterior evita pisar un cambio de contraseña concurrente.
+# -----------------------------------------
+def _guardar_rehash(id_usuario: int, hash_anterior: bytes, salt: bytes, hash_nuevo: bytes, parametros: tuple) -> None:
+    with conectar() as conn:
+        conn.execute(
+            """UPDATE usuarios SET password_hash = ?, password_salt = ?, scrypt_n = ?, scrypt_r = ?, scrypt_p = ?
+               WHERE idUsuario = ? AND password_hash = ?""",
+            (base64.b64encode(hash_nuevo).decode("utf-8"), base64.b64encode(salt).decode("utf-8"),
+             *parametros, id_usuario, base64.b64encode(hash_anterior).decode("utf-8"))
+        )
+        conn.commit()
 
 # -----------------------------------------
 # Función de Verificar Login
 # Compara un usuario en la tabla usuarios con lo ingresado para iniciar sesion
 # Realiza hash de contraseña para comparar con lo guardado en Registrar Login
+# El scrypt corre en el pool de hashing; la conexión a la BD se devuelve antes de calcularlo.
+# Si el hash guardado usa parámetros distintos de la política vigente, se recalcula y actualiza.
 # -----------------------------------------
+@medir_controlador
 def verificar_login(username: str, password: str) -> bool: # Verificar las credenciales de un usuario
     try: # inicio del bloque try para manejar excepciones   
-        with conectar() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-            "SELECT password_salt, password_hash FROM usuarios WHERE nombre = ?",
-            (username,)
-            )
-            row = cursor.fetchone() # Obtener la sal y el hash almacenados, se usa fetchone porque solo debe haber un usuario con ese nombre
-            if not row: # Si no se encuentra el usuario 
-                return False
-            salt_row = base64.b64decode(row[0])
-            hash_row = base64.b64decode(row[1])
-            hash_login = hash_password(password, salt_row)
-            return hmac.compare_digest(hash_login, hash_row)
+        credenciales = _leer_credenciales(username)
+        if not credenciales: # Si no se encuentra el usuario 
+            return False
+        id_usuario, salt_row, hash_row, parametros = credenciales
+        servicio = obtener_servicio_hash()
+        hash_login = servicio.hash(password, salt_row, *parametros)
+        if not hmac.compare_digest(hash_login, hash_row):
+            return False
+        if parametros != politica_actual(): # Rehash transparente con la política nueva
+            try:
+                salt_nueva = os.urandom(SALT_LEN)
+                _guardar_rehash(id_usuario, hash_row, salt_nueva, servicio.hash(password, salt_nueva, *politica_actual()), politica_actual())
+            except (sqlite3.DatabaseError, ServicioSaturado):
+                pass # El login es válido igual; se reintenta en el próximo ingreso
+        return True
     except sqlite3.IntegrityError as e:
         print(f"\n Error de integridad (posible duplicado o constraint):", e)
     except sqlite3.OperationalError as e:
         print(f"\n Error operacional (consulta mal escrita o BD inaccesible):", e)
     except sqlite3.DatabaseError as e:
         print(f"\n Error general de base de datos:", e)
+    except ServicioSaturado as e:
+        print(f"\n", e)
         # fin del bloque try-except
+    return False
+
+# -----------------------------------------
+# Función de Verificar Login (asyncio)
+# Igual que verificar_login pero sin bloquear el event loop: la consulta corre en un hilo
+# y el scrypt se espera como futuro del pool de hashing.
+# -----------------------------------------
+async def verificar_login_async(username: str, password: str) -> bool:
+    credenciales = await asyncio.to_thread(_leer_credenciales, username)
+    if not credenciales:
+        return False
+    id_usuario, salt_row, hash_row, parametros = credenciales
+    servicio = obtener_servicio_hash()
+    hash_login = await servicio.hash_async(password, salt_row, *parametros)
+    if not hmac.compare_digest(hash_login, hash_row):
+        return False
+    if parametros != politica_actual(): # Rehash transparente con la política nueva
+        try:
+            salt_nueva = os.urandom(SALT_LEN)
+            hash_nuevo = await servicio.hash_async(password, salt_nueva, *politica_actual())
+            await asyncio.to_thread(_guardar_rehash, id_usuario, hash_row, salt_nueva, hash_nuevo, politica_actual())
+        except (sqlite3.DatabaseError, ServicioSaturado):
+            pass # El login es válido igual; se reintenta en el próximo ingreso
+    return True
@@ -1,4 +1,5 @@
-import os, sqlite3, hashlib, hmac, base64
+import os, sqlite3, hashlib, hmac, base64, json, time
+from typing import Optional
 # Parametros para el scrypt
 # Valores recomendados por OWASP (https://cheatsheetseries.owasp.org/cheatsheets/Password_Storage_Cheat_Sheet.html)
 # Ajustar segun las necesidades de seguridad y rendimiento
@@ -8,22 +9,96 @@ import os, sqlite3, hashlib, hmac, base64
 # SALT_LEN es la longitud de la sal utilizada
 # Valores por defecto: N=16384, R=8, P=1, KEY_LEN=32, SALT_LEN=16
 # Estos valores son un buen compromiso entre seguridad y rendimiento para la mayoría de las aplicaciones
+# La política vigente puede reemplazarse con el archivo generado por la calibración (ver calibrar_scrypt)
+# Cada usuario guarda los N, R y P con que se calculó su hash, por lo que cambiar la política no invalida contraseñas
 SCRYPT_N = 2**14       
 SCRYPT_R = 8           
 SCRYPT_P = 1            
 KEY_LEN = 32  
 SALT_LEN = 16 
+POLITICA_ARCHIVO = os.environ.get("SG_SCRYPT_POLITICA", "sg_scrypt.json") # Política calibrada para este servidor
+
+# -----------------------------------------
+# Cargar política de scrypt
+# Si existe el archivo de calibración, sus N, R y P reemplazan a los valores por defecto.
+# -----------------------------------------
+def cargar_politica(ruta: str = POLITICA_ARCHIVO) -> None:
+    global SCRYPT_N, SCRYPT_R, SCRYPT_P
+    try:
+        with open(ruta, encoding="utf-8") as archivo:
+            politica = json.load(archivo)
+        SCRYPT_N, SCRYPT_R, SCRYPT_P = int(politica["n"]), int(politica["r"]), int(politica["p"])
+    except FileNotFoundError:
+        pass
+
+def politica_actual() -> tuple: # (N, R, P) con que se calculan los hashes nuevos
+    return (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
+cargar_politica()
 
 # -----------------------------------------
 # Función de Hash Password
 # Logica que encripta caracteres mediante hashlib.scrypt
+# Sin parámetros explícitos usa la política vigente.
 # -----------------------------------------
-def hash_password(password: str, salt: bytes) -> bytes:
+def hash_password(password: str, salt: bytes, n: Optional[int] = None, r: Optional[int] = None, p: Optional[int] = None) -> bytes:
+    n = n or SCRYPT_N
+    r = r or SCRYPT_R
+    p = p or SCRYPT_P
     return hashlib.scrypt(
         password = password.encode("utf-8"),
         salt = salt,
-        n = SCRYPT_N,
-        r = SCRYPT_R,
-        p = SCRYPT_P,
+        n = n,
+        r = r,
+        p = p,
+        maxmem = 2 * 128 * n * r * p + 1024 * 1024, # El límite por defecto de OpenSSL (32 MB) impide N > 2**14
         dklen = KEY_LEN
     )
+
+# -----------------------------------------
+# Calibrar scrypt
+# Mide este servidor y elige el mayor N (potencia de 2, mínimo 2**14) cuyo tiempo no supera
+# objetivo_ms y cuya memoria (128 * N * R) cabe en memoria_max_mb.
+# Devuelve la política elegida con su tiempo medido. ValueError si ni el mínimo cabe en memoria_max_mb.
+# -----------------------------------------
+def calibrar_scrypt(objetivo_ms: float = 100.0, memoria_max_mb: int = 64, r: int = 8, p: int = 1, repeticiones: int = 3) -> dict:
+    elegido = None
+    n = 2**14
+    if 128 * n * r > memoria_max_mb * 1024 * 1024:
+        minimo_mb = -(-128 * n * r // (1024 * 1024))
+        raise ValueError(f"scrypt necesita al menos {minimo_mb} MB por hash (N=2**14, R={r}); se indicaron {memoria_max_mb} MB.")
+    while 128 * n * r <= memoria_max_mb * 1024 * 1024:
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            hash_password("calibracion", os.urandom(SALT_LEN), n, r, p)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        medido = sorted(tiempos)[len(tiempos) // 2]
+        if medido > objetivo_ms and elegido is not None:
+            break
+        elegido = {"n": n, "r": r, "p": p, "ms": round(medido, 1), "memoria_mb": 128 * n * r // (1024 * 1024)}
+        if medido > objetivo_ms: # Ni el mínimo cumple el objetivo: se queda en el mínimo
+            break
+        n *= 2
+    return elegido
+
+def guardar_politica(politica: dict, ruta: str = POLITICA_ARCHIVO) -> None:
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump({"n": politica["n"], "r": politica["r"], "p": politica["p"]}, archivo, indent=2)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Calibra los parámetros de scrypt para este servidor")
+    parser.add_argument("--objetivo-ms", type=float, default=100.0, help="Latencia objetivo por hash")
+    parser.add_argument("--memoria-mb", type=int, default=64, help="Memoria máxima por hash")
+    parser.add_argument("--guardar", action="store_true", help=f"Guardar la política en {POLITICA_ARCHIVO}")
+    args = parser.parse_args()
+    try:
+        politica = calibrar_scrypt(args.objetivo_ms, args.memoria_mb)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Política sugerida: N={politica['n']}, R={politica['r']}, P={politica['p']} "
+          f"({politica['ms']} ms, {politica['memoria_mb']} MB por hash)")
+    if args.guardar:
+        guardar_politica(politica)
+        print(f"Guardada en {POLITICA_ARCHIVO}. Los usuarios se actualizan al iniciar sesión.")
@@ -0,0 +1,257 @@
+# sg_importacion.py - Importación masiva de responsables, mascotas, veterinarios y reservas desde CSV o JSON Lines.
+# Descripción: Lee el archivo en streaming, valida cada fila y la inserta con executemany en lotes,
+# un lote por transacción (BEGIN IMMEDIATE + commit), en lugar de una conexión y un commit por registro.
+# Para reservas, las claves foráneas se resuelven por lote con una sola consulta por tabla y los
+# choques de agenda se comprueban contra las reservas existentes de los (veterinario, fecha) del lote.
+# Las mascotas referencian a su responsable por idResponsable: se importan los responsables primero.
+# Las filas inválidas se informan con su número de línea sin abortar el resto de la importación.
+# Uso: python sg_importacion.py {responsables,mascotas,veterinarios,reservas} ARCHIVO [--formato csv|jsonl] [--lote N]
+# Requiere: sg_veterinaria.py, sg_agenda.py
+import bisect, csv, json, os, sqlite3, time
+from dataclasses import dataclass, field
+from typing import Optional
+from sg_veterinaria import conectar, iniciar_escritura
+from sg_agenda import DURACION_CITA_MINUTOS, a_minutos, normalizar_fecha, normalizar_hora
+
+TAMANO_LOTE_IMPORTACION = 5000 # Filas por transacción
+MAX_ERRORES_REPORTADOS = 1000 # Errores que se guardan con detalle (el resto solo se cuentan)
+
+def _texto(valor, obligatorio: bool = False) -> Optional[str]:
+    if valor is None or str(valor).strip() == "":
+        if obligatorio:
+            raise ValueError("valor obligatorio vacío")
+        return None
+    return str(valor).strip()
+
+def _entero(valor, obligatorio: bool = False) -> Optional[int]:
+    texto = _texto(valor, obligatorio)
+    return None if texto is None else int(texto)
+
+def _real(valor, obligatorio: bool = False) -> Optional[float]:
+    texto = _texto(valor, obligatorio)
+    return None if texto is None else float(texto)
+
+# -----------------------------------------
+# Esquema de importación por tabla
+# (columna, conversor, obligatoria) en el orden del INSERT.
+# -----------------------------------------
+COLUMNAS_IMPORTACION = {
+    "mascotas": [
+        ("nombre", _texto, True), ("especie", _texto, False), ("raza", _texto, False),
+        ("edad", _entero, False), ("peso", _real, False), ("idResponsable", _entero, False),
+    ],
+    "responsables": [
+        ("nombre", _texto, True), ("telefono", _texto, False), ("email", _texto, False),
+    ],
+    "veterinarios": [
+        ("nombre", _texto, True), ("especialidad", _texto, False),
+    ],
+    "reservas": [
+        ("idMascota", _entero, True), ("idVeterinario", _entero, True),
+        ("fecha", lambda v, o: normalizar_fecha(_texto(v, o)), True),
+        ("hora", lambda v, o: normalizar_hora(_texto(v, o)), True),
+        ("motivo", _texto, False), ("estadoMascota", _texto, False),
+    ],
+}
+
+@dataclass
+class ResultadoImportacion:
+    tabla: str
+    leidas: int = 0
+    insertadas: int = 0
+    con_error: int = 0
+    segundos: float = 0.0
+    errores: list = field(default_factory=list) # (línea, mensaje), hasta MAX_ERRORES_REPORTADOS
+
+    @property
+    def filas_por_segundo(self) -> float:
+        return self.leidas / self.segundos if self.segundos else 0.0
+
+    def registrar_error(self, linea: int, mensaje: str) -> None:
+        self.con_error += 1
+        if len(self.errores) < MAX_ERRORES_REPORTADOS:
+            self.errores.append((linea, mensaje))
+
+# -----------------------------------------
+# Lectura en streaming
+# Genera (número de línea, dict) sin cargar el archivo en memoria.
+# -----------------------------------------
+def detectar_formato(ruta: str) -> str:
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    raise ValueError(f"No se reconoce el formato de '{ruta}', indique csv o jsonl.")
+
+def leer_filas(ruta: str, formato: Optional[str] = None):
+    formato = formato or detectar_formato(ruta)
+    with open(ruta, newline="", encoding="utf-8") as archivo:
+        if formato == "csv":
+            lector = csv.DictReader(archivo)
+            for fila in lector:
+                yield lector.line_num, fila
+        elif formato == "jsonl":
+            for numero, linea in enumerate(archivo, start=1):
+                if not linea.strip():
+                    continue
+                try:
+                    fila = json.loads(linea)
+                except ValueError as e:
+                    yield numero, ValueError(f"JSON inválido: {e}")
+                    continue
+                yield numero, fila if isinstance(fila, dict) else ValueError("se esperaba un objeto JSON")
+        else:
+            raise ValueError(f"Formato no soportado: {formato}")
+
+def _validar(columnas: list, fila) -> tuple:
+    if isinstance(fila, Exception):
+        raise fila
+    valores = []
+    for nombre, conversor, obligatoria in columnas:
+        try:
+            valores.append(conversor(fila.get(nombre), obligatoria))
+        except (ValueError, TypeError, AttributeError) as e:
+            raise ValueError(f"columna '{nombre}': {e}") from None
+    return tuple(valores)
+
+# -----------------------------------------
+# Resolución de claves foráneas por lote
+# Devuelve el subconjunto de IDs que existen; los ya confirmados se recuerdan en `conocidos`.
+# -----------------------------------------
+def _ids_existentes(conn: sqlite3.Connection, tabla: str, columna: str, ids: set, conocidos: set) -> set:
+    pendientes = ids - conocidos
+    if pendientes:
+        conocidos.update(fila[0] for fila in conn.execute(
+            f"SELECT {columna} FROM {tabla} WHERE {columna} IN (SELECT value FROM json_each(?))",
+            (json.dumps(sorted(pendientes)),)
+        ))
+    return ids & conocidos
+
+def _agendas_existentes(conn: sqlite3.Connection, pares: set) -> dict:
+    # (veterinario, fecha) -> minutos de inicio ordenados, con una consulta sobre el índice compuesto
+    agendas = {par: [] for par in pares}
+    for id_vet, fecha, hora in conn.execute(
+        """SELECT r.idVeterinario, r.fecha, r.hora
+           FROM json_each(?) AS j
+           JOIN reservas AS r ON r.idVeterinario = json_extract(j.value, '$[0]') AND r.fecha = json_extract(j.value, '$[1]')""",
+        (json.dumps(sorted(pares)),)
+    ):
+        try:
+            agendas[(id_vet, fecha)].append(a_minutos(hora))
+        except (ValueError, AttributeError, TypeError): # Registros antiguos sin hora válida
+            continue
+    for inicios in agendas.values():
+        inicios.sort()
+    return agendas
+
+def _filtrar_mascotas(conn: sqlite3.Connection, lote: list, resultado: ResultadoImportacion, cache_fk: dict) -> list:
+    # Descarta del lote las mascotas cuyo responsable no existe (sin responsable se aceptan)
+    responsables = _ids_existentes(conn, "responsables", "idResponsable", {v[5] for _, v in lote if v[5] is not None}, cache_fk["responsables"])
+    validas = []
+    for linea, valores in lote:
+        if valores[5] is not None and valores[5] not in responsables:
+            resultado.registrar_error(linea, f"el responsable con ID {valores[5]} no existe")
+            continue
+        validas.append((linea, valores))
+    return validas
+
+def _filtrar_reservas(conn: sqlite3.Connection, lote: list, resultado: ResultadoImportacion, cache_fk: dict) -> list:
+    # Descarta del lote las reservas con mascota o veterinario inexistente o que chocan en la agenda
+    mascotas = _ids_existentes(conn, "mascotas", "idMascota", {v[0] for _, v in lote}, cache_fk["mascotas"])
+    veterinarios = _ids_existentes(conn, "veterinarios", "idVeterinario", {v[1] for _, v in lote}, cache_fk["veterinarios"])
+    agendas = _agendas_existentes(conn, {(v[1], v[2]) for _, v in lote if v[1] in veterinarios})
+    validas = []
+    for linea, valores in lote:
+        if valores[0] not in mascotas:
+            resultado.registrar_error(linea, f"la mascota con ID {valores[0]} no existe")
+            continue
+        if valores[1] not in veterinarios:
+            resultado.registrar_error(linea, f"el veterinario con ID {valores[1]} no existe")
+            continue
+        inicios = agendas[(valores[1], valores[2])]
+        inicio = a_minutos(valores[3])
+        i = bisect.bisect_right(inicios, inicio - DURACION_CITA_MINUTOS)
+        if i < len(inicios) and inicios[i] < inicio + DURACION_CITA_MINUTOS:
+            resultado.registrar_error(linea, f"choca con otra reserva del veterinario {valores[1]} a las {inicios[i] // 60:02d}:{inicios[i] % 60:02d}")
+            continue
+        inicios.insert(i, inicio) # Las filas siguientes del mismo lote también se comparan con esta
+        validas.append((linea, valores))
+    return validas
+
+# -----------------------------------------
+# Insertar un lote
+# executemany en una transacción; si una restricción falla, se reintenta fila por fila
+# dentro de la misma transacción para identificar y saltar solo las filas culpables.
+# -----------------------------------------
+def _insertar_lote(conn: sqlite3.Connection, tabla: str, columnas: list, lote: list,
+    resultado: ResultadoImportacion, cache_fk: dict) -> None:
+    sql = f"INSERT INTO {tabla} ({', '.join(c[0] for c in columnas)}) VALUES ({', '.join('?' for _ in columnas)})"
+    iniciar_escritura(conn)
+    try:
+        if tabla == "reservas":
+            lote = _filtrar_reservas(conn, lote, resultado, cache_fk)
+        elif tabla == "mascotas":
+            lote = _filtrar_mascotas(conn, lote, resultado, cache_fk)
+        try:
+            conn.execute("SAVEPOINT lote_importacion")
+            conn.executemany(sql, (valores for _, valores in lote))
+            conn.execute("RELEASE lote_importacion")
+            resultado.insertadas += len(lote)
+        except sqlite3.IntegrityError:
+            conn.execute("ROLLBACK TO lote_importacion")
+            conn.execute("RELEASE lote_importacion")
+            for linea, valores in lote:
+                try:
+                    conn.execute(sql, valores)
+                    resultado.insertadas += 1
+                except sqlite3.IntegrityError as e:
+                    resultado.registrar_error(linea, f"restricción de la base: {e}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+# -----------------------------------------
+# Importar archivo
+# Devuelve un ResultadoImportacion con filas leídas, insertadas, errores por línea y velocidad.
+# -----------------------------------------
+def importar(tabla: str, ruta: str, formato: Optional[str] = None, tamano_lote: int = TAMANO_LOTE_IMPORTACION) -> ResultadoImportacion:
+    if tabla not in COLUMNAS_IMPORTACION:
+        raise ValueError(f"Tabla no importable: {tabla}")
+    columnas = COLUMNAS_IMPORTACION[tabla]
+    resultado = ResultadoImportacion(tabla)
+    cache_fk = {"mascotas": set(), "veterinarios": set(), "responsables": set()}
+    inicio = time.perf_counter()
+    with conectar() as conn:
+        lote = []
+        for linea, fila in leer_filas(ruta, formato):
+            resultado.leidas += 1
+            try:
+                lote.append((linea, _validar(columnas, fila)))
+            except ValueError as e:
+                resultado.registrar_error(linea, str(e))
+                continue
+            if len(lote) >= tamano_lote:
+                _insertar_lote(conn, tabla, columnas, lote, resultado, cache_fk)
+                lote = []
+        if lote:
+            _insertar_lote(conn, tabla, columnas, lote, resultado, cache_fk)
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Importa registros en lote desde CSV o JSON Lines")
+    parser.add_argument("tabla", choices=sorted(COLUMNAS_IMPORTACION))
+    parser.add_argument("archivo")
+    parser.add_argument("--formato", choices=["csv", "jsonl"], help="Por defecto se deduce de la extensión")
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE_IMPORTACION, help="Filas por transacción")
+    args = parser.parse_args()
+    r = importar(args.tabla, args.archivo, args.formato, args.lote)
+    for linea, mensaje in sorted(r.errores):
+        print(f"Línea {linea}: {mensaje}")
+    if r.con_error > len(r.errores):
+        print(f"... y {r.con_error - len(r.errores)} errores más.")
+    print(f"{r.tabla}: {r.leidas} filas leídas, {r.insertadas} insertadas, {r.con_error} con error "
+          f"({r.segundos:.2f} s, {r.filas_por_segundo:.0f} filas/s).")
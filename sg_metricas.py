@@ -0,0 +1,317 @@
+# sg_metricas.py - Instrumentación de consultas SQL y controladores.
+# Descripción: Las conexiones del pool entregan cursores CursorMedido, que miden cada sentencia
+# (execute más la lectura de sus filas) y la agregan por texto SQL: llamadas, filas, tiempo total,
+# máximo e histograma de latencias. Las sentencias que superan UMBRAL_LENTA_MS se escriben en el
+# registro de consultas lentas junto con su EXPLAIN QUERY PLAN.
+# medir_controlador() cuenta llamadas y tiempo de cada controlador y les atribuye las consultas que ejecutan.
+# instantanea_metricas() devuelve todo como dict para mostrarlo o exportarlo.
+# No importa sg_veterinaria: es sg_veterinaria quien envuelve sus cursores con este módulo.
+import contextvars, functools, json, logging, os, re, threading, time, weakref
+from collections import deque
+from typing import Optional
+
+METRICAS_ACTIVAS = os.environ.get("SG_METRICAS", "1") != "0"
+UMBRAL_LENTA_MS = float(os.environ.get("SG_UMBRAL_LENTA_MS", "100")) # Desde cuántos ms una sentencia es lenta
+ARCHIVO_CONSULTAS_LENTAS = os.environ.get("SG_LOG_LENTAS", "sg_consultas_lentas.log")
+LENTAS_EN_MEMORIA = 50 # Últimas consultas lentas que guarda la instantánea
+LIMITES_HISTOGRAMA_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000) # Cubetas; la última es "más de 1000 ms"
+
+_ESPACIOS = re.compile(r"\s+")
+_controlador_actual = contextvars.ContextVar("controlador_actual", default=None)
+
+@functools.lru_cache(maxsize=1024) # Los controladores repiten siempre los mismos textos SQL
+def _normalizar_sql(sql: str) -> str:
+    return _ESPACIOS.sub(" ", sql).strip()
+
+def _cubeta(ms: float) -> int:
+    for i, limite in enumerate(LIMITES_HISTOGRAMA_MS):
+        if ms <= limite:
+            return i
+    return len(LIMITES_HISTOGRAMA_MS)
+
+# -----------------------------------------
+# Registro de métricas
+# Acumula estadísticas por sentencia y por controlador; protegido por un lock.
+# -----------------------------------------
+class RegistroMetricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self) -> None:
+        with self._lock:
+            self._sentencias = {} # sql -> dict de acumulados
+            self._controladores = {} # nombre -> dict de acumulados
+            self._lentas = deque(maxlen=LENTAS_EN_MEMORIA)
+            self.desde = time.time()
+
+    def registrar_sentencia(self, sql: str, ms: float, filas: int) -> None:
+        with self._lock:
+            s = self._sentencias.get(sql)
+            if s is None:
+                s = self._sentencias[sql] = {"llamadas": 0, "filas": 0, "total_ms": 0.0, "max_ms": 0.0,
+                                             "histograma": [0] * (len(LIMITES_HISTOGRAMA_MS) + 1), "controladores": {}}
+            s["llamadas"] += 1
+            s["filas"] += filas
+            s["total_ms"] += ms
+            s["max_ms"] = max(s["max_ms"], ms)
+            s["histograma"][_cubeta(ms)] += 1
+            controlador = _controlador_actual.get()
+            if controlador is not None:
+                s["controladores"][controlador] = s["controladores"].get(controlador, 0) + 1
+                c = self._controladores.get(controlador)
+                if c is not None:
+                    c["consultas"] += 1
+
+    def registrar_controlador(self, nombre: str, ms: float, error: bool) -> None:
+        with self._lock:
+            c = self._controladores.setdefault(nombre, {"llamadas": 0, "errores": 0, "total_ms": 0.0, "max_ms": 0.0, "consultas": 0})
+            c["llamadas"] += 1
+            c["errores"] += int(error)
+            c["total_ms"] += ms
+            c["max_ms"] = max(c["max_ms"], ms)
+
+    def iniciar_controlador(self, nombre: str) -> None: # Crea la entrada antes de sus consultas
+        with self._lock:
+            self._controladores.setdefault(nombre, {"llamadas": 0, "errores": 0, "total_ms": 0.0, "max_ms": 0.0, "consultas": 0})
+
+    def registrar_lenta(self, entrada: dict) -> None:
+        with self._lock:
+            self._lentas.append(entrada)
+
+    def instantanea(self, limite: int = 20) -> dict:
+        with self._lock:
+            sentencias = []
+            for sql, s in self._sentencias.items():
+                sentencias.append({
+                    "sql": sql, "llamadas": s["llamadas"], "filas": s["filas"],
+                    "total_ms": round(s["total_ms"], 3), "media_ms": round(s["total_ms"] / s["llamadas"], 3),
+                    "max_ms": round(s["max_ms"], 3), "p95_ms": _percentil_histograma(s["histograma"], 0.95),
+                    "histograma": dict(zip([f"<={l}ms" for l in LIMITES_HISTOGRAMA_MS] + [">1000ms"], s["histograma"])),
+                    "controladores": dict(s["controladores"]),
+                })
+            sentencias.sort(key=lambda s: s["total_ms"], reverse=True)
+            return {
+                "desde": self.desde,
+                "umbral_lenta_ms": UMBRAL_LENTA_MS,
+                "sentencias": sentencias[:limite],
+                "sentencias_distintas": len(sentencias),
+                "controladores": {n: {**c, "total_ms": round(c["total_ms"], 3), "max_ms": round(c["max_ms"], 3)}
+                                  for n, c in sorted(self._controladores.items())},
+                "lentas": list(self._lentas),
+            }
+
+def _percentil_histograma(histograma: list, p: float):
+    # Cota superior de la cubeta que contiene el percentil (None si cae en la última, sin límite)
+    total = sum(histograma)
+    acumulado = 0
+    for i, cantidad in enumerate(histograma):
+        acumulado += cantidad
+        if total and acumulado >= p * total:
+            return LIMITES_HISTOGRAMA_MS[i] if i < len(LIMITES_HISTOGRAMA_MS) else None
+    return None
+
+registro_metricas = RegistroMetricas()
+
+_log_lentas = logging.getLogger("sg_veterinaria.consultas_lentas")
+_log_lentas.propagate = False
+_log_lentas_lock = threading.Lock()
+
+def _escribir_lenta(entrada: dict) -> None:
+    with _log_lentas_lock:
+        if not _log_lentas.handlers: # El archivo se abre recién con la primera consulta lenta
+            _log_lentas.addHandler(logging.FileHandler(ARCHIVO_CONSULTAS_LENTAS, encoding="utf-8", delay=True))
+            _log_lentas.setLevel(logging.WARNING)
+    _log_lentas.warning(json.dumps(entrada, ensure_ascii=False))
+
+# -----------------------------------------
+# Cursor medido
+# Envuelve un sqlite3.Cursor. Cada sentencia se cierra (y se registra) al ejecutar otra,
+# al agotar sus filas, al cerrar el cursor, al terminar un execute sin filas (INSERT, UPDATE,
+# DELETE...) o al devolver la conexión al pool (MedicionesPendientes).
+# Si el cursor deja de usarse antes, el finalizador solo suma los contadores: el recolector puede
+# correr en otro hilo o con la conexión ya prestada a otro. Una sentencia lenta queda pendiente
+# en su préstamo, con el controlador que la ejecutó, y se registra al devolver la conexión.
+# -----------------------------------------
+class CursorMedido:
+    def __init__(self, conn, cursor, pendientes: Optional["MedicionesPendientes"] = None):
+        self._conn = conn
+        self._cursor = cursor
+        self._pendientes = pendientes
+        self._sql = None
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+    def __setattr__(self, nombre, valor): # row_factory, arraysize, ... van al cursor real
+        if nombre.startswith("_"):
+            object.__setattr__(self, nombre, valor)
+        else:
+            setattr(self._cursor, nombre, valor)
+
+    def _abrir(self, sql: str, parametros) -> None:
+        self._cerrar_medicion()
+        self._sql, self._parametros, self._ms, self._filas = sql, parametros, 0.0, 0
+        self._controlador = _controlador_actual.get()
+
+    def _cerrar_medicion(self, registrar_lenta: bool = True) -> None:
+        if self._sql is None:
+            return
+        sql, ms, filas = _normalizar_sql(self._sql), self._ms, self._filas
+        if filas == 0 and self._cursor.rowcount > 0: # INSERT/UPDATE/DELETE: filas afectadas
+            filas = self._cursor.rowcount
+        registro_metricas.registrar_sentencia(sql, ms, filas)
+        if ms >= UMBRAL_LENTA_MS:
+            entrada = {"fecha": time.strftime("%Y-%m-%d %H:%M:%S"), "ms": round(ms, 3), "filas": filas, "sql": sql,
+                       "controlador": self._controlador}
+            if registrar_lenta:
+                _registrar_lenta(self._conn, entrada, self._sql, self._parametros)
+            elif self._pendientes is not None:
+                self._pendientes.lentas.append((entrada, self._sql, self._parametros))
+        self._sql = None
+
+    def _medir(self, funcion, *args):
+        inicio = time.perf_counter()
+        try:
+            return funcion(*args)
+        finally:
+            if self._sql is not None:
+                self._ms += (time.perf_counter() - inicio) * 1000
+
+    def execute(self, sql: str, parametros=()):
+        self._abrir(sql, parametros)
+        self._medir(self._cursor.execute, sql, parametros)
+        if self._cursor.description is None: # Sin filas que leer: la sentencia ya terminó
+            self._cerrar_medicion()
+        return self
+
+    def executemany(self, sql: str, secuencia):
+        self._abrir(sql, None)
+        self._medir(self._cursor.executemany, sql, secuencia)
+        self._cerrar_medicion()
+        return self
+
+    def executescript(self, script: str):
+        self._cerrar_medicion()
+        self._cursor.executescript(script)
+        return self
+
+    def fetchone(self):
+        fila = self._medir(self._cursor.fetchone)
+        if fila is None:
+            self._cerrar_medicion()
+        elif self._sql is not None:
+            self._filas += 1
+        return fila
+
+    def fetchmany(self, size: int = None):
+        filas = self._medir(self._cursor.fetchmany, size if size is not None else self._cursor.arraysize)
+        if self._sql is not None:
+            self._filas += len(filas)
+            if len(filas) < (size if size is not None else self._cursor.arraysize):
+                self._cerrar_medicion()
+        return filas
+
+    def fetchall(self):
+        filas = self._medir(self._cursor.fetchall)
+        if self._sql is not None:
+            self._filas += len(filas)
+            self._cerrar_medicion()
+        return filas
+
+    def __iter__(self):
+        while True:
+            lote = self.fetchmany(100)
+            yield from lote
+            if len(lote) < 100:
+                return
+
+    def close(self) -> None:
+        self._cerrar_medicion()
+        self._cursor.close()
+
+    def __del__(self):
+        try:
+            self._cerrar_medicion(registrar_lenta=False)
+        except Exception:
+            pass
+
+def _plan(conn, sql: str, parametros) -> list:
+    # EXPLAIN QUERY PLAN sobre la conexión real (no se mide ni ejecuta la sentencia)
+    if parametros is None: # executemany: los parámetros son una secuencia de filas
+        return []
+    try:
+        return [fila[3] for fila in conn.execute("EXPLAIN QUERY PLAN " + sql, parametros)]
+    except Exception:
+        return []
+
+def _registrar_lenta(conn, entrada: dict, sql: str, parametros) -> None:
+    entrada["plan"] = _plan(conn, sql, parametros)
+    registro_metricas.registrar_lenta(entrada)
+    _escribir_lenta(entrada)
+
+# -----------------------------------------
+# Mediciones pendientes de un préstamo
+# El pool crea una por préstamo y llama a cerrar() antes de devolver la conexión, mientras nadie más
+# puede usarla: cierra las sentencias que siguen abiertas (por ejemplo, leídas con un solo fetchone)
+# y registra las lentas que dejaron los cursores ya descartados.
+# -----------------------------------------
+class MedicionesPendientes:
+    def __init__(self):
+        self.cursores = weakref.WeakSet() # Débiles: no retrasan el cierre de ningún cursor
+        self.lentas = []
+
+    def cerrar(self, conn) -> None:
+        for cursor in list(self.cursores):
+            cursor._cerrar_medicion()
+        self.cursores.clear()
+        lentas, self.lentas = self.lentas, []
+        for entrada, sql, parametros in lentas:
+            _registrar_lenta(conn, entrada, sql, parametros)
+
+def envolver_cursor(conn, cursor, pendientes: Optional[MedicionesPendientes] = None):
+    if not METRICAS_ACTIVAS:
+        return cursor
+    medido = CursorMedido(conn, cursor, pendientes)
+    if pendientes is not None:
+        pendientes.cursores.add(medido)
+    return medido
+
+# -----------------------------------------
+# Medir controlador
+# Decorador: cuenta llamadas, errores y tiempo; las consultas ejecutadas dentro se le atribuyen.
+# En llamadas anidadas, las consultas se atribuyen al controlador más interno.
+# -----------------------------------------
+def medir_controlador(funcion):
+    nombre = funcion.__name__
+
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        if not METRICAS_ACTIVAS:
+            return funcion(*args, **kwargs)
+        registro_metricas.iniciar_controlador(nombre)
+        marca = _controlador_actual.set(nombre)
+        inicio = time.perf_counter()
+        error = True
+        try:
+            resultado = funcion(*args, **kwargs)
+            error = False
+            return resultado
+        finally:
+            _controlador_actual.reset(marca)
+            registro_metricas.registrar_controlador(nombre, (time.perf_counter() - inicio) * 1000, error)
+    return envoltura
+
+def activar_metricas(activas: bool = True) -> None: # Afecta a los cursores creados desde ahora
+    global METRICAS_ACTIVAS
+    METRICAS_ACTIVAS = activas
+
+def configurar_umbral_lenta(ms: float) -> None:
+    global UMBRAL_LENTA_MS
+    UMBRAL_LENTA_MS = ms
+
+def instantanea_metricas(limite: int = 20) -> dict:
+    return registro_metricas.instantanea(limite)
+
+def reiniciar_metricas() -> None:
+    registro_metricas.reiniciar()
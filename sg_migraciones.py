@@ -0,0 +1,256 @@
+# sg_migraciones.py - Migraciones versionadas del esquema de la base de datos.
+# Descripción: Cada migración tiene un número de versión, una descripción y una lista de sentencias SQL
+# (o una función que recibe la conexión). La versión aplicada se guarda en la tabla schema_version,
+# por lo que aplicar_migraciones() es idempotente y puede llamarse en cada arranque.
+# Uso manual: python sg_migraciones.py [--verificar]
+# Requiere: sg_veterinaria.py, sg_estadisticas.py, sg_cache.py, sg_busqueda.py
+import sqlite3, sys
+from sg_veterinaria import *
+from sg_estadisticas import SQL_ESQUEMA_ESTADISTICAS, reconstruir_estadisticas
+from sg_cache import SQL_ESQUEMA_VERSIONES
+from sg_busqueda import esquema_busqueda, borrar_busqueda, reconstruir_indices_busqueda, plegar
+
+# -----------------------------------------
+# Migración 1: tablas base
+# Reutiliza las funciones de creación existentes (CREATE TABLE IF NOT EXISTS),
+# por lo que es segura sobre bases creadas antes de existir las migraciones.
+# -----------------------------------------
+def _migracion_tablas_base(conn: sqlite3.Connection) -> None:
+    crear_tabla_usuarios()
+    crear_tablas_veterinaria()
+    crear_tabla_mascotas()
+    crear_tabla_reservas()
+
+# -----------------------------------------
+# Migración 3: contadores estadísticos
+# Crea tablas y triggers y los inicializa con un recorrido completo.
+# -----------------------------------------
+def _migracion_estadisticas(conn: sqlite3.Connection) -> None:
+    for sentencia in SQL_ESQUEMA_ESTADISTICAS:
+        conn.execute(sentencia)
+    reconstruir_estadisticas(conn)
+
+# -----------------------------------------
+# Migración 7: índices de búsqueda de texto
+# Crea las tablas FTS5 y sus triggers, y las llena con los datos existentes.
+# -----------------------------------------
+def _migracion_busqueda(conn: sqlite3.Connection) -> None:
+    for sentencia in esquema_busqueda("veterinarios", "mascotas", "reservas"):
+        conn.execute(sentencia)
+    reconstruir_indices_busqueda(conn, "veterinarios", "mascotas", "reservas")
+
+# -----------------------------------------
+# Migración 8: versión de fila
+# Columna version en las tablas que se editan y un trigger que la incrementa si un UPDATE no lo hizo,
+# así ninguna escritura deja la versión sin cambiar.
+# -----------------------------------------
+TABLAS_VERSIONADAS = {"mascotas": "idMascota", "veterinarios": "idVeterinario", "reservas": "idReserva"}
+
+def _columnas_tabla(conn: sqlite3.Connection, tabla: str) -> set:
+    return {fila[1] for fila in conn.execute(f"PRAGMA table_info({tabla})")}
+
+def _trigger_version(conn: sqlite3.Connection, tabla: str, clave: str) -> None:
+    conn.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{tabla}_version AFTER UPDATE ON {tabla}
+        WHEN new.version = old.version
+        BEGIN
+            UPDATE {tabla} SET version = old.version + 1 WHERE {clave} = new.{clave};
+        END
+        """
+    )
+
+def _migracion_version_filas(conn: sqlite3.Connection) -> None:
+    for tabla, clave in TABLAS_VERSIONADAS.items():
+        conn.execute(f"ALTER TABLE {tabla} ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        _trigger_version(conn, tabla, clave)
+
+# -----------------------------------------
+# Migración 9: responsables normalizados
+# mascotas.responsable era un texto libre (a veces un número) sin garantía de que dos mascotas del mismo
+# dueño lo escribieran igual. Se crea la tabla responsables y mascotas pasa a referenciarla por
+# idResponsable (entero, clave foránea con índice):
+# - Los textos existentes se agrupan sin distinguir mayúsculas, tildes ni espacios repetidos ("Ana  Pérez"
+#   y "ana perez" son el mismo responsable), con la escritura más frecuente como nombre (ante un empate,
+#   la de la mascota registrada primero). Los IDs siguen el orden en que aparecieron los responsables.
+# - Las mascotas sin responsable quedan con idResponsable NULL.
+# - La columna de texto se elimina; antes se quitan su índice y la búsqueda de texto de mascotas, que la
+#   incluía y se vuelve a crear sin ella (el responsable se busca en su propio índice).
+# -----------------------------------------
+def _clave_responsable(texto: str) -> str:
+    return " ".join(plegar(texto).split())
+
+def _migracion_responsables(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS responsables (
+            idResponsable INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            telefono TEXT,
+            email TEXT,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_responsables_nombre ON responsables (nombre)")
+    _trigger_version(conn, "responsables", "idResponsable")
+
+    if "responsable" in _columnas_tabla(conn, "mascotas"):
+        for sentencia in borrar_busqueda("mascotas"):
+            conn.execute(sentencia)
+        conn.execute("ALTER TABLE mascotas ADD COLUMN idResponsable INTEGER REFERENCES responsables (idResponsable)")
+        grupos = {} # clave normalizada -> {texto tal como está guardado: mascotas}
+        for texto, cantidad in conn.execute(
+            "SELECT responsable, COUNT(*) FROM mascotas WHERE trim(responsable) <> '' GROUP BY responsable ORDER BY MIN(idMascota)"
+        ):
+            grupos.setdefault(_clave_responsable(texto), {})[texto] = cantidad
+        for escrituras in grupos.values():
+            nombre = " ".join(max(escrituras, key=escrituras.get).split())
+            id_responsable = conn.execute("INSERT INTO responsables (nombre) VALUES (?)", (nombre,)).lastrowid
+            conn.executemany("UPDATE mascotas SET idResponsable = ?, version = version + 1 WHERE responsable = ?",
+                             [(id_responsable, texto) for texto in escrituras])
+        conn.execute("DROP INDEX IF EXISTS idx_mascotas_responsable")
+        conn.execute("ALTER TABLE mascotas DROP COLUMN responsable")
+
+    # idMascota es el rowid: el índice (idResponsable) ya sirve para paginar las mascotas de un responsable
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_mascotas_responsable ON mascotas (idResponsable)")
+    for sentencia in esquema_busqueda("mascotas", "responsables"):
+        conn.execute(sentencia)
+    reconstruir_indices_busqueda(conn, "mascotas", "responsables")
+
+# -----------------------------------------
+# Lista ordenada de migraciones
+# Para cambiar el esquema se agrega una entrada nueva al final; nunca se editan las ya publicadas.
+# -----------------------------------------
+MIGRACIONES = [
+    (1, "Tablas base", _migracion_tablas_base),
+    (2, "Índices secundarios para búsquedas y reservas", [
+        "CREATE INDEX IF NOT EXISTS idx_usuarios_nombre ON usuarios (nombre)",
+        "CREATE INDEX IF NOT EXISTS idx_veterinarios_especialidad ON veterinarios (especialidad)",
+        "CREATE INDEX IF NOT EXISTS idx_mascotas_responsable ON mascotas (responsable)",
+        "CREATE INDEX IF NOT EXISTS idx_mascotas_especie ON mascotas (especie)",
+        "CREATE INDEX IF NOT EXISTS idx_reservas_veterinario_fecha_hora ON reservas (idVeterinario, fecha, hora)",
+        "CREATE INDEX IF NOT EXISTS idx_reservas_mascota ON reservas (idMascota)", # También acelera la verificación de FK al borrar mascotas
+        "CREATE INDEX IF NOT EXISTS idx_reservas_fecha ON reservas (fecha)",
+    ]),
+    (3, "Contadores estadísticos mantenidos por triggers", _migracion_estadisticas),
+    # Los hashes existentes se calcularon con N=2**14, R=8, P=1 (valores fijos hasta esta versión)
+    (4, "Parámetros de scrypt por usuario", [
+        "ALTER TABLE usuarios ADD COLUMN scrypt_n INTEGER NOT NULL DEFAULT 16384",
+        "ALTER TABLE usuarios ADD COLUMN scrypt_r INTEGER NOT NULL DEFAULT 8",
+        "ALTER TABLE usuarios ADD COLUMN scrypt_p INTEGER NOT NULL DEFAULT 1",
+    ]),
+    # Sin filas para un veterinario se usa la jornada por defecto (ver sg_disponibilidad.py)
+    (5, "Horarios de atención por veterinario", [
+        """
+        CREATE TABLE IF NOT EXISTS horarios_veterinarios (
+            idVeterinario INTEGER NOT NULL,
+            dia_semana INTEGER NOT NULL CHECK (dia_semana BETWEEN 0 AND 6),
+            hora_inicio TEXT NOT NULL,
+            hora_fin TEXT NOT NULL,
+            PRIMARY KEY (idVeterinario, dia_semana, hora_inicio),
+            FOREIGN KEY (idVeterinario) REFERENCES veterinarios(idVeterinario) ON DELETE CASCADE
+        ) WITHOUT ROWID
+        """,
+    ]),
+    # Permite a la caché de lectura (sg_cache.py) distinguir qué tabla cambió cuando cambia data_version
+    (6, "Versiones por tabla para la caché de mascotas y veterinarios", SQL_ESQUEMA_VERSIONES),
+    (7, "Búsqueda de texto (FTS5) sobre veterinarios, mascotas y motivos de reserva", _migracion_busqueda),
+    (8, "Versión de fila para concurrencia optimista en mascotas, veterinarios y reservas", _migracion_version_filas),
+    (9, "Tabla de responsables; mascotas.responsable pasa a ser la clave foránea idResponsable", _migracion_responsables),
+]
+
+# -----------------------------------------
+# Versión actual del esquema
+# Devuelve 0 si la base todavía no tiene tabla schema_version.
+# -----------------------------------------
+def version_esquema(conn: sqlite3.Connection) -> int:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            descripcion TEXT NOT NULL,
+            aplicada_en TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+        """
+    )
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+# -----------------------------------------
+# Aplicar migraciones pendientes
+# Cada migración corre en su propia transacción con BEGIN IMMEDIATE, de modo que si dos procesos
+# arrancan a la vez solo uno la aplica y el otro la ve ya registrada al volver a leer la versión.
+# Devuelve la lista de versiones aplicadas en esta llamada.
+# -----------------------------------------
+def aplicar_migraciones() -> list:
+    aplicadas = []
+    with conectar() as conn:
+        actual = version_esquema(conn)
+        conn.commit()
+        for version, descripcion, pasos in MIGRACIONES:
+            if version <= actual:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if version_esquema(conn) >= version: # Otro proceso la aplicó mientras esperábamos el lock
+                    conn.rollback()
+                    continue
+                if callable(pasos):
+                    pasos(conn)
+                else:
+                    for sentencia in pasos:
+                        conn.execute(sentencia)
+                conn.execute(
+                    "INSERT INTO schema_version (version, descripcion) VALUES (?, ?)",
+                    (version, descripcion)
+                )
+                conn.commit()
+            except sqlite3.DatabaseError:
+                conn.rollback()
+                raise
+            aplicadas.append(version)
+            actual = version
+    return aplicadas
+
+# -----------------------------------------
+# Consultas que deben usar índice
+# Son las búsquedas de los controladores; si alguna vuelve a recorrer la tabla completa
+# (SCAN sin índice en EXPLAIN QUERY PLAN), verificar_planes_consulta() lo reporta.
+# -----------------------------------------
+CONSULTAS_INDEXADAS = {
+    "verificar_login": ("SELECT password_salt, password_hash FROM usuarios WHERE nombre = ?", ("x",)),
+    "buscar_mascotas_por_responsable": ("SELECT * FROM mascotas WHERE idMascota > ? AND idResponsable = ? ORDER BY idMascota LIMIT ?", (0, 1, 21)),
+    "buscar_reservas_por_responsable": (
+        "SELECT reservas.* FROM mascotas JOIN reservas ON reservas.idMascota = mascotas.idMascota "
+        "WHERE mascotas.idResponsable = ? AND reservas.idReserva > ? ORDER BY reservas.idReserva LIMIT ?", (1, 0, 21)),
+    "buscar_mascotas_por_especie": ("SELECT * FROM mascotas WHERE idMascota > ? AND especie = ? ORDER BY idMascota LIMIT ?", (0, "x", 21)),
+    "buscar_veterinarios_por_especialidad": ("SELECT idVeterinario, nombre, especialidad FROM veterinarios WHERE idVeterinario > ? AND especialidad = ? ORDER BY idVeterinario LIMIT ?", (0, "x", 21)),
+    "reservas_por_veterinario_y_fecha": ("SELECT * FROM reservas WHERE idVeterinario = ? AND fecha = ? ORDER BY hora", (1, "2000-01-01")),
+    "reservas_por_mascota": ("SELECT * FROM reservas WHERE idMascota = ?", (1,)),
+    "reservas_por_rango_de_fechas": ("SELECT * FROM reservas WHERE fecha BETWEEN ? AND ?", ("2000-01-01", "2000-12-31")),
+    "buscar_veterinarios_por_nombre": ("SELECT idVeterinario, nombre, especialidad FROM veterinarios WHERE idVeterinario IN (SELECT rowid FROM busqueda_veterinarios_trigramas WHERE nombre LIKE ?) AND (nombre, idVeterinario) > (?, ?) ORDER BY nombre, idVeterinario LIMIT ?", ("%xyz%", "", 0, 21)),
+    "buscar_responsables_texto": ("SELECT responsables.idResponsable FROM busqueda_responsables JOIN responsables ON responsables.idResponsable = busqueda_responsables.rowid WHERE busqueda_responsables MATCH ? ORDER BY rank LIMIT ?", ('"x"*', 21)),
+    "buscar_mascotas_texto": ("SELECT mascotas.idMascota FROM busqueda_mascotas JOIN mascotas ON mascotas.idMascota = busqueda_mascotas.rowid WHERE busqueda_mascotas MATCH ? ORDER BY rank LIMIT ?", ('"x"*', 21)),
+    "horarios_por_veterinario": ("SELECT dia_semana, hora_inicio, hora_fin FROM horarios_veterinarios WHERE idVeterinario = ?", (1,)),
+}
+
+def verificar_planes_consulta() -> list:
+    fallas = []
+    with conectar() as conn:
+        for nombre, (sql, parametros) in CONSULTAS_INDEXADAS.items():
+            plan = [fila[3] for fila in conn.execute("EXPLAIN QUERY PLAN " + sql, parametros)]
+            if any(paso.startswith("SCAN") and "INDEX" not in paso for paso in plan):
+                fallas.append((nombre, "; ".join(plan)))
+    return fallas
+
+if __name__ == "__main__":
+    aplicadas = aplicar_migraciones()
+    with conectar() as conn:
+        print(f"Esquema en versión {version_esquema(conn)} (aplicadas ahora: {aplicadas or 'ninguna'}).")
+    if "--verificar" in sys.argv:
+        fallas = verificar_planes_consulta()
+        for nombre, plan in fallas:
+            print(f"Consulta sin índice: {nombre} -> {plan}")
+        if fallas:
+            sys.exit(1)
+        print("Todas las consultas críticas usan índice.")
@@ -0,0 +1,120 @@
+# sg_modelos.py - Registros tipados de mascotas, responsables, veterinarios, reservas y usuarios.
+# Descripción: Dataclasses con __slots__ (sin __dict__ por instancia: menos memoria y acceso más rápido)
+# que reemplazan a las tuplas posicionales. Cada registro fija el orden de sus columnas (COLUMNAS_*),
+# y su fábrica de filas se asigna como row_factory del cursor para que sqlite3 construya el objeto
+# directamente al leer cada fila.
+# Los controladores devuelven estos registros (o una Pagina de ellos); mostrarlos es tarea de quien llama.
+# version es el contador de modificaciones de la fila (concurrencia optimista, ver controladores.py).
+from dataclasses import dataclass, fields
+from typing import Any, Optional
+
+@dataclass(frozen=True, slots=True)
+class Mascota:
+    idMascota: int
+    nombre: str
+    especie: str
+    raza: Optional[str]
+    edad: Optional[int]
+    peso: Optional[float]
+    idResponsable: Optional[int]
+    version: int = 0
+
+@dataclass(frozen=True, slots=True)
+class Responsable:
+    idResponsable: int
+    nombre: str
+    telefono: Optional[str]
+    email: Optional[str]
+    version: int = 0
+
+@dataclass(frozen=True, slots=True)
+class Veterinario:
+    idVeterinario: int
+    nombre: str
+    especialidad: Optional[str]
+    version: int = 0
+
+@dataclass(frozen=True, slots=True)
+class Reserva:
+    idReserva: int
+    idMascota: int
+    idVeterinario: int
+    fecha: str
+    hora: str
+    motivo: Optional[str]
+    estadoMascota: Optional[str]
+    version: int = 0
+
+@dataclass(frozen=True, slots=True)
+class Usuario: # Sin hash ni sal: las credenciales no salen de sg_funciones
+    idUsuario: int
+    nombre: str
+    email: str
+    rol: str
+
+@dataclass(frozen=True, slots=True)
+class HorarioLibre:
+    fecha: str
+    hora: str
+    idVeterinario: int
+    veterinario: str
+
+# Resultado de una operación por lote: uno por cada ID pedido, con el motivo si no se aplicó.
+@dataclass(frozen=True, slots=True)
+class ResultadoItem:
+    id: int
+    ok: bool
+    detalle: str
+
+# -----------------------------------------
+# Página de resultados
+# elementos de la página y cursor para pedir la siguiente (None si no hay más).
+# -----------------------------------------
+@dataclass(frozen=True, slots=True)
+class Pagina:
+    elementos: list
+    siguiente: Any = None
+
+    def __iter__(self):
+        return iter(self.elementos)
+
+    def __len__(self) -> int:
+        return len(self.elementos)
+
+# Página de una búsqueda de texto: aproximada indica que los resultados vienen de la búsqueda
+# tolerante a errores de tipeo porque la exacta no encontró nada.
+@dataclass(frozen=True, slots=True)
+class PaginaBusqueda(Pagina):
+    aproximada: bool = False
+
+def _columnas(clase) -> str:
+    return ", ".join(campo.name for campo in fields(clase))
+
+# Columnas explícitas por tabla (evitan SELECT * y fijan el orden que esperan las fábricas)
+COLUMNAS_MASCOTA = _columnas(Mascota)
+COLUMNAS_RESPONSABLE = _columnas(Responsable)
+COLUMNAS_VETERINARIO = _columnas(Veterinario)
+COLUMNAS_RESERVA = _columnas(Reserva)
+COLUMNAS_USUARIO = _columnas(Usuario)
+
+# -----------------------------------------
+# Fábricas de filas
+# Firma de row_factory de sqlite3: (cursor, fila) -> objeto.
+# -----------------------------------------
+def fila_mascota(cursor, fila: tuple) -> Mascota:
+    return Mascota(*fila)
+
+def fila_responsable(cursor, fila: tuple) -> Responsable:
+    return Responsable(*fila)
+
+def fila_veterinario(cursor, fila: tuple) -> Veterinario:
+    return Veterinario(*fila)
+
+def fila_reserva(cursor, fila: tuple) -> Reserva:
+    return Reserva(*fila)
+
+def fila_usuario(cursor, fila: tuple) -> Usuario:
+    return Usuario(*fila)
+
+def a_dict(registro) -> dict: # Para JSON: los registros con slots no tienen __dict__
+    return {nombre: getattr(registro, nombre) for nombre in registro.__slots__}
@@ -0,0 +1,152 @@
+# sg_reportes.py - Motor de reportes del sistema de veterinaria.
+# Descripción: Calcula las métricas del resumen general leyendo los contadores incrementales
+# (ver sg_estadisticas.py) o, para verificación, con una sola consulta consolidada sobre las tablas.
+# Las entrega como un objeto tipado (ResumenGeneral) y las guarda en caché hasta que
+# la base de datos cambie (detectado con sg_veterinaria.version_datos()).
+# Los renderizadores de pantalla y de archivo comparten las mismas líneas de texto.
+# Requiere: sg_veterinaria.py
+import sqlite3, threading
+from dataclasses import dataclass
+from typing import Optional
+from sg_veterinaria import conectar, version_datos
+
+# -----------------------------------------
+# Resultado del resumen general
+# -----------------------------------------
+@dataclass(frozen=True)
+class ResumenGeneral:
+    total_usuarios: int
+    total_veterinarios: int
+    total_mascotas: int
+    total_reservas: int
+    edad_min: Optional[int]
+    edad_max: Optional[int]
+    edad_promedio: Optional[float]
+    veterinario_top: Optional[str]
+    reservas_veterinario_top: int
+
+    @property
+    def vet_mas_reservas(self) -> str: # Texto del veterinario con más reservas
+        if self.veterinario_top is not None and self.reservas_veterinario_top > 0:
+            return f"{self.veterinario_top} ({self.reservas_veterinario_top} reservas)"
+        return "Sin registros"
+
+# -----------------------------------------
+# Resumen desde contadores
+# Lee la única fila de estadisticas y el veterinario top por el índice de total_reservas.
+# -----------------------------------------
+SQL_RESUMEN_GENERAL = """
+    SELECT
+        s.total_usuarios, s.total_veterinarios, s.total_mascotas, s.edad_min, s.edad_max,
+        CASE WHEN s.edad_cantidad > 0 THEN ROUND(s.edad_suma / s.edad_cantidad, 1) END,
+        s.total_reservas, t.nombre, COALESCE(t.total_reservas, 0)
+    FROM estadisticas s
+    LEFT JOIN (
+        SELECT v.nombre, e.total_reservas
+        FROM estadisticas_veterinarios e
+        JOIN veterinarios v ON v.idVeterinario = e.idVeterinario
+        ORDER BY e.total_reservas DESC
+        LIMIT 1
+    ) t ON 1 = 1
+    WHERE s.id = 1
+"""
+
+# -----------------------------------------
+# Consulta consolidada sobre las tablas
+# mascotas se recorre una vez para conteo y edades; reservas una vez (por el índice
+# idVeterinario) para obtener a la vez el total y el conteo por veterinario.
+# Es la referencia con la que se verifican los contadores.
+# -----------------------------------------
+SQL_RESUMEN_GENERAL_COMPLETO = """
+    WITH por_vet AS MATERIALIZED (
+        SELECT idVeterinario, COUNT(*) AS total FROM reservas GROUP BY idVeterinario
+    ),
+    edades AS (
+        SELECT COUNT(*) AS total, MIN(edad) AS minima, MAX(edad) AS maxima, ROUND(AVG(edad), 1) AS promedio
+        FROM mascotas
+    ),
+    top_vet AS (
+        SELECT v.nombre, p.total
+        FROM por_vet p
+        JOIN veterinarios v ON v.idVeterinario = p.idVeterinario
+        ORDER BY p.total DESC
+        LIMIT 1
+    )
+    SELECT
+        (SELECT COUNT(*) FROM usuarios),
+        (SELECT COUNT(*) FROM veterinarios),
+        e.total, e.minima, e.maxima, e.promedio,
+        (SELECT COALESCE(SUM(total), 0) FROM por_vet),
+        t.nombre, COALESCE(t.total, 0)
+    FROM edades e
+    LEFT JOIN top_vet t ON 1 = 1
+"""
+
+def _resumen_desde_fila(fila: tuple) -> ResumenGeneral:
+    return ResumenGeneral(
+        total_usuarios=fila[0],
+        total_veterinarios=fila[1],
+        total_mascotas=fila[2],
+        edad_min=fila[3],
+        edad_max=fila[4],
+        edad_promedio=fila[5],
+        total_reservas=fila[6],
+        veterinario_top=fila[7],
+        reservas_veterinario_top=fila[8],
+    )
+
+def calcular_resumen_general(conn: sqlite3.Connection) -> ResumenGeneral:
+    try:
+        fila = conn.execute(SQL_RESUMEN_GENERAL).fetchone()
+    except sqlite3.OperationalError: # Base sin migrar: todavía no existen las tablas de contadores
+        fila = None
+    if fila is None: # Contadores no inicializados: se calcula sobre las tablas
+        return calcular_resumen_general_completo(conn)
+    return _resumen_desde_fila(fila)
+
+def calcular_resumen_general_completo(conn: sqlite3.Connection) -> ResumenGeneral:
+    return _resumen_desde_fila(conn.execute(SQL_RESUMEN_GENERAL_COMPLETO).fetchone())
+
+# -----------------------------------------
+# Caché del resumen
+# Se invalida sola cuando cambia version_datos(); invalidar_cache_reportes() fuerza el recálculo.
+# -----------------------------------------
+_cache = {}
+_cache_lock = threading.Lock()
+
+def invalidar_cache_reportes() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+def obtener_resumen_general(usar_cache: bool = True) -> ResumenGeneral:
+    version = version_datos()
+    if usar_cache:
+        with _cache_lock:
+            guardado = _cache.get("resumen_general")
+            if guardado is not None and guardado[0] == version:
+                return guardado[1]
+    with conectar() as conn:
+        resumen = calcular_resumen_general(conn)
+    with _cache_lock:
+        _cache["resumen_general"] = (version, resumen)
+    return resumen
+
+# -----------------------------------------
+# Renderizado compartido
+# Devuelve las líneas del cuerpo del reporte; pantalla y archivo solo cambian el destino.
+# -----------------------------------------
+TITULO_RESUMEN_GENERAL = "=== REPORTE GENERAL DEL SISTEMA ==="
+
+def lineas_resumen_general(resumen: ResumenGeneral) -> list:
+    return [
+        f"Usuarios registrados:       {resumen.total_usuarios}",
+        f"Veterinarios registrados:   {resumen.total_veterinarios}",
+        f"Mascotas registradas:       {resumen.total_mascotas}",
+        f"Reservas registradas:       {resumen.total_reservas}",
+        "-" * 60,
+        f"Veterinario con más reservas: {resumen.vet_mas_reservas}",
+        f"Edad mínima de mascotas:      {resumen.edad_min if resumen.edad_min else 'N/A'} años",
+        f"Edad máxima de mascotas:      {resumen.edad_max if resumen.edad_max else 'N/A'} años",
+        f"Edad promedio de mascotas:    {resumen.edad_promedio if resumen.edad_promedio else 'N/A'} años",
+        "-" * 60,
+    ]
@@ -0,0 +1,49 @@
+# sg_salida.py - Captura por hilo de lo que imprimen los controladores.
+# Descripción: Los controladores informan por pantalla (print). Cuando varios hilos los ejecutan a la vez
+# (API HTTP, escritor agrupado) redirect_stdout no sirve porque es global: se mezclarían las salidas.
+# SalidaPorHilo reemplaza sys.stdout mientras está instalada y manda lo que escribe cada hilo a su propio
+# búfer si está capturando, o a la salida original si no.
+import io, sys, threading
+
+class SalidaPorHilo(io.TextIOBase):
+    def __init__(self):
+        self.original = sys.stdout
+        self._hilo = threading.local()
+        self._usos = 0 # instalar() anidados (servidor y escritor pueden coexistir)
+        self._lock = threading.Lock()
+
+    def write(self, texto: str) -> int:
+        bufer = getattr(self._hilo, "bufer", None)
+        return (bufer if bufer is not None else self.original).write(texto)
+
+    def flush(self) -> None:
+        if getattr(self._hilo, "bufer", None) is None:
+            self.original.flush()
+
+    def instalar(self) -> None:
+        with self._lock:
+            if self._usos == 0 and sys.stdout is not self:
+                self.original = sys.stdout
+                sys.stdout = self
+            self._usos += 1
+
+    def restaurar(self) -> None:
+        with self._lock:
+            self._usos = max(0, self._usos - 1)
+            if self._usos == 0 and sys.stdout is self:
+                sys.stdout = self.original
+
+    def capturar_texto(self, funcion, *args, **kwargs) -> tuple: # (resultado, texto impreso tal cual)
+        anterior = getattr(self._hilo, "bufer", None)
+        self._hilo.bufer = io.StringIO()
+        try:
+            resultado = funcion(*args, **kwargs)
+            return resultado, self._hilo.bufer.getvalue()
+        finally:
+            self._hilo.bufer = anterior
+
+    def capturar(self, funcion, *args, **kwargs) -> tuple: # (resultado, mensajes sin líneas vacías)
+        resultado, texto = self.capturar_texto(funcion, *args, **kwargs)
+        return resultado, [l.strip() for l in texto.splitlines() if l.strip()]
+
+salida = SalidaPorHilo()
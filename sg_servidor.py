@@ -0,0 +1,527 @@
+# sg_servidor.py - API HTTP/JSON local sobre asyncio para recepción y la página de reservas.
+# Descripción: Servidor HTTP/1.1 mínimo (solo biblioteca estándar, con keep-alive) que expone mascotas y sus
+# responsables, veterinarios, reservas y reportes como JSON. El event loop solo parsea y responde: todo el trabajo con
+# SQLite corre en un pool acotado de hilos (HILOS_API) y, si ya hay COLA_API peticiones esperando hilo,
+# se responde 503 en lugar de acumular latencia. Los controladores se reutilizan tal cual: lo que imprimen
+# se captura por hilo y vuelve en "mensajes", y su valor de retorno decide el código HTTP.
+# Autenticación: POST /sesiones con {"usuario", "password"} devuelve un token (sg_sesiones) que se envía
+# como "Authorization: Bearer <token>". GET /salud no lo requiere.
+# GET /buscar/{mascotas|responsables|veterinarios|reservas}?texto=... busca texto libre (sg_busqueda).
+# GET /responsables/{id}/mascotas y /responsables/{id}/reservas listan lo de un responsable (idResponsable).
+# PATCH acepta "version" (la del registro leído): si otro cliente lo modificó después, responde 409.
+# Las escrituras pasan por el escritor agrupado (sg_escritor): un commit por lote de peticiones concurrentes.
+# GET /metricas devuelve latencias por ruta (conteo, códigos, percentiles), el pool, la caché de lectura y sg_metricas.
+# Uso: python sg_servidor.py [--bd RUTA] [--host 127.0.0.1] [--puerto 8080] [--hilos N]
+# Requiere: sg_veterinaria.py, controladores.py, sg_sesiones.py, sg_migraciones.py, sg_metricas.py, sg_salida.py, sg_escritor.py
+import asyncio, dataclasses, json, os, re, sys, threading, time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+import sg_veterinaria
+import controladores as c
+from sg_cache import cache_lectura
+from sg_metricas import instantanea_metricas
+from sg_migraciones import aplicar_migraciones
+from sg_modelos import a_dict
+from sg_reportes import obtener_resumen_general
+from sg_salida import salida
+from sg_escritor import escritor_agrupado
+from sg_sesiones import iniciar_sesion, validar_sesion
+
+HILOS_API = int(os.environ.get("SG_API_HILOS", str(sg_veterinaria.POOL_TAMANO))) # Hilos para trabajo con SQLite
+COLA_API = int(os.environ.get("SG_API_COLA", "256")) # Peticiones que pueden esperar hilo antes del 503
+ESCRITURA_AGRUPADA = os.environ.get("SG_API_AGRUPAR", "1") != "0" # Escrituras por sg_escritor (group commit)
+CUERPO_MAX = 1024 * 1024 # Bytes máximos del cuerpo de una petición
+ESPERA_INACTIVA = 15.0 # Segundos que una conexión keep-alive puede quedar sin peticiones
+LIMITE_DEFECTO, LIMITE_MAXIMO = 100, 1000 # Filas por página en los listados
+MUESTRAS_LATENCIA = 2000 # Últimas latencias por ruta usadas para los percentiles
+
+ESTADOS_HTTP = {200: "OK", 201: "Created", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+                405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 422: "Unprocessable Entity",
+                500: "Internal Server Error", 503: "Service Unavailable"}
+
+class ErrorHttp(Exception):
+    def __init__(self, estado: int, mensaje: str, mensajes: Optional[list] = None):
+        super().__init__(mensaje)
+        self.estado = estado
+        self.mensajes = mensajes or []
+
+# -----------------------------------------
+# Ejecutar un controlador
+# Lo que imprime el hilo del pool vuelve en "mensajes" (sg_salida); None o False se responden con 422.
+# -----------------------------------------
+def _controlador(funcion, *args, **kwargs):
+    # Los controladores devuelven None o False cuando fallan y explican el motivo por pantalla
+    resultado, mensajes = salida.capturar(funcion, *args, **kwargs)
+    if resultado is None or resultado is False:
+        raise ErrorHttp(422, mensajes[0] if mensajes else "La operación no pudo completarse.", mensajes)
+    return resultado, mensajes
+
+def _escritura(funcion, *args, **kwargs):
+    # Por el escritor agrupado: las escrituras concurrentes comparten transacción y commit
+    if ESCRITURA_AGRUPADA:
+        return _controlador(escritor_agrupado.ejecutar, funcion, *args, **kwargs)
+    return _controlador(funcion, *args, **kwargs)
+
+def _edicion(obtener, id_: int, cuerpo: dict, funcion, *args) -> tuple:
+    # Los controladores de edición devuelven el registro resultante (RETURNING): no hace falta releerlo.
+    # Si fallan, se distingue registro inexistente (404) y, con "version" en el cuerpo, que otro cliente
+    # lo haya modificado (409) del resto de los errores (422)
+    version = _entero(cuerpo.get("version"), "version")
+    try:
+        registro, mensajes = _escritura(funcion, id_, *args, version_esperada=version)
+    except ErrorHttp as e:
+        if e.estado != 422:
+            raise
+        actual = obtener(id_)
+        if actual is None:
+            raise ErrorHttp(404, f"No existe el registro con ID {id_}.")
+        if version is not None and actual.version != version:
+            raise ErrorHttp(409, str(e), e.mensajes)
+        raise
+    return a_dict(registro), mensajes
+
+# -----------------------------------------
+# Métricas HTTP
+# Por ruta (método + patrón): peticiones, códigos de respuesta, tiempo total y últimas latencias.
+# -----------------------------------------
+class MetricasHttp:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self) -> None:
+        with self._lock:
+            self._rutas = {}
+            self.rechazadas = 0 # 503 por cola llena
+            self.desde = time.time()
+
+    def registrar(self, ruta: str, estado: int, segundos: float) -> None:
+        with self._lock:
+            r = self._rutas.get(ruta)
+            if r is None:
+                r = self._rutas[ruta] = {"peticiones": 0, "estados": {}, "total_ms": 0.0, "muestras": deque(maxlen=MUESTRAS_LATENCIA)}
+            r["peticiones"] += 1
+            r["estados"][str(estado)] = r["estados"].get(str(estado), 0) + 1
+            r["total_ms"] += segundos * 1000
+            r["muestras"].append(segundos * 1000)
+            if estado == 503:
+                self.rechazadas += 1
+
+    def instantanea(self) -> dict:
+        with self._lock:
+            rutas = {}
+            for ruta, r in sorted(self._rutas.items()):
+                muestras = sorted(r["muestras"])
+                p = lambda q: round(muestras[min(len(muestras) - 1, int(q * len(muestras)))], 3)
+                rutas[ruta] = {"peticiones": r["peticiones"], "estados": dict(r["estados"]),
+                               "media_ms": round(r["total_ms"] / r["peticiones"], 3),
+                               "p50_ms": p(0.50), "p95_ms": p(0.95), "p99_ms": p(0.99), "max_ms": round(muestras[-1], 3)}
+            return {"desde": self.desde, "rechazadas": self.rechazadas, "rutas": rutas}
+
+metricas_http = MetricasHttp()
+
+# -----------------------------------------
+# Utilidades de parámetros
+# -----------------------------------------
+def _entero(valor, nombre: str, requerido: bool = False) -> Optional[int]:
+    if valor is None:
+        if requerido:
+            raise ErrorHttp(400, f"Falta el campo '{nombre}'.")
+        return None
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ErrorHttp(400, f"'{nombre}' debe ser un número entero.")
+
+def _decimal(valor, nombre: str, requerido: bool = False) -> Optional[float]:
+    if valor is None:
+        if requerido:
+            raise ErrorHttp(400, f"Falta el campo '{nombre}'.")
+        return None
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        raise ErrorHttp(400, f"'{nombre}' debe ser un número.")
+
+def _texto(cuerpo: dict, nombre: str, requerido: bool = False) -> Optional[str]:
+    valor = cuerpo.get(nombre)
+    if valor is None:
+        if requerido:
+            raise ErrorHttp(400, f"Falta el campo '{nombre}'.")
+        return None
+    return str(valor)
+
+def _limite(consulta: dict) -> int:
+    limite = _entero(consulta.get("limite"), "limite") or LIMITE_DEFECTO
+    return max(1, min(limite, LIMITE_MAXIMO))
+
+def _pagina(iterador, limite: int, clave) -> dict:
+    # El iterador se pide con limite + 1: el registro extra solo indica si hay otra página
+    registros = list(iterador)
+    siguiente = clave(registros[limite - 1]) if len(registros) > limite else None
+    return {"datos": [a_dict(r) for r in registros[:limite]], "siguiente": siguiente}
+
+def _uno(obtener, id_: int) -> dict:
+    registro = obtener(id_)
+    if registro is None:
+        raise ErrorHttp(404, f"No existe el registro con ID {id_}.")
+    return a_dict(registro)
+
+# -----------------------------------------
+# Manejadores
+# Reciben (consulta, cuerpo, parámetros de la ruta) y devuelven (estado, documento).
+# Corren en el pool de hilos, salvo los marcados como asíncronos en RUTAS.
+# -----------------------------------------
+def _listar_mascotas(q, cuerpo, ruta):
+    limite = _limite(q)
+    return 200, _pagina(c.iterar_mascotas(_entero(q.get("despues_de"), "despues_de") or 0, limite + 1, q.get("especie"),
+                                          _entero(q.get("responsable"), "responsable")),
+                        limite, lambda m: m.idMascota)
+
+def _obtener_mascota(q, cuerpo, ruta):
+    return 200, _uno(c.obtener_mascota, int(ruta[0]))
+
+def _crear_mascota(q, cuerpo, ruta):
+    id_, mensajes = _escritura(c.registrar_nueva_mascota, _texto(cuerpo, "nombre", True), _texto(cuerpo, "especie", True),
+                                 _texto(cuerpo, "raza", True), _entero(cuerpo.get("edad"), "edad", True),
+                                 _decimal(cuerpo.get("peso"), "peso", True), _entero(cuerpo.get("idResponsable"), "idResponsable"))
+    return 201, {"idMascota": id_, "mensajes": mensajes}
+
+def _actualizar_mascota(q, cuerpo, ruta):
+    id_ = int(ruta[0])
+    datos, mensajes = _edicion(c.obtener_mascota, id_, cuerpo, c.actualizar_mascota, _texto(cuerpo, "nombre"), _texto(cuerpo, "especie"), _texto(cuerpo, "raza"),
+                           _entero(cuerpo.get("edad"), "edad"), _decimal(cuerpo.get("peso"), "peso"), _entero(cuerpo.get("idResponsable"), "idResponsable"))
+    return 200, {"datos": datos, "mensajes": mensajes}
+
+def _eliminar_mascota(q, cuerpo, ruta):
+    id_ = int(ruta[0])
+    _uno(c.obtener_mascota, id_)
+    _, mensajes = _escritura(c.eliminar_mascota, id_)
+    return 200, {"mensajes": mensajes}
+
+def _listar_responsables(q, cuerpo, ruta):
+    limite = _limite(q)
+    return 200, _pagina(c.iterar_responsables(_entero(q.get("despues_de"), "despues_de") or 0, limite + 1), limite, lambda r: r.idResponsable)
+
+def _obtener_responsable(q, cuerpo, ruta):
+    return 200, _uno(c.obtener_responsable, int(ruta[0]))
+
+def _crear_responsable(q, cuerpo, ruta):
+    id_, mensajes = _escritura(c.registrar_nuevo_responsable, _texto(cuerpo, "nombre", True), _texto(cuerpo, "telefono"), _texto(cuerpo, "email"))
+    return 201, {"idResponsable": id_, "mensajes": mensajes}
+
+def _actualizar_responsable(q, cuerpo, ruta):
+    id_ = int(ruta[0])
+    datos, mensajes = _edicion(c.obtener_responsable, id_, cuerpo, c.actualizar_responsable, _texto(cuerpo, "nombre"),
+                               _texto(cuerpo, "telefono"), _texto(cuerpo, "email"))
+    return 200, {"datos": datos, "mensajes": mensajes}
+
+def _eliminar_responsable(q, cuerpo, ruta):
+    id_ = int(ruta[0])
+    _uno(c.obtener_responsable, id_)
+    _, mensajes = _escritura(c.eliminar_responsable, id_)
+    return 200, {"mensajes": mensajes}
+
+def _mascotas_responsable(q, cuerpo, ruta):
+    limite = _limite(q)
+    return 200, _pagina(c.iterar_mascotas(_entero(q.get("despues_de"), "despues_de") or 0, limite + 1, idResponsable=int(ruta[0])),
+                        limite, lambda m: m.idMascota)
+
+def _reservas_responsable(q, cuerpo, ruta):
+    pagina = c.buscar_reservas_por_responsable(int(ruta[0]), _entero(q.get("despues_de"), "despues_de") or 0, _limite(q))
+    return 200, {"datos": [a_dict(r) for r in pagina], "siguiente": pagina.siguiente}
+
+def _listar_veterinarios(q, cuerpo, ruta):
+    limite = _limite(q)
+    if q.get("nombre") is not None: # Búsqueda por nombre: el cursor es el par (nombre, id) de la última fila
+        desde = (q["despues_de_nombre"], _entero(q.get("despues_de"), "despues_de") or 0) if "despues_de_nombre" in q else None
+        pagina = c.buscar_veterinarios_por_nombre(q["nombre"], desde, limite)
+        siguiente = {"despues_de_nombre": pagina.siguiente[0], "despues_de": pagina.siguiente[1]} if pagina.siguiente else None
+        return 200, {"datos": [a_dict(v) for v in pagina], "siguiente": siguiente}
+    return 200, _pagina(c.iterar_veterinarios(_entero(q.get("despues_de"), "despues_de") or 0, limite + 1, q.get("especialidad")),
+                        limite, lambda v: v.idVeterinario)
+
+def _obtener_veterinario(q, cuerpo, ruta):
+    return 200, _uno(c.obtener_veterinario, int(ruta[0]))
+
+def _crear_veterinario(q, cuerpo, ruta):
+    id_, mensajes = _escritura(c.registrar_nuevo_veterinario, _texto(cuerpo, "nombre", True), _texto(cuerpo, "especialidad"))
+    return 201, {"idVeterinario": id_, "mensajes": mensajes}
+
+def _actualizar_veterinario(q, cuerpo, ruta):
+    id_ = int(ruta[0])
+    datos, mensajes = _edicion(c.obtener_veterinario, id_, cuerpo, c.actualizar_veterinario, _texto(cuerpo, "nombre"), _texto(cuerpo, "especialidad"))
+    return 200, {"datos": datos, "mensajes": mensajes}
+
+def _eliminar_veterinario(q, cuerpo, ruta):
+    id_ = int(ruta[0])
+    _uno(c.obtener_veterinario, id_)
+    _, mensajes = _escritura(c.eliminar_veterinario, id_)
+    return 200, {"mensajes": mensajes}
+
+def _listar_reservas(q, cuerpo, ruta):
+    limite = _limite(q)
+    return 200, _pagina(c.iterar_reservas(_entero(q.get("despues_de"), "despues_de") or 0, limite + 1,
+                                          _entero(q.get("veterinario"), "veterinario"), q.get("desde"), q.get("hasta")),
+                        limite, lambda r: r.idReserva)
+
+def _obtener_reserva(q, cuerpo, ruta):
+    return 200, _uno(c.obtener_reserva, int(ruta[0]))
+
+def _crear_reserva(q, cuerpo, ruta):
+    id_, mensajes = _escritura(c.crear_reserva, _entero(cuerpo.get("idMascota"), "idMascota", True),
+                                 _entero(cuerpo.get("idVeterinario"), "idVeterinario", True), _texto(cuerpo, "fecha", True),
+                                 _texto(cuerpo, "hora", True), _texto(cuerpo, "motivo", True), _texto(cuerpo, "estadoMascota", True))
+    return 201, {"idReserva": id_, "mensajes": mensajes}
+
+def _modificar_reserva(q, cuerpo, ruta):
+    id_ = int(ruta[0])
+    datos, mensajes = _edicion(c.obtener_reserva, id_, cuerpo, c.modificar_reserva, _entero(cuerpo.get("idMascota"), "idMascota"),
+                           _entero(cuerpo.get("idVeterinario"), "idVeterinario"), _texto(cuerpo, "fecha"), _texto(cuerpo, "hora"),
+                           _texto(cuerpo, "motivo"), _texto(cuerpo, "estadoMascota"))
+    return 200, {"datos": datos, "mensajes": mensajes}
+
+def _eliminar_reserva(q, cuerpo, ruta):
+    id_ = int(ruta[0])
+    _uno(c.obtener_reserva, id_)
+    _, mensajes = _escritura(c.eliminar_reserva, id_)
+    return 200, {"mensajes": mensajes}
+
+def _horarios_disponibles(q, cuerpo, ruta):
+    if not q.get("desde") or not q.get("hasta"):
+        raise ErrorHttp(400, "Se requieren 'desde' y 'hasta' (YYYY-MM-DD).")
+    horarios, mensajes = salida.capturar(c.buscar_horarios_disponibles, q.get("especialidad"), q["desde"], q["hasta"],
+                                          _entero(q.get("duracion"), "duracion") or c.DURACION_CITA_MINUTOS,
+                                          _entero(q.get("cantidad"), "cantidad") or 5)
+    if horarios is None:
+        raise ErrorHttp(400, mensajes[0] if mensajes else "Fechas inválidas.", mensajes)
+    return 200, {"datos": [a_dict(h) for h in horarios]}
+
+def _buscar(q, cuerpo, ruta): # Texto libre; siguiente se devuelve como despues_de
+    buscar = {"mascotas": c.buscar_mascotas, "responsables": c.buscar_responsables, "veterinarios": c.buscar_veterinarios,
+              "reservas": c.buscar_reservas_por_motivo}[ruta[0]]
+    pagina, mensajes = _controlador(buscar, q.get("texto") or "", _entero(q.get("despues_de"), "despues_de") or 0, _limite(q))
+    return 200, {"datos": [a_dict(r) for r in pagina], "siguiente": pagina.siguiente, "aproximada": pagina.aproximada}
+
+def _resumen_general(q, cuerpo, ruta):
+    return 200, dataclasses.asdict(obtener_resumen_general())
+
+def _metricas(q, cuerpo, ruta):
+    return 200, {"http": metricas_http.instantanea(), "pool": sg_veterinaria.estado_pool(), "cache": cache_lectura.estadisticas(),
+                 "escritor": escritor_agrupado.estadisticas(), "escrituras": sg_veterinaria.estado_escrituras(),
+                 "consultas": instantanea_metricas(_entero(q.get("limite"), "limite") or 10)}
+
+def _salud(q, cuerpo, ruta):
+    return 200, {"estado": "ok"}
+
+async def _iniciar_sesion(q, cuerpo, ruta):
+    # scrypt ya corre en su propio pool acotado (sg_autenticacion): no ocupa un hilo de SQLite
+    token = await asyncio.to_thread(iniciar_sesion, _texto(cuerpo, "usuario", True), _texto(cuerpo, "password", True))
+    if token is None:
+        raise ErrorHttp(401, "Usuario o contraseña incorrectos.")
+    return 201, {"token": token}
+
+# (método, patrón, manejador, requiere sesión)
+RUTAS = [
+    ("GET", r"/salud", _salud, False),
+    ("POST", r"/sesiones", _iniciar_sesion, False),
+    ("GET", r"/mascotas", _listar_mascotas, True),
+    ("POST", r"/mascotas", _crear_mascota, True),
+    ("GET", r"/mascotas/(\d+)", _obtener_mascota, True),
+    ("PATCH", r"/mascotas/(\d+)", _actualizar_mascota, True),
+    ("DELETE", r"/mascotas/(\d+)", _eliminar_mascota, True),
+    ("GET", r"/responsables", _listar_responsables, True),
+    ("POST", r"/responsables", _crear_responsable, True),
+    ("GET", r"/responsables/(\d+)", _obtener_responsable, True),
+    ("PATCH", r"/responsables/(\d+)", _actualizar_responsable, True),
+    ("DELETE", r"/responsables/(\d+)", _eliminar_responsable, True),
+    ("GET", r"/responsables/(\d+)/mascotas", _mascotas_responsable, True),
+    ("GET", r"/responsables/(\d+)/reservas", _reservas_responsable, True),
+    ("GET", r"/veterinarios", _listar_veterinarios, True),
+    ("POST", r"/veterinarios", _crear_veterinario, True),
+    ("GET", r"/veterinarios/(\d+)", _obtener_veterinario, True),
+    ("PATCH", r"/veterinarios/(\d+)", _actualizar_veterinario, True),
+    ("DELETE", r"/veterinarios/(\d+)", _eliminar_veterinario, True),
+    ("GET", r"/reservas", _listar_reservas, True),
+    ("POST", r"/reservas", _crear_reserva, True),
+    ("GET", r"/reservas/disponibles", _horarios_disponibles, True),
+    ("GET", r"/reservas/(\d+)", _obtener_reserva, True),
+    ("PATCH", r"/reservas/(\d+)", _modificar_reserva, True),
+    ("DELETE", r"/reservas/(\d+)", _eliminar_reserva, True),
+    ("GET", r"/buscar/(mascotas|responsables|veterinarios|reservas)", _buscar, True),
+    ("GET", r"/reportes/resumen", _resumen_general, True),
+    ("GET", r"/metricas", _metricas, True),
+]
+_RUTAS_COMPILADAS = [(metodo, re.compile(patron + r"/?"), patron, manejador, sesion) for metodo, patron, manejador, sesion in RUTAS]
+
+def _resolver(metodo: str, camino: str) -> tuple:
+    # Devuelve (manejador, parámetros, requiere sesión, nombre de la ruta para métricas)
+    permitido = False
+    for metodo_ruta, patron, texto, manejador, sesion in _RUTAS_COMPILADAS:
+        encontrada = patron.fullmatch(camino)
+        if encontrada:
+            if metodo_ruta == metodo:
+                return manejador, encontrada.groups(), sesion, f"{metodo} {texto}"
+            permitido = True
+    raise ErrorHttp(405 if permitido else 404, "Método no permitido." if permitido else "Ruta inexistente.")
+
+# -----------------------------------------
+# Servidor
+# Una tarea por conexión; cada petición se despacha al pool acotado de hilos.
+# -----------------------------------------
+class ServidorApi:
+    def __init__(self, host: str = "127.0.0.1", puerto: int = 8080, hilos: int = HILOS_API, cola: int = COLA_API):
+        self.host, self.puerto = host, puerto
+        self.hilos, self.cola = hilos, cola
+        self._executor = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="sg-api")
+        self._pendientes = 0 # Peticiones enviadas al pool y todavía sin responder
+        self._servidor = None
+
+    async def _en_pool(self, manejador, *args):
+        if self._pendientes >= self.hilos + self.cola:
+            raise ErrorHttp(503, "Servidor saturado, intente nuevamente.")
+        self._pendientes += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, manejador, *args)
+        finally:
+            self._pendientes -= 1
+
+    async def _atender(self, metodo: str, objetivo: str, cabeceras: dict, datos: bytes) -> tuple:
+        partes = urlsplit(objetivo)
+        manejador, parametros, requiere_sesion, nombre = _resolver(metodo, partes.path)
+        try:
+            if requiere_sesion:
+                autorizacion = cabeceras.get("authorization", "")
+                if not autorizacion.startswith("Bearer ") or validar_sesion(autorizacion[7:].strip()) is None:
+                    raise ErrorHttp(401, "Sesión inválida o expirada.")
+            consulta = {k: v[-1] for k, v in parse_qs(partes.query).items()}
+            try:
+                cuerpo = json.loads(datos) if datos else {}
+            except ValueError:
+                raise ErrorHttp(400, "El cuerpo no es JSON válido.")
+            if not isinstance(cuerpo, dict):
+                raise ErrorHttp(400, "El cuerpo debe ser un objeto JSON.")
+            if asyncio.iscoroutinefunction(manejador):
+                estado, documento = await manejador(consulta, cuerpo, parametros)
+            else:
+                estado, documento = await self._en_pool(manejador, consulta, cuerpo, parametros)
+        except ErrorHttp as e:
+            e.ruta = nombre
+            raise
+        return estado, documento, nombre
+
+    async def _conexion(self, lector: asyncio.StreamReader, escritor: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    linea = await asyncio.wait_for(lector.readline(), ESPERA_INACTIVA)
+                except asyncio.TimeoutError:
+                    return
+                if not linea:
+                    return
+                inicio = time.perf_counter()
+                try:
+                    metodo, objetivo, version = linea.decode("latin-1").split()
+                except ValueError:
+                    await self._responder(escritor, 400, {"error": "Línea de petición inválida."}, False)
+                    return
+                cabeceras = {}
+                while True:
+                    linea = await lector.readline()
+                    if linea in (b"\r\n", b"\n", b""):
+                        break
+                    nombre, _, valor = linea.decode("latin-1").partition(":")
+                    cabeceras[nombre.strip().lower()] = valor.strip()
+                seguir = version == "HTTP/1.1" and cabeceras.get("connection", "").lower() != "close"
+                try:
+                    largo = int(cabeceras.get("content-length", "0") or 0)
+                except ValueError:
+                    largo = -1
+                if largo < 0:
+                    await self._responder(escritor, 400, {"error": "Content-Length inválido."}, False)
+                    return
+                if largo > CUERPO_MAX:
+                    await self._responder(escritor, 413, {"error": "Cuerpo demasiado grande."}, False)
+                    return
+                datos = await lector.readexactly(largo) if largo else b""
+
+                ruta = "otras"
+                try:
+                    estado, documento, ruta = await self._atender(metodo.upper(), objetivo, cabeceras, datos)
+                except ErrorHttp as e:
+                    ruta = getattr(e, "ruta", ruta)
+                    estado, documento = e.estado, {"error": str(e), "mensajes": e.mensajes}
+                except Exception as e: # Un error inesperado no debe tirar el servidor
+                    estado, documento = 500, {"error": f"Error interno: {e}"}
+                await self._responder(escritor, estado, documento, seguir)
+                metricas_http.registrar(ruta, estado, time.perf_counter() - inicio)
+                if not seguir:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError: # Apagado del servidor con conexiones keep-alive abiertas
+            pass
+        finally:
+            escritor.close()
+
+    async def _responder(self, escritor: asyncio.StreamWriter, estado: int, documento, seguir: bool) -> None:
+        cuerpo = json.dumps(documento, ensure_ascii=False, default=str).encode("utf-8")
+        escritor.write(
+            f"HTTP/1.1 {estado} {ESTADOS_HTTP.get(estado, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(cuerpo)}\r\n"
+            f"Connection: {'keep-alive' if seguir else 'close'}\r\n\r\n".encode("latin-1") + cuerpo)
+        await escritor.drain()
+
+    async def iniciar(self) -> None:
+        self._servidor = await asyncio.start_server(self._conexion, self.host, self.puerto)
+        self.puerto = self._servidor.sockets[0].getsockname()[1] # Con puerto 0, el que asignó el sistema
+        salida.instalar() # Lo que imprimen los controladores vuelve en "mensajes" de cada petición
+
+    async def esperar(self) -> None: # Atiende hasta que se cancele la tarea
+        async with self._servidor:
+            await self._servidor.serve_forever()
+
+    async def servir(self) -> None:
+        await self.iniciar()
+        try:
+            await self.esperar()
+        finally:
+            self.cerrar()
+
+    def cerrar(self) -> None:
+        self._executor.shutdown(wait=True)
+        escritor_agrupado.detener() # Confirma lo que quede encolado
+        salida.restaurar()
+
+def main() -> None:
+    import argparse
+    parser = argparse.ArgumentParser(description="API HTTP/JSON del sistema de veterinaria")
+    parser.add_argument("--bd", help=f"Base de datos (por defecto {sg_veterinaria.DB_NAME})")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8080)
+    parser.add_argument("--hilos", type=int, default=HILOS_API, help="Hilos para trabajo con SQLite")
+    parser.add_argument("--cola", type=int, default=COLA_API, help="Peticiones en espera antes de responder 503")
+    args = parser.parse_args()
+    if args.bd:
+        sg_veterinaria.DB_NAME = args.bd
+    aplicar_migraciones()
+    servidor = ServidorApi(args.host, args.puerto, args.hilos, args.cola)
+
+    async def arrancar():
+        await servidor.iniciar()
+        print(f"Escuchando en http://{servidor.host}:{servidor.puerto} ({servidor.hilos} hilos de base de datos)", file=sys.stderr)
+        await servidor.esperar()
+
+    try:
+        asyncio.run(arrancar())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.cerrar()
+        sg_veterinaria.cerrar_pool()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# sg_sesiones.py - Sesiones firmadas para no repetir scrypt en cada operación.
+# Descripción: Tras un login correcto se emite un token "payload.firma" donde el payload (JSON en base64)
+# lleva idUsuario, nombre, rol, expiración e identificador de sesión, y la firma es HMAC-SHA256.
+# Validar un token cuesta un HMAC y una búsqueda en diccionario, en lugar de un scrypt completo.
+# Las sesiones activas viven en memoria con TTL; cerrar_sesion() las revoca antes de expirar.
+# Requiere: sg_veterinaria.py, sg_funciones.py
+import base64, hashlib, hmac, json, os, secrets, threading, time
+from dataclasses import dataclass
+from typing import Optional
+from sg_funciones import verificar_login, obtener_usuario
+
+SESION_TTL = int(os.environ.get("SG_SESION_TTL", "1800")) # Segundos de validez de cada sesión
+# Clave de firma: fija por variable de entorno para compartirla entre procesos; si no, una por proceso
+_CLAVE_FIRMA = os.environ.get("SG_SESION_CLAVE", "").encode("utf-8") or secrets.token_bytes(32)
+
+@dataclass(frozen=True)
+class Sesion:
+    id_sesion: str
+    id_usuario: int
+    nombre: str
+    rol: str
+    expira: float
+
+# -----------------------------------------
+# Almacén de sesiones en memoria
+# Guarda las sesiones vigentes y elimina las vencidas al consultarlas o en cada purga periódica.
+# -----------------------------------------
+class AlmacenSesiones:
+    def __init__(self, ttl: int = SESION_TTL):
+        self.ttl = ttl
+        self._sesiones = {}
+        self._lock = threading.Lock()
+        self._proxima_purga = time.monotonic() + ttl
+
+    def guardar(self, sesion: Sesion) -> None:
+        with self._lock:
+            self._sesiones[sesion.id_sesion] = sesion
+            self._purgar_si_corresponde()
+
+    def obtener(self, id_sesion: str) -> Optional[Sesion]:
+        with self._lock:
+            sesion = self._sesiones.get(id_sesion)
+            if sesion is not None and sesion.expira <= time.time():
+                del self._sesiones[id_sesion]
+                return None
+            return sesion
+
+    def eliminar(self, id_sesion: str) -> bool:
+        with self._lock:
+            return self._sesiones.pop(id_sesion, None) is not None
+
+    def _purgar_si_corresponde(self) -> None: # Se llama con el lock tomado
+        if time.monotonic() < self._proxima_purga:
+            return
+        ahora = time.time()
+        for id_sesion in [i for i, s in self._sesiones.items() if s.expira <= ahora]:
+            del self._sesiones[id_sesion]
+        self._proxima_purga = time.monotonic() + min(self.ttl, 60)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sesiones)
+
+almacen_sesiones = AlmacenSesiones()
+
+def _b64(datos: bytes) -> str:
+    return base64.urlsafe_b64encode(datos).rstrip(b"=").decode("ascii")
+
+def _desde_b64(texto: str) -> bytes:
+    return base64.urlsafe_b64decode(texto + "=" * (-len(texto) % 4))
+
+def _firmar(payload: str) -> str:
+    return _b64(hmac.new(_CLAVE_FIRMA, payload.encode("ascii"), hashlib.sha256).digest())
+
+# -----------------------------------------
+# Iniciar sesión
+# Verifica credenciales (un único scrypt) y emite un token firmado con el rol del usuario.
+# Devuelve None si las credenciales no son válidas.
+# -----------------------------------------
+def iniciar_sesion(username: str, password: str) -> Optional[str]:
+    if not verificar_login(username, password):
+        return None
+    usuario = obtener_usuario(username)
+    if usuario is None:
+        return None
+    sesion = Sesion(secrets.token_urlsafe(16), usuario.idUsuario, usuario.nombre, usuario.rol, time.time() + almacen_sesiones.ttl)
+    almacen_sesiones.guardar(sesion)
+    payload = _b64(json.dumps({
+        "sid": sesion.id_sesion, "uid": sesion.id_usuario, "nombre": sesion.nombre,
+        "rol": sesion.rol, "exp": int(sesion.expira),
+    }, separators=(",", ":")).encode("utf-8"))
+    return f"{payload}.{_firmar(payload)}"
+
+# -----------------------------------------
+# Validar sesión
+# Comprueba firma, expiración y que la sesión siga en el almacén (no revocada).
+# Devuelve la Sesion o None; rol_requerido restringe además por rol.
+# -----------------------------------------
+def validar_sesion(token: str, rol_requerido: Optional[str] = None) -> Optional[Sesion]:
+    try:
+        payload, firma = token.split(".", 1)
+        if not hmac.compare_digest(firma.encode("ascii"), _firmar(payload).encode("ascii")):
+            return None
+    except (AttributeError, ValueError): # Token mal formado o con caracteres no ASCII
+        return None
+    try:
+        datos = json.loads(_desde_b64(payload))
+    except ValueError:
+        return None
+    if datos.get("exp", 0) <= time.time():
+        almacen_sesiones.eliminar(datos.get("sid", ""))
+        return None
+    sesion = almacen_sesiones.obtener(datos.get("sid", ""))
+    if sesion is None or sesion.id_usuario != datos.get("uid"):
+        return None
+    if rol_requerido is not None and sesion.rol != rol_requerido:
+        return None
+    return sesion
+
+# -----------------------------------------
+# Cerrar sesión
+# Revoca el token; devuelve True si la sesión existía.
+# -----------------------------------------
+def cerrar_sesion(token: str) -> bool:
+    sesion = validar_sesion(token)
+    return sesion is not None and almacen_sesiones.eliminar(sesion.id_sesion)
+
+# -----------------------------------------
+# Exigir sesión
+# Variante de validar_sesion para usar al inicio de cada operación protegida:
+# lanza SesionInvalida en lugar de devolver None.
+# -----------------------------------------
+class SesionInvalida(PermissionError):
+    """Token ausente, alterado, vencido, revocado o sin el rol requerido."""
+
+def exigir_sesion(token: str, rol_requerido: Optional[str] = None) -> Sesion:
+    sesion = validar_sesion(token, rol_requerido)
+    if sesion is None:
+        raise SesionInvalida("Sesión inválida o expirada.")
+    return sesion
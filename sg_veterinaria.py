@@ -1,78 +1,543 @@
-import sqlite3, os, hashlib, base64, hmac
-# Importaciones para la gestión de la base de datos y seguridad
-
-DB_NAME = "sg_veterinaria.db" # Nombre de la base de datos SQLite
-
-def conectar(): # Función para conectar a la base de datos
-    conn = sqlite3.connect(DB_NAME)
-    conn.execute("PRAGMA foreign_keys = ON")
-    return conn
-
-def crear_tabla_usuarios(): # Función para crear la tabla de usuarios
-    with conectar() as conn:
-        c = conn.cursor()
-        c.execute(
-            """
-            CREATE TABLE IF NOT EXISTS usuarios (
-                idUsuario INTEGER PRIMARY KEY AUTOINCREMENT,
-                nombre TEXT NOT NULL,
-                email TEXT NOT NULL UNIQUE,
-                password_hash TEXT NOT NULL,
-                password_salt TEXT NOT NULL,
-                rol TEXT NOT NULL
-            )
-            """
-        )
-        conn.commit()
-
-def crear_tablas_veterinaria(): # Función para crear la tabla de veterinarios
-    with conectar() as conn:
-        c = conn.cursor()
-        c.execute(
-            """ 
-            CREATE TABLE IF NOT EXISTS veterinarios (
-                idVeterinario INTEGER PRIMARY KEY AUTOINCREMENT,
-                nombre TEXT NOT NULL,
-                especialidad TEXT
-            )
-            """
-        )
-        conn.commit()
-
-def crear_tabla_mascotas(): # Función para crear la tabla de mascotas
-    with conectar() as conn:
-        c = conn.cursor()
-        c.execute(
-            """
-            CREATE TABLE IF NOT EXISTS mascotas (
-                idMascota INTEGER PRIMARY KEY AUTOINCREMENT,
-                nombre TEXT NOT NULL,
-                especie TEXT,
-                raza TEXT,
-                edad INTEGER,
-                peso REAL,
-                responsable TEXT
-            )
-            """
-        )
-        conn.commit() 
-        
-def crear_tabla_reservas(): # Función para crear la tabla de reservas
-    with conectar() as conn:
-        c = conn.cursor()
-        c.execute(
-            """
-            CREATE TABLE IF NOT EXISTS reservas (
-                idReserva INTEGER PRIMARY KEY AUTOINCREMENT,
-                idMascota INTEGER,
-                idVeterinario INTEGER,
-                fecha DATE,
-                hora TIME,
-                motivo TEXT,
-                estadoMascota TEXT,
-                FOREIGN KEY (idMascota) REFERENCES mascotas (idMascota),
-                FOREIGN KEY (idVeterinario) REFERENCES veterinarios (idVeterinario)
-            )
-            """
-        )
-        conn.commit()
+import sqlite3, os, hashlib, base64, hmac, threading, time, atexit, contextlib, random
+from typing import Optional
+from sg_metricas import envolver_cursor, MedicionesPendientes
+# Importaciones para la gestión de la base de datos y seguridad
+
+DB_NAME = "sg_veterinaria.db" # Nombre de la base de datos SQLite
+
+# Parámetros del pool de conexiones
+POOL_TAMANO = int(os.environ.get("SG_POOL_TAMANO", "5")) # Máximo de conexiones abiertas a la vez
+POOL_TIMEOUT = 10.0 # Segundos de espera máxima por una conexión libre antes de fallar
+POOL_VERIFICAR_TRAS = 30.0 # Segundos de inactividad tras los cuales se verifica la conexión (SELECT 1)
+
+# Reintentos de escrituras cuando la base está ocupada (ver ejecutar_escritura)
+REINTENTOS_ESCRITURA = int(os.environ.get("SG_REINTENTOS_ESCRITURA", "5")) # Reintentos tras el primer intento
+ESPERA_REINTENTO_BASE = 0.01 # Segundos; la espera máxima se duplica en cada reintento
+ESPERA_REINTENTO_MAX = 0.5 # Tope de la espera entre reintentos
+
+# Perfiles de almacenamiento aplicados al abrir cada conexión
+# - durable: WAL con fsync completo en cada commit (máxima seguridad ante cortes de energía)
+# - balanced: WAL con synchronous NORMAL; en WAL solo se pierde el último commit ante un corte del SO
+# - throughput: sin fsync, caché y mmap grandes; pensado para cargas masivas y pruebas
+# cache_size negativo se expresa en KiB; mmap_size en bytes; busy_timeout en milisegundos
+# wal_autocheckpoint es la política de checkpoint: páginas de WAL acumuladas antes de volcar a la BD
+PERFILES_ALMACENAMIENTO = {
+    "durable": {
+        "journal_mode": "WAL", "synchronous": "FULL", "cache_size": -8000,
+        "mmap_size": 0, "busy_timeout": 5000, "temp_store": "DEFAULT", "wal_autocheckpoint": 1000,
+    },
+    "balanced": {
+        "journal_mode": "WAL", "synchronous": "NORMAL", "cache_size": -32000,
+        "mmap_size": 64 * 1024 * 1024, "busy_timeout": 5000, "temp_store": "MEMORY", "wal_autocheckpoint": 1000,
+    },
+    "throughput": {
+        "journal_mode": "WAL", "synchronous": "OFF", "cache_size": -128000,
+        "mmap_size": 256 * 1024 * 1024, "busy_timeout": 10000, "temp_store": "MEMORY", "wal_autocheckpoint": 4000,
+    },
+}
+PERFIL_ALMACENAMIENTO = os.environ.get("SG_PERFIL_BD", "balanced") # Perfil activo
+
+# -----------------------------------------
+# Configuración inicial de cada conexión
+# Los PRAGMA se aplican una sola vez, al abrir la conexión física.
+# -----------------------------------------
+def _configurar_conexion(conn: sqlite3.Connection, perfil: Optional[str] = None) -> None:
+    ajustes = PERFILES_ALMACENAMIENTO[perfil or PERFIL_ALMACENAMIENTO]
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute(f"PRAGMA busy_timeout = {int(ajustes['busy_timeout'])}")
+    conn.execute(f"PRAGMA journal_mode = {ajustes['journal_mode']}")
+    conn.execute(f"PRAGMA synchronous = {ajustes['synchronous']}")
+    conn.execute(f"PRAGMA cache_size = {int(ajustes['cache_size'])}")
+    conn.execute(f"PRAGMA mmap_size = {int(ajustes['mmap_size'])}")
+    conn.execute(f"PRAGMA temp_store = {ajustes['temp_store']}")
+    conn.execute(f"PRAGMA wal_autocheckpoint = {int(ajustes['wal_autocheckpoint'])}")
+
+# -----------------------------------------
+# Pool de conexiones
+# Mantiene conexiones SQLite abiertas y las presta con semántica checkout/devolución.
+# Las conexiones ociosas se verifican antes de reutilizarse y se descartan si fallan.
+# -----------------------------------------
+class PoolConexiones:
+    def __init__(self, db_name: str, tamano: int = POOL_TAMANO, timeout: float = POOL_TIMEOUT, perfil: Optional[str] = None):
+        if tamano < 1:
+            raise ValueError("El tamaño del pool debe ser al menos 1.")
+        self.perfil = perfil or PERFIL_ALMACENAMIENTO
+        if self.perfil not in PERFILES_ALMACENAMIENTO:
+            raise ValueError(f"Perfil de almacenamiento desconocido: {self.perfil}")
+        self.db_name = db_name
+        self.tamano = tamano
+        self.timeout = timeout
+        self._libres = [] # Pila LIFO de (conexión, instante de devolución)
+        self._abiertas = 0
+        self._cerrado = False
+        self._condicion = threading.Condition()
+        self.creadas = 0
+        self.descartadas = 0
+        self.esperas = 0
+
+    def _abrir(self) -> sqlite3.Connection:
+        # check_same_thread=False: la conexión puede devolverse y prestarse a otro hilo,
+        # pero el pool garantiza que solo un hilo la usa a la vez.
+        conn = sqlite3.connect(self.db_name, timeout=self.timeout, check_same_thread=False)
+        try:
+            _configurar_conexion(conn, self.perfil)
+        except sqlite3.Error:
+            conn.close()
+            raise
+        self.creadas += 1
+        return conn
+
+    def _sana(self, conn: sqlite3.Connection) -> bool: # Health check de una conexión ociosa
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def obtener(self) -> sqlite3.Connection:
+        limite = time.monotonic() + self.timeout
+        with self._condicion:
+            while True:
+                if self._cerrado:
+                    raise sqlite3.OperationalError("El pool de conexiones está cerrado.")
+                if self._libres:
+                    conn, devuelta = self._libres.pop()
+                    if time.monotonic() - devuelta < POOL_VERIFICAR_TRAS or self._sana(conn):
+                        return conn
+                    # Conexión dañada: se descarta y se libera su cupo
+                    self._abiertas -= 1
+                    self.descartadas += 1
+                    try:
+                        conn.close()
+                    except sqlite3.Error:
+                        pass
+                    continue
+                if self._abiertas < self.tamano:
+                    self._abiertas += 1
+                    break
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    raise sqlite3.OperationalError("No hay conexiones libres en el pool (tiempo de espera agotado).")
+                self.esperas += 1
+                self._condicion.wait(restante)
+        # La conexión física se abre fuera del lock para no bloquear a otros hilos
+        try:
+            return self._abrir()
+        except BaseException:
+            with self._condicion:
+                self._abiertas -= 1
+                self._condicion.notify()
+            raise
+
+    def devolver(self, conn: sqlite3.Connection) -> None:
+        try:
+            if conn.in_transaction: # Nunca se devuelve una transacción a medias
+                conn.rollback()
+            valida = True
+        except sqlite3.Error:
+            valida = False
+        with self._condicion:
+            if valida and not self._cerrado:
+                self._libres.append((conn, time.monotonic()))
+            else:
+                self._abiertas -= 1
+                self.descartadas += 1
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._condicion.notify()
+
+    def cerrar(self) -> None:
+        with self._condicion:
+            self._cerrado = True
+            if self._libres: # Checkpoint final para no dejar el WAL crecido entre ejecuciones
+                try:
+                    self._libres[-1][0].execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                except sqlite3.Error:
+                    pass
+            while self._libres:
+                conn, _ = self._libres.pop()
+                self._abiertas -= 1
+                conn.close()
+            self._condicion.notify_all()
+
+    def estado(self) -> dict:
+        with self._condicion:
+            return {
+                "db": self.db_name,
+                "perfil": self.perfil,
+                "tamano": self.tamano,
+                "abiertas": self._abiertas,
+                "libres": len(self._libres),
+                "en_uso": self._abiertas - len(self._libres),
+                "creadas": self.creadas,
+                "descartadas": self.descartadas,
+                "esperas": self.esperas,
+            }
+
+# -----------------------------------------
+# Préstamo de conexión
+# Se comporta como sqlite3.Connection (delegación de atributos) y como context manager:
+# al salir del bloque with confirma o revierte la transacción y devuelve la conexión al pool.
+# Si el mismo hilo pide otra conexión mientras tiene una prestada, recibe la misma
+# (afinidad por hilo), y solo el préstamo más externo confirma y devuelve.
+# -----------------------------------------
+class _Prestamo:
+    def __init__(self, pool: PoolConexiones, conn: sqlite3.Connection):
+        self.pool = pool
+        self.conn = conn
+        self.profundidad = 1
+        self.diferida = False # Dentro de transaccion_unica(): los commit() anidados no confirman
+        self.puntos = [] # Puntos de guardado abiertos con punto_guardado()
+        self.mediciones = MedicionesPendientes() # Sentencias medidas aún sin registrar (sg_metricas)
+
+class ConexionPool:
+    def __init__(self, prestamo: _Prestamo):
+        self._prestamo = prestamo
+        self._liberada = False
+
+    def __getattr__(self, nombre):
+        return getattr(self._prestamo.conn, nombre)
+
+    # Cursores instrumentados (sg_metricas): cada sentencia queda medida y atribuida a su controlador
+    def cursor(self):
+        return envolver_cursor(self._prestamo.conn, self._prestamo.conn.cursor(), self._prestamo.mediciones)
+
+    def execute(self, sql: str, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql: str, secuencia):
+        return self.cursor().executemany(sql, secuencia)
+
+    # En una transacción única, commit() se pospone hasta el final y rollback() vuelve
+    # solo al último punto de guardado (o revierte todo si no hay ninguno)
+    def commit(self) -> None:
+        if not self._prestamo.diferida:
+            self._prestamo.conn.commit()
+
+    def rollback(self) -> None:
+        if self._prestamo.diferida and self._prestamo.puntos:
+            self._prestamo.conn.execute(f"ROLLBACK TO {self._prestamo.puntos[-1]}")
+        else:
+            self._prestamo.conn.rollback()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if self._prestamo.profundidad == 1 and not self._liberada:
+                if exc_type is None:
+                    self._prestamo.conn.commit()
+                else:
+                    self._prestamo.conn.rollback()
+        finally:
+            self.close()
+        return False
+
+    def close(self) -> None: # Devuelve la conexión en lugar de cerrarla
+        if self._liberada:
+            return
+        self._liberada = True
+        prestamo = self._prestamo
+        prestamo.profundidad -= 1
+        if prestamo.profundidad == 0:
+            # Se puede cerrar desde otro hilo (un generador de iterar_consulta finalizado por el
+            # recolector): solo se limpia el préstamo activo si es este, nunca el de ese otro hilo
+            if _prestamo_activo() is prestamo:
+                _hilo.prestamo = None
+            try:
+                prestamo.mediciones.cerrar(prestamo.conn)
+            finally:
+                prestamo.pool.devolver(prestamo.conn)
+
+_pool = None
+_pool_lock = threading.Lock()
+_hilo = threading.local() # Préstamo activo del hilo actual
+
+def _prestamo_activo() -> Optional[_Prestamo]: # Ignora uno que otro hilo ya devolvió al pool
+    prestamo = getattr(_hilo, "prestamo", None)
+    return prestamo if prestamo is not None and prestamo.profundidad > 0 else None
+
+def obtener_pool() -> PoolConexiones: # Devuelve el pool activo, recreándolo si cambió DB_NAME
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.db_name != DB_NAME or _pool.perfil != PERFIL_ALMACENAMIENTO:
+            if _pool is not None:
+                _pool.cerrar()
+            _pool = PoolConexiones(DB_NAME, POOL_TAMANO, POOL_TIMEOUT, PERFIL_ALMACENAMIENTO)
+        return _pool
+
+def configurar_pool(tamano: int = POOL_TAMANO, timeout: float = POOL_TIMEOUT) -> PoolConexiones: # Reemplaza el pool con nuevos parámetros
+    global _pool, POOL_TAMANO, POOL_TIMEOUT
+    with _pool_lock:
+        nuevo = PoolConexiones(DB_NAME, tamano, timeout, PERFIL_ALMACENAMIENTO)
+        POOL_TAMANO, POOL_TIMEOUT = tamano, timeout
+        if _pool is not None:
+            _pool.cerrar()
+        _pool = nuevo
+        return _pool
+
+def cerrar_pool() -> None: # Cierra todas las conexiones ociosas del pool
+    global _pool, _vigia
+    with _pool_lock:
+        if _pool is not None:
+            _pool.cerrar()
+            _pool = None
+    with _vigia_lock:
+        if _vigia is not None:
+            _vigia.close()
+            _vigia = None
+
+def estado_pool() -> dict: # Métricas del pool para diagnóstico
+    return obtener_pool().estado()
+
+# -----------------------------------------
+# Versión de los datos
+# Usa PRAGMA data_version sobre una conexión vigía dedicada: su valor cambia cada vez que
+# otra conexión (del pool o de otro proceso) confirma cambios en la base. Sirve como clave
+# barata para invalidar cachés sin tener que instrumentar cada escritura.
+# -----------------------------------------
+_vigia = None
+_vigia_db = None
+_vigia_lock = threading.Lock()
+
+def version_datos() -> tuple:
+    global _vigia, _vigia_db
+    with _vigia_lock:
+        if _vigia is None or _vigia_db != DB_NAME:
+            if _vigia is not None:
+                _vigia.close()
+            _vigia = sqlite3.connect(DB_NAME, check_same_thread=False)
+            _vigia_db = DB_NAME
+        return (DB_NAME, _vigia.execute("PRAGMA data_version").fetchone()[0])
+
+def configurar_perfil(perfil: str) -> None: # Cambia el perfil de almacenamiento; aplica a las conexiones nuevas
+    global PERFIL_ALMACENAMIENTO
+    if perfil not in PERFILES_ALMACENAMIENTO:
+        raise ValueError(f"Perfil de almacenamiento desconocido: {perfil}")
+    PERFIL_ALMACENAMIENTO = perfil
+    cerrar_pool()
+
+# -----------------------------------------
+# Checkpoint manual del WAL
+# PASSIVE no bloquea a lectores ni escritores; TRUNCATE además reduce el archivo -wal a cero.
+# Devuelve (ocupado, páginas en el WAL, páginas volcadas).
+# -----------------------------------------
+def checkpoint(modo: str = "PASSIVE") -> tuple:
+    modo = modo.upper()
+    if modo not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+        raise ValueError(f"Modo de checkpoint inválido: {modo}")
+    with conectar() as conn:
+        return tuple(conn.execute(f"PRAGMA wal_checkpoint({modo})").fetchone())
+
+atexit.register(cerrar_pool)
+
+def conectar() -> ConexionPool: # Función para conectar a la base de datos (préstamo desde el pool)
+    prestamo = _prestamo_activo()
+    if prestamo is not None and prestamo.pool.db_name == DB_NAME:
+        prestamo.profundidad += 1
+        return ConexionPool(prestamo)
+    pool = obtener_pool()
+    prestamo = _Prestamo(pool, pool.obtener())
+    _hilo.prestamo = prestamo
+    return ConexionPool(prestamo)
+
+# -----------------------------------------
+# Iniciar transacción de escritura
+# BEGIN IMMEDIATE toma el lock de escritura al comenzar, así la verificación y la escritura
+# posteriores no pueden intercalarse con otra escritura. Si ya hay una transacción abierta
+# (por ejemplo, un préstamo anidado), se reutiliza.
+# -----------------------------------------
+def iniciar_escritura(conn) -> None:
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+
+def transaccion_activa() -> bool: # El hilo actual tiene una conexión prestada con una transacción abierta
+    prestamo = _prestamo_activo()
+    return prestamo is not None and prestamo.conn.in_transaction
+
+# -----------------------------------------
+# Escritura con reintentos
+# Ejecuta operacion(conn) dentro de BEGIN IMMEDIATE: la lectura del estado actual y la escritura que
+# depende de ella quedan bajo el mismo lock, sin que otra conexión escriba en el medio. Si la base sigue
+# ocupada al vencer busy_timeout (SQLITE_BUSY / SQLITE_LOCKED), se revierte y se reintenta hasta
+# REINTENTOS_ESCRITURA veces con espera exponencial al azar ("full jitter"), para que los procesos que
+# chocaron no vuelvan a intentarlo todos a la vez. Confirma al terminar si la operación no lo hizo.
+# Dentro de una transacción ya abierta (transaccion_unica, escritor agrupado) la externa tiene el lock:
+# la operación corre una sola vez y los errores se propagan.
+# -----------------------------------------
+_escrituras = {"reintentos": 0, "agotadas": 0}
+_escrituras_lock = threading.Lock()
+
+def _ocupada(e: sqlite3.OperationalError) -> bool:
+    codigo = getattr(e, "sqlite_errorcode", None)
+    if codigo is not None:
+        return codigo & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    return "locked" in str(e) or "busy" in str(e)
+
+def _contar_escritura(campo: str) -> None:
+    with _escrituras_lock:
+        _escrituras[campo] += 1
+
+def ejecutar_escritura(operacion, reintentos: Optional[int] = None):
+    if transaccion_activa():
+        with conectar() as conn:
+            return operacion(conn)
+    reintentos = REINTENTOS_ESCRITURA if reintentos is None else reintentos
+    intento = 0
+    while True:
+        with conectar() as conn:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                resultado = operacion(conn)
+                conn.commit()
+                return resultado
+            except sqlite3.OperationalError as e:
+                conn.rollback()
+                if not _ocupada(e):
+                    raise
+                if intento >= reintentos:
+                    _contar_escritura("agotadas")
+                    raise
+            except BaseException:
+                conn.rollback()
+                raise
+        intento += 1
+        _contar_escritura("reintentos")
+        time.sleep(random.uniform(0, min(ESPERA_REINTENTO_MAX, ESPERA_REINTENTO_BASE * 2 ** intento)))
+
+def estado_escrituras() -> dict: # Reintentos por base ocupada y escrituras que agotaron los reintentos
+    with _escrituras_lock:
+        return dict(_escrituras, reintentos_max=REINTENTOS_ESCRITURA)
+
+# -----------------------------------------
+# Transacción única
+# Mientras dura el bloque, todos los préstamos del hilo comparten una sola transacción de escritura:
+# los controladores siguen llamando a commit(), pero solo se confirma al salir del bloque sin errores.
+# Si el bloque termina con una excepción, se revierte todo.
+# -----------------------------------------
+@contextlib.contextmanager
+def transaccion_unica():
+    with conectar() as conn:
+        prestamo = conn._prestamo
+        if prestamo.diferida: # Anidada en otra transacción única: la externa decide
+            yield conn
+            return
+        iniciar_escritura(conn)
+        prestamo.diferida = True
+        try:
+            yield conn
+        finally:
+            prestamo.diferida = False
+
+# -----------------------------------------
+# Punto de guardado
+# SAVEPOINT dentro de la transacción actual: si el bloque lanza una excepción se deshacen solo
+# sus cambios (ROLLBACK TO) y la transacción sigue abierta.
+# -----------------------------------------
+@contextlib.contextmanager
+def punto_guardado(conn, nombre: str = "sg_punto"):
+    prestamo = conn._prestamo
+    nombre = f"{nombre}_{len(prestamo.puntos)}" # Nombres únicos si se anidan
+    conn.execute(f"SAVEPOINT {nombre}")
+    prestamo.puntos.append(nombre)
+    try:
+        yield
+    except BaseException:
+        conn.execute(f"ROLLBACK TO {nombre}")
+        raise
+    finally:
+        prestamo.puntos.pop()
+        conn.execute(f"RELEASE {nombre}")
+
+# -----------------------------------------
+# Iterar consulta en lotes
+# Generador que trae filas con fetchmany para no materializar el resultado completo en memoria.
+# La conexión queda prestada mientras el generador esté vivo; se devuelve al agotarlo o cerrarlo.
+# fabrica es un row_factory de sqlite3 (p. ej. sg_modelos.fila_mascota); sin ella se obtienen tuplas.
+# -----------------------------------------
+TAMANO_LOTE = 500 # Filas por llamada a fetchmany
+
+def iterar_consulta(sql: str, parametros: tuple = (), tamano_lote: int = TAMANO_LOTE, fabrica=None):
+    with conectar() as conn:
+        cursor = conn.cursor()
+        if fabrica is not None:
+            cursor.row_factory = fabrica
+        cursor.execute(sql, parametros)
+        while True:
+            filas = cursor.fetchmany(tamano_lote)
+            if not filas:
+                break
+            yield from filas
+
+def crear_tabla_usuarios(): # Función para crear la tabla de usuarios
+    with conectar() as conn:
+        c = conn.cursor()
+        c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS usuarios (
+                idUsuario INTEGER PRIMARY KEY AUTOINCREMENT,
+                nombre TEXT NOT NULL,
+                email TEXT NOT NULL UNIQUE,
+                password_hash TEXT NOT NULL,
+                password_salt TEXT NOT NULL,
+                rol TEXT NOT NULL
+            )
+            """
+        )
+        conn.commit()
+
+def crear_tablas_veterinaria(): # Función para crear la tabla de veterinarios
+    with conectar() as conn:
+        c = conn.cursor()
+        c.execute(
+            """ 
+            CREATE TABLE IF NOT EXISTS veterinarios (
+                idVeterinario INTEGER PRIMARY KEY AUTOINCREMENT,
+                nombre TEXT NOT NULL,
+                especialidad TEXT
+            )
+            """
+        )
+        conn.commit()
+
+def crear_tabla_mascotas(): # Función para crear la tabla de mascotas
+    # Esquema de la migración 1: la migración 9 reemplaza responsable (texto) por idResponsable (sg_migraciones.py)
+    with conectar() as conn:
+        c = conn.cursor()
+        c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS mascotas (
+                idMascota INTEGER PRIMARY KEY AUTOINCREMENT,
+                nombre TEXT NOT NULL,
+                especie TEXT,
+                raza TEXT,
+                edad INTEGER,
+                peso REAL,
+                responsable TEXT
+            )
+            """
+        )
+        conn.commit() 
+        
+def crear_tabla_reservas(): # Función para crear la tabla de reservas
+    with conectar() as conn:
+        c = conn.cursor()
+        c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS reservas (
+                idReserva INTEGER PRIMARY KEY AUTOINCREMENT,
+                idMascota INTEGER,
+                idVeterinario INTEGER,
+                fecha DATE,
+                hora TIME,
+                motivo TEXT,
+                estadoMascota TEXT,
+                FOREIGN KEY (idMascota) REFERENCES mascotas (idMascota),
+                FOREIGN KEY (idVeterinario) REFERENCES veterinarios (idVeterinario)
+            )
+            """
+        )
+        conn.commit()
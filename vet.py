@@ -0,0 +1,393 @@
+# vet.py - Línea de comandos no interactiva sobre los controladores.
+# Uso: python vet.py [--bd RUTA] [--format text|json] [--usuario NOMBRE] GRUPO ACCIÓN [opciones]
+#      python vet.py --usuario admin mascotas listar --especie Perro --format json
+#      python vet.py --usuario admin reservas crear 3 1 2030-05-02 10:30 Control Estable
+#      python vet.py --usuario admin batch comandos.txt   (o "-" para leer de stdin)
+# La contraseña se toma de SG_PASSWORD o se pide por teclado; se verifica una sola vez por ejecución
+# (usuarios registrar no la pide). Las migraciones también se aplican una sola vez.
+# En formato json cada comando imprime {"ok", "resultado", "mensajes"}: los mensajes son lo que el
+# controlador habría mostrado por pantalla.
+# batch ejecuta una línea por comando (sin opciones globales; # para comentarios) dentro de una sola
+# transacción: cada comando va en su propio punto de guardado, así que un comando que falla se deshace
+# solo, salvo con --todo-o-nada, que revierte todo ante el primer error. La salida es una línea JSON
+# por comando. Códigos de salida: 0 todo bien, 1 algún comando falló, 2 error de uso, 3 login inválido.
+import argparse, contextlib, dataclasses, getpass, io, json, os, shlex, sys
+import sg_veterinaria
+import controladores as c
+from sg_agenda import indice_agenda
+from sg_cache import cache_lectura
+from sg_disponibilidad import servicio_disponibilidad
+from sg_exportacion import FUENTES_EXPORTACION
+from sg_funciones import registrar_login, verificar_login
+from sg_migraciones import aplicar_migraciones
+from sg_modelos import a_dict
+from sg_reportes import obtener_resumen_general
+
+SALIDA_OK, SALIDA_FALLO, SALIDA_USO, SALIDA_LOGIN = 0, 1, 2, 3
+
+class ErrorComando(Exception): # El controlador informó un error (el detalle está en los mensajes)
+    pass
+
+class ErrorUso(Exception): # Línea de comando inválida (argparse)
+    pass
+
+def _exigir(valor):
+    # Los controladores devuelven None o False cuando fallan
+    if valor is None or valor is False:
+        raise ErrorComando()
+    return valor
+
+# -----------------------------------------
+# Acciones
+# Cada una recibe los argumentos ya interpretados y devuelve el resultado del comando.
+# -----------------------------------------
+def _mascotas_registrar(a):
+    return {"idMascota": _exigir(c.registrar_nueva_mascota(a.nombre, a.especie, a.raza, a.edad, a.peso, a.responsable))}
+
+def _mascotas_listar(a):
+    return [a_dict(m) for m in c.iterar_mascotas(a.despues_de, a.limite, a.especie, a.responsable)]
+
+def _responsables_registrar(a):
+    return {"idResponsable": _exigir(c.registrar_nuevo_responsable(a.nombre, a.telefono, a.email))}
+
+def _responsables_listar(a):
+    return [a_dict(r) for r in c.iterar_responsables(a.despues_de, a.limite)]
+
+def _responsables_actualizar(a):
+    return a_dict(_exigir(c.actualizar_responsable(a.id, a.nombre, a.telefono, a.email, a.version_esperada)))
+
+def _responsables_eliminar(a):
+    return _exigir(c.eliminar_responsable(a.id))
+
+def _responsables_mascotas(a):
+    return [a_dict(m) for m in c.iterar_mascotas(a.despues_de, a.limite, idResponsable=a.id)]
+
+def _responsables_reservas(a): # Una página; siguiente se pasa como --despues-de
+    pagina = c.buscar_reservas_por_responsable(a.id, a.despues_de, a.limite or c.TAMANO_PAGINA)
+    return {"datos": [a_dict(r) for r in pagina], "siguiente": pagina.siguiente}
+
+def _mascotas_actualizar(a):
+    return a_dict(_exigir(c.actualizar_mascota(a.id, a.nombre, a.especie, a.raza, a.edad, a.peso, a.responsable, a.version_esperada)))
+
+def _mascotas_eliminar(a):
+    return _exigir(c.eliminar_mascota(a.id))
+
+def _mascotas_contar(a):
+    return _exigir(c.contar_mascotas())
+
+def _veterinarios_registrar(a):
+    return {"idVeterinario": _exigir(c.registrar_nuevo_veterinario(a.nombre, a.especialidad))}
+
+def _veterinarios_listar(a):
+    if a.nombre is not None: # Búsqueda por nombre: se recorren todas sus páginas
+        vets, siguiente = [], None
+        while True:
+            pagina = c.buscar_veterinarios_por_nombre(a.nombre, siguiente)
+            vets.extend(pagina)
+            siguiente = pagina.siguiente
+            if siguiente is None or (a.limite is not None and len(vets) >= a.limite):
+                return [a_dict(v) for v in vets[:a.limite]]
+    return [a_dict(v) for v in c.iterar_veterinarios(a.despues_de, a.limite, a.especialidad)]
+
+def _veterinarios_actualizar(a):
+    return a_dict(_exigir(c.actualizar_veterinario(a.id, a.nombre, a.especialidad, a.version_esperada)))
+
+def _veterinarios_eliminar(a):
+    return _exigir(c.eliminar_veterinario(a.id))
+
+def _veterinarios_contar(a):
+    return _exigir(c.contar_veterinarios())
+
+def _reservas_crear(a):
+    return {"idReserva": _exigir(c.crear_reserva(a.idMascota, a.idVeterinario, a.fecha, a.hora, a.motivo, a.estado))}
+
+def _reservas_listar(a):
+    return [a_dict(r) for r in c.iterar_reservas(a.despues_de, a.limite, a.veterinario, a.desde, a.hasta)]
+
+def _reservas_modificar(a):
+    return a_dict(_exigir(c.modificar_reserva(a.id, a.mascota, a.veterinario, a.fecha, a.hora, a.motivo, a.estado, a.version_esperada)))
+
+def _reservas_eliminar(a):
+    return _exigir(c.eliminar_reserva(a.id))
+
+def _reservas_disponibles(a):
+    return [a_dict(h) for h in _exigir(c.buscar_horarios_disponibles(a.especialidad, a.desde, a.hasta, a.duracion, a.cantidad))]
+
+def _buscar(a): # Una página de la búsqueda de texto; siguiente se pasa como --despues-de
+    buscar = {"mascotas": c.buscar_mascotas, "responsables": c.buscar_responsables, "veterinarios": c.buscar_veterinarios,
+              "reservas": c.buscar_reservas_por_motivo}[a.grupo]
+    pagina = _exigir(buscar(a.texto, a.despues_de, a.limite or c.TAMANO_PAGINA))
+    return {"datos": [a_dict(r) for r in pagina], "siguiente": pagina.siguiente, "aproximada": pagina.aproximada}
+
+def _reportes_resumen(a):
+    return dataclasses.asdict(obtener_resumen_general(usar_cache=False)) # Un proceso corto no aprovecha la caché
+
+def _reportes_txt(a):
+    return _exigir(c.exportar_resumen_general_txt(a.ruta))
+
+def _reportes_exportar(a):
+    return {"filas": _exigir(c.exportar_datos(a.fuente, a.ruta, a.desde, a.hasta))}
+
+def _reportes_verificar(a):
+    return _exigir(c.verificar_contadores_estadisticos())
+
+def _reportes_reconstruir(a):
+    return _exigir(c.reconstruir_contadores_estadisticos())
+
+def _reportes_diagnostico(a):
+    return c.mostrar_diagnostico(a.limite)
+
+def _usuarios_registrar(a):
+    password = a.password or os.environ.get("SG_PASSWORD") or getpass.getpass("Contraseña del nuevo usuario: ")
+    return _exigir(registrar_login(a.username, a.email, password, a.rol))
+
+# -----------------------------------------
+# Parser
+# Las acciones quedan en args.accion; "requiere_login" es False solo para registrar usuarios.
+# -----------------------------------------
+class _Parser(argparse.ArgumentParser):
+    # En batch un error de uso no debe terminar el proceso
+    def error(self, message):
+        raise ErrorUso(f"{self.prog}: {message}")
+
+def _accion(grupo, nombre: str, funcion, ayuda: str, requiere_login: bool = True):
+    p = grupo.add_parser(nombre, help=ayuda, description=ayuda)
+    p.set_defaults(accion=funcion, requiere_login=requiere_login)
+    p.add_argument("--format", choices=["text", "json"], default=argparse.SUPPRESS, dest="formato") # También tras la acción
+    return p
+
+def _paginacion(p) -> None:
+    p.add_argument("--despues-de", type=int, default=0, help="Continuar después de este ID")
+    p.add_argument("--limite", type=int, help="Cantidad máxima de filas")
+
+def _version(p) -> None:
+    p.add_argument("--version-esperada", type=int, help="Rechazar el cambio si el registro ya no está en esta versión")
+
+def construir_parser(globales: bool = True) -> argparse.ArgumentParser:
+    parser = _Parser(prog="vet", description="Sistema de gestión veterinaria sin menús interactivos")
+    if globales:
+        parser.add_argument("--bd", help=f"Base de datos (por defecto {sg_veterinaria.DB_NAME})")
+        parser.add_argument("--format", choices=["text", "json"], default="text", dest="formato")
+        parser.add_argument("--usuario", default=os.environ.get("SG_USUARIO"), help="Usuario (o SG_USUARIO); contraseña en SG_PASSWORD")
+    grupos = parser.add_subparsers(dest="grupo", required=True, parser_class=_Parser)
+
+    mascotas = grupos.add_parser("mascotas", help="Alta, consulta y baja de mascotas").add_subparsers(dest="comando", required=True)
+    p = _accion(mascotas, "registrar", _mascotas_registrar, "Registrar una mascota")
+    p.add_argument("nombre"); p.add_argument("especie"); p.add_argument("raza")
+    p.add_argument("edad", type=int); p.add_argument("peso", type=float)
+    p.add_argument("--responsable", type=int, help="ID del responsable")
+    p = _accion(mascotas, "listar", _mascotas_listar, "Listar mascotas")
+    _paginacion(p)
+    p.add_argument("--especie"); p.add_argument("--responsable", type=int, help="ID del responsable")
+    p = _accion(mascotas, "actualizar", _mascotas_actualizar, "Actualizar los campos indicados de una mascota")
+    p.add_argument("id", type=int)
+    p.add_argument("--nombre"); p.add_argument("--especie"); p.add_argument("--raza")
+    p.add_argument("--edad", type=int); p.add_argument("--peso", type=float); p.add_argument("--responsable", type=int, help="ID del responsable")
+    _version(p)
+    p = _accion(mascotas, "eliminar", _mascotas_eliminar, "Eliminar una mascota")
+    p.add_argument("id", type=int)
+    _accion(mascotas, "contar", _mascotas_contar, "Total de mascotas")
+    p = _accion(mascotas, "buscar", _buscar, "Buscar por nombre, especie o raza (sin tildes, por prefijo)")
+    p.add_argument("texto"); _paginacion(p)
+
+    responsables = grupos.add_parser("responsables", help="Dueños de las mascotas").add_subparsers(dest="comando", required=True)
+    p = _accion(responsables, "registrar", _responsables_registrar, "Registrar un responsable")
+    p.add_argument("nombre"); p.add_argument("--telefono"); p.add_argument("--email")
+    p = _accion(responsables, "listar", _responsables_listar, "Listar responsables")
+    _paginacion(p)
+    p = _accion(responsables, "actualizar", _responsables_actualizar, "Actualizar nombre, teléfono o email")
+    p.add_argument("id", type=int); p.add_argument("--nombre"); p.add_argument("--telefono"); p.add_argument("--email")
+    _version(p)
+    p = _accion(responsables, "eliminar", _responsables_eliminar, "Eliminar un responsable sin mascotas")
+    p.add_argument("id", type=int)
+    p = _accion(responsables, "buscar", _buscar, "Buscar por nombre, teléfono o email (sin tildes, por prefijo)")
+    p.add_argument("texto"); _paginacion(p)
+    p = _accion(responsables, "mascotas", _responsables_mascotas, "Mascotas de un responsable")
+    p.add_argument("id", type=int); _paginacion(p)
+    p = _accion(responsables, "reservas", _responsables_reservas, "Reservas de las mascotas de un responsable")
+    p.add_argument("id", type=int); _paginacion(p)
+
+    veterinarios = grupos.add_parser("veterinarios", help="Alta, consulta y baja de veterinarios").add_subparsers(dest="comando", required=True)
+    p = _accion(veterinarios, "registrar", _veterinarios_registrar, "Registrar un veterinario")
+    p.add_argument("nombre"); p.add_argument("--especialidad")
+    p = _accion(veterinarios, "listar", _veterinarios_listar, "Listar veterinarios")
+    _paginacion(p)
+    p.add_argument("--especialidad"); p.add_argument("--nombre", help="Texto contenido en el nombre")
+    p = _accion(veterinarios, "actualizar", _veterinarios_actualizar, "Actualizar nombre o especialidad")
+    p.add_argument("id", type=int); p.add_argument("--nombre"); p.add_argument("--especialidad")
+    _version(p)
+    p = _accion(veterinarios, "eliminar", _veterinarios_eliminar, "Eliminar un veterinario")
+    p.add_argument("id", type=int)
+    _accion(veterinarios, "contar", _veterinarios_contar, "Total de veterinarios")
+    p = _accion(veterinarios, "buscar", _buscar, "Buscar por nombre o especialidad (sin tildes, por prefijo)")
+    p.add_argument("texto"); _paginacion(p)
+
+    reservas = grupos.add_parser("reservas", help="Agenda de reservas").add_subparsers(dest="comando", required=True)
+    p = _accion(reservas, "crear", _reservas_crear, "Crear una reserva")
+    p.add_argument("idMascota", type=int); p.add_argument("idVeterinario", type=int)
+    p.add_argument("fecha", help="YYYY-MM-DD"); p.add_argument("hora", help="HH:MM[:SS]")
+    p.add_argument("motivo"); p.add_argument("estado", help="Estado de la mascota")
+    p = _accion(reservas, "listar", _reservas_listar, "Listar reservas")
+    _paginacion(p)
+    p.add_argument("--veterinario", type=int); p.add_argument("--desde"); p.add_argument("--hasta")
+    p = _accion(reservas, "modificar", _reservas_modificar, "Modificar los campos indicados de una reserva")
+    p.add_argument("id", type=int)
+    p.add_argument("--mascota", type=int); p.add_argument("--veterinario", type=int)
+    p.add_argument("--fecha"); p.add_argument("--hora"); p.add_argument("--motivo"); p.add_argument("--estado")
+    _version(p)
+    p = _accion(reservas, "eliminar", _reservas_eliminar, "Eliminar una reserva")
+    p.add_argument("id", type=int)
+    p = _accion(reservas, "disponibles", _reservas_disponibles, "Próximos horarios libres")
+    p.add_argument("desde"); p.add_argument("hasta")
+    p.add_argument("--especialidad"); p.add_argument("--duracion", type=int, default=c.DURACION_CITA_MINUTOS)
+    p.add_argument("--cantidad", type=int, default=5)
+    p = _accion(reservas, "buscar", _buscar, "Buscar reservas por palabras del motivo")
+    p.add_argument("texto"); _paginacion(p)
+
+    reportes = grupos.add_parser("reportes", help="Reportes, exportación y diagnóstico").add_subparsers(dest="comando", required=True)
+    _accion(reportes, "resumen", _reportes_resumen, "Resumen general")
+    p = _accion(reportes, "txt", _reportes_txt, "Exportar el resumen general a TXT")
+    p.add_argument("ruta", nargs="?", default="reporte_resumen_general.txt")
+    p = _accion(reportes, "exportar", _reportes_exportar, "Exportar datos a CSV o JSON Lines")
+    p.add_argument("fuente", choices=sorted(FUENTES_EXPORTACION) + ["resumen_general"]); p.add_argument("ruta")
+    p.add_argument("--desde"); p.add_argument("--hasta")
+    _accion(reportes, "verificar", _reportes_verificar, "Verificar los contadores estadísticos")
+    _accion(reportes, "reconstruir", _reportes_reconstruir, "Reconstruir los contadores estadísticos")
+    p = _accion(reportes, "diagnostico", _reportes_diagnostico, "Métricas de consultas y controladores")
+    p.add_argument("--limite", type=int, default=10)
+
+    usuarios = grupos.add_parser("usuarios", help="Usuarios del sistema").add_subparsers(dest="comando", required=True)
+    p = _accion(usuarios, "registrar", _usuarios_registrar, "Registrar un usuario", requiere_login=False)
+    p.add_argument("username"); p.add_argument("email"); p.add_argument("rol")
+    p.add_argument("--password", help="Por defecto SG_PASSWORD o se pide por teclado")
+
+    if globales:
+        p = grupos.add_parser("batch", help="Ejecutar comandos desde un archivo o stdin en una sola transacción")
+        p.add_argument("archivo", nargs="?", default="-")
+        p.add_argument("--todo-o-nada", action="store_true", help="Revertir todo ante el primer comando que falle")
+        p.set_defaults(accion=None, requiere_login=True)
+    return parser
+
+# -----------------------------------------
+# Ejecutar comando
+# Corre la acción capturando lo que imprime el controlador.
+# Devuelve el documento {"ok", "resultado", "mensajes"}.
+# -----------------------------------------
+def ejecutar(args) -> dict:
+    salida = io.StringIO()
+    ok, resultado = True, None
+    with contextlib.redirect_stdout(salida):
+        try:
+            resultado = args.accion(args)
+        except ErrorComando:
+            ok = False
+    mensajes = [linea.strip() for linea in salida.getvalue().splitlines() if linea.strip()]
+    return {"ok": ok, "resultado": resultado, "mensajes": mensajes}
+
+def _imprimir_texto(documento: dict) -> None:
+    for mensaje in documento["mensajes"]:
+        print(mensaje)
+    resultado = documento["resultado"]
+    if isinstance(resultado, list) and resultado:
+        print(" | ".join(resultado[0]))
+        for fila in resultado:
+            print(" | ".join("" if v is None else str(v) for v in fila.values()))
+    elif isinstance(resultado, list):
+        print("Sin resultados.")
+    elif isinstance(resultado, dict) and not documento["mensajes"]:
+        for clave, valor in resultado.items():
+            print(f"{clave}: {valor}")
+    elif not documento["mensajes"] and resultado is not None and resultado is not True:
+        print(resultado)
+
+def _json(documento: dict) -> str:
+    return json.dumps(documento, ensure_ascii=False, default=str)
+
+# -----------------------------------------
+# Modo batch
+# Todas las líneas comparten la conexión del hilo y una transacción (transaccion_unica).
+# Las cachés de agenda y disponibilidad se invalidan antes de cada comando: se recargan por
+# data_version, que no cambia con las escrituras todavía sin confirmar de la propia transacción.
+# -----------------------------------------
+class _Revertir(Exception): # Sale del punto de guardado para deshacer un comando fallido
+    pass
+
+def ejecutar_batch(lineas, todo_o_nada: bool = False) -> int:
+    parser = construir_parser(globales=False)
+    fallos = 0
+    try:
+        with sg_veterinaria.transaccion_unica() as conn:
+            for numero, linea in enumerate(lineas, start=1):
+                linea = linea.strip()
+                if not linea or linea.startswith("#"):
+                    continue
+                documento = {"linea": numero, "comando": linea}
+                try:
+                    args = parser.parse_args(shlex.split(linea))
+                except (ErrorUso, ValueError) as e: # ValueError: comillas sin cerrar
+                    documento.update(ok=False, resultado=None, mensajes=[str(e)])
+                else:
+                    indice_agenda.invalidar()
+                    servicio_disponibilidad.invalidar()
+                    try:
+                        with sg_veterinaria.punto_guardado(conn, "sg_batch"):
+                            documento.update(ejecutar(args))
+                            if not documento["ok"]:
+                                raise _Revertir()
+                    except _Revertir:
+                        pass
+                print(_json(documento), flush=True)
+                if not documento["ok"]:
+                    fallos += 1
+                    if todo_o_nada:
+                        raise _Revertir()
+    except _Revertir:
+        print(_json({"ok": False, "resultado": None, "mensajes": ["Transacción revertida: ningún comando fue aplicado."]}))
+    finally:
+        indice_agenda.invalidar()
+        servicio_disponibilidad.invalidar()
+        cache_lectura.invalidar()
+    return SALIDA_FALLO if fallos else SALIDA_OK
+
+def _login(usuario: str) -> bool:
+    if not usuario:
+        return False
+    password = os.environ.get("SG_PASSWORD")
+    if password is None:
+        password = getpass.getpass(f"Contraseña de {usuario}: ")
+    with contextlib.redirect_stdout(sys.stderr): # Los errores de login no ensucian la salida JSON
+        return verificar_login(usuario, password)
+
+def main(argv=None) -> int:
+    parser = construir_parser()
+    try:
+        args = parser.parse_args(argv)
+    except ErrorUso as e:
+        print(e, file=sys.stderr)
+        return SALIDA_USO
+    if args.bd:
+        sg_veterinaria.DB_NAME = args.bd
+    with contextlib.redirect_stdout(sys.stderr):
+        aplicar_migraciones()
+    if args.requiere_login and not _login(args.usuario):
+        print("Login fallido: indique --usuario (o SG_USUARIO) y la contraseña en SG_PASSWORD.", file=sys.stderr)
+        return SALIDA_LOGIN
+
+    if args.grupo == "batch":
+        if args.archivo == "-":
+            return ejecutar_batch(sys.stdin, args.todo_o_nada)
+        with open(args.archivo, encoding="utf-8") as archivo:
+            return ejecutar_batch(archivo, args.todo_o_nada)
+
+    documento = ejecutar(args)
+    if args.formato == "json":
+        print(_json(documento))
+    else:
+        _imprimir_texto(documento)
+    return SALIDA_OK if documento["ok"] else SALIDA_FALLO
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    finally:
+        sg_veterinaria.cerrar_pool()